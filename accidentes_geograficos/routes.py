@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 from flask import jsonify, request
 
 from accidentes_geograficos import accidentes_geograficos_bp
+from catalog_cache import catalogs
 from models import db
 
 
@@ -40,10 +41,14 @@ def _evento_tipo_existe(evento_tipo_id):
 
 
 def _serialize_accidente_geografico(row):
+    # Tipo de evento y DPA se resuelven desde la cache de catalogos (sin JOIN)
+    provincia_nombre, canton_nombre, parroquia_nombre = catalogs.dpa_names(
+        row.provincia_id, row.canton_id, row.parroquia_id
+    )
     return {
         "id": getattr(row, "id", None),
         "evento_tipo_id": getattr(row, "evento_tipo_id", None),
-        "evento_tipo_nombre": getattr(row, "evento_tipo_nombre", None),
+        "evento_tipo_nombre": catalogs.value("evento_tipos", row.evento_tipo_id),
         "accidente_geografico_tipo_id": getattr(row, "accidente_geografico_tipo_id", None),
         "accidente_geografico_tipo_codigo": getattr(row, "accidente_geografico_tipo_codigo", None),
         "accidente_geografico_tipo_nombre": getattr(row, "accidente_geografico_tipo_nombre", None),
@@ -51,11 +56,11 @@ def _serialize_accidente_geografico(row):
         "nombre": getattr(row, "nombre", None),
         "descripcion": getattr(row, "descripcion", None),
         "provincia_id": getattr(row, "provincia_id", None),
-        "provincia_nombre": getattr(row, "provincia_nombre", None),
+        "provincia_nombre": provincia_nombre,
         "canton_id": getattr(row, "canton_id", None),
-        "canton_nombre": getattr(row, "canton_nombre", None),
+        "canton_nombre": canton_nombre,
         "parroquia_id": getattr(row, "parroquia_id", None),
-        "parroquia_nombre": getattr(row, "parroquia_nombre", None),
+        "parroquia_nombre": parroquia_nombre,
         "longitud": _to_float_optional(getattr(row, "longitud", None)),
         "latitud": _to_float_optional(getattr(row, "latitud", None)),
         "activo": getattr(row, "activo", None),
@@ -72,7 +77,6 @@ def _select_accidentes_geograficos(where_clause="", order_by="ag.id ASC"):
         SELECT
             ag.id,
             ag.evento_tipo_id,
-            et.nombre AS evento_tipo_nombre,
             ag.accidente_geografico_tipo_id,
             agt.codigo AS accidente_geografico_tipo_codigo,
             agt.nombre AS accidente_geografico_tipo_nombre,
@@ -80,11 +84,8 @@ def _select_accidentes_geograficos(where_clause="", order_by="ag.id ASC"):
             ag.nombre,
             ag.descripcion,
             ag.provincia_id,
-            p.nombre AS provincia_nombre,
             ag.canton_id,
-            c.nombre AS canton_nombre,
             ag.parroquia_id,
-            q.nombre AS parroquia_nombre,
             ag.longitud,
             ag.latitud,
             ag.activo,
@@ -93,19 +94,8 @@ def _select_accidentes_geograficos(where_clause="", order_by="ag.id ASC"):
             ag.modificador,
             ag.modificacion
         FROM {TABLE_NAME} ag
-        LEFT JOIN public.evento_tipos et
-            ON et.id = ag.evento_tipo_id
         LEFT JOIN public.accidente_geografico_tipos agt
             ON agt.id = ag.accidente_geografico_tipo_id
-        LEFT JOIN public.provincias p
-            ON p.id = ag.provincia_id
-        LEFT JOIN public.cantones c
-            ON c.provincia_id = ag.provincia_id
-           AND c.id = ag.canton_id
-        LEFT JOIN public.parroquias q
-            ON q.provincia_id = ag.provincia_id
-           AND q.canton_id = ag.canton_id
-           AND q.id = ag.parroquia_id
         {where_clause}
         ORDER BY {order_by}
         """
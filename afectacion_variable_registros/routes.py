@@ -1,4 +1,9 @@
+import os
+import threading
+import time
+
 from flask import request, jsonify, Blueprint
+from sqlalchemy.exc import IntegrityError
 from models import db
 from datetime import datetime, timezone
 
@@ -222,54 +227,9 @@ def get_data_afectaciones_registro_by_evento_by_canton(emergencia_id, canton_id,
         })
     return jsonify(registros)
 
-@afectacion_variable_registros_bp.route('/api/afectaciones_registros/eventos/emergencia/<int:emergencia_id>/provincia/<int:provincia_id>/canton/<int:canton_id>/coe/<int:coe_id>/mesa_grupo/<int:mesa_grupo_id>/', 
-methods=['GET'])
-def get_data_afectaciones_registro_by_evento_by_provincia_by_canton_by_coe_by_mesa_grupo(emergencia_id, provincia_id, canton_id, coe_id, mesa_grupo_id):
-    """Obtener data de afectaciones de registros por evento y cantón
-    ---
-    tags:
-      - Afectacion Variable Registros
-    parameters:
-      - name: emergencia_id
-        in: path
-        type: integer
-        required: true
-      - name: provincia_id
-        in: path
-        type: integer
-        required: true
-      - name: canton_id
-        in: path
-        type: integer
-        required: true    
-      - name: coe_id
-        in: path
-        type: integer
-        required: true
-      - name: mesa_grupo_id
-        in: path
-        type: integer
-        required: true
-    responses:
-        200:
-          description: Lista de registros por evento, provincia, cantón, coe y mesa grupo
-          schema:
-            type: array
-            items:
-              type: object
-              properties:
-                parroquia_id: {type: integer}
-                parroquia_nombre: {type: string}
-                evento_id: {type: integer}
-                evento_sector: {type: string}
-                evento_nombre: {type: string}
-                afectacion_variable_id: {type: integer}
-                variable_nombre: {type: string}
-                requiere_gis: {type: boolean}
-                cantidad: {type: integer}
-                costo: {type: integer}
-    """
-    query = db.text("""
+# Eventos del canton (parroquias de la emergencia) x variables del coe/mesa_grupo,
+# con el registro vigente de cada celda. Lo comparten la consulta y el guardado de la matriz.
+MATRIZ_EVENTOS_CTES = """
       WITH eventos_base AS (
           SELECT
               e.id AS evento_id,
@@ -342,7 +302,57 @@ def get_data_afectaciones_registro_by_evento_by_provincia_by_canton_by_coe_by_me
               r.creacion DESC,
               r.id DESC
       )
+"""
+
 
+@afectacion_variable_registros_bp.route('/api/afectaciones_registros/eventos/emergencia/<int:emergencia_id>/provincia/<int:provincia_id>/canton/<int:canton_id>/coe/<int:coe_id>/mesa_grupo/<int:mesa_grupo_id>/', 
+methods=['GET'])
+def get_data_afectaciones_registro_by_evento_by_provincia_by_canton_by_coe_by_mesa_grupo(emergencia_id, provincia_id, canton_id, coe_id, mesa_grupo_id):
+    """Obtener data de afectaciones de registros por evento y cantón
+    ---
+    tags:
+      - Afectacion Variable Registros
+    parameters:
+      - name: emergencia_id
+        in: path
+        type: integer
+        required: true
+      - name: provincia_id
+        in: path
+        type: integer
+        required: true
+      - name: canton_id
+        in: path
+        type: integer
+        required: true    
+      - name: coe_id
+        in: path
+        type: integer
+        required: true
+      - name: mesa_grupo_id
+        in: path
+        type: integer
+        required: true
+    responses:
+        200:
+          description: Lista de registros por evento, provincia, cantón, coe y mesa grupo
+          schema:
+            type: array
+            items:
+              type: object
+              properties:
+                parroquia_id: {type: integer}
+                parroquia_nombre: {type: string}
+                evento_id: {type: integer}
+                evento_sector: {type: string}
+                evento_nombre: {type: string}
+                afectacion_variable_id: {type: integer}
+                variable_nombre: {type: string}
+                requiere_gis: {type: boolean}
+                cantidad: {type: integer}
+                costo: {type: integer}
+    """
+    query = db.text(MATRIZ_EVENTOS_CTES + """
       SELECT
           r.id AS id,
 
@@ -395,6 +405,210 @@ def get_data_afectaciones_registro_by_evento_by_provincia_by_canton_by_coe_by_me
     return jsonify(registros)
 
 
+MATRIZ_UPSERT_COLUMNS = (
+    'emergencia_id', 'provincia_id', 'canton_id', 'parroquia_id', 'evento_id', 'afectacion_variable_id',
+    'cantidad', 'costo', 'activo', 'creador', 'creacion', 'modificador', 'modificacion'
+)
+
+# 13 binds por celda; Postgres admite hasta 65535 por sentencia
+MATRIZ_MAX_CELDAS = 5000
+
+
+def _es_numero(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _upsert_celdas(filas):
+    """Un solo INSERT ... ON CONFLICT sobre el indice unico de celda; devuelve las filas escritas."""
+    params = {}
+    values = []
+    for n, fila in enumerate(filas):
+        values.append('(' + ', '.join(f':{column}_{n}' for column in MATRIZ_UPSERT_COLUMNS) + ')')
+        params.update({f'{column}_{n}': fila[column] for column in MATRIZ_UPSERT_COLUMNS})
+    query = db.text(
+        f"INSERT INTO afectacion_variable_registros ({', '.join(MATRIZ_UPSERT_COLUMNS)})\n"
+        f"VALUES {', '.join(values)}\n"
+        "ON CONFLICT (emergencia_id, evento_id, afectacion_variable_id) WHERE COALESCE(activo, true) = true\n"
+        "DO UPDATE SET cantidad = EXCLUDED.cantidad, costo = EXCLUDED.costo,\n"
+        "    modificador = EXCLUDED.modificador, modificacion = EXCLUDED.modificacion\n"
+        "RETURNING id, parroquia_id, evento_id, afectacion_variable_id, cantidad, costo, (xmax = 0) AS insertado"
+    )
+    return db.session.execute(query, params).fetchall()
+
+
+@afectacion_variable_registros_bp.route('/api/afectaciones_registros/eventos/emergencia/<int:emergencia_id>/provincia/<int:provincia_id>/canton/<int:canton_id>/coe/<int:coe_id>/mesa_grupo/<int:mesa_grupo_id>/', 
+methods=['PUT'])
+def save_data_afectaciones_registro_by_evento_by_provincia_by_canton_by_coe_by_mesa_grupo(emergencia_id, provincia_id, canton_id, coe_id, mesa_grupo_id):
+    """Guardar la matriz de afectaciones (evento x variable) de un cantón y mesa grupo
+    ---
+    tags:
+      - Afectacion Variable Registros
+    description: >
+      Recibe las celdas de la matriz editada, las compara con los valores
+      vigentes y escribe solo las que cambiaron con un único INSERT ... ON
+      CONFLICT en una transacción. Una celda sin registro con cantidad y costo
+      en 0 no se guarda. Requiere migrations/0002_afectacion_registros_celda_unica.sql.
+    consumes:
+      - application/json
+    parameters:
+      - name: emergencia_id
+        in: path
+        type: integer
+        required: true
+      - name: provincia_id
+        in: path
+        type: integer
+        required: true
+      - name: canton_id
+        in: path
+        type: integer
+        required: true
+      - name: coe_id
+        in: path
+        type: integer
+        required: true
+      - name: mesa_grupo_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required: [celdas]
+          properties:
+            modificador: {type: string}
+            celdas:
+              type: array
+              items:
+                type: object
+                required: [evento_id, afectacion_variable_id, cantidad, costo]
+                properties:
+                  evento_id: {type: integer}
+                  afectacion_variable_id: {type: integer}
+                  cantidad: {type: integer}
+                  costo: {type: integer}
+    responses:
+      200:
+        description: Celdas que cambiaron
+        schema:
+          type: object
+          properties:
+            cambios:
+              type: array
+              items:
+                type: object
+                properties:
+                  id: {type: integer}
+                  parroquia_id: {type: integer}
+                  evento_id: {type: integer}
+                  afectacion_variable_id: {type: integer}
+                  cantidad: {type: integer}
+                  costo: {type: integer}
+                  insertado: {type: boolean}
+            insertados: {type: integer}
+            actualizados: {type: integer}
+            sin_cambios: {type: integer}
+      400:
+        description: Celdas invalidas o fuera de la matriz
+      409:
+        description: Conflicto con el indice unico de celda
+    """
+    data = request.get_json(silent=True) or {}
+    celdas = data.get('celdas')
+    if not isinstance(celdas, list):
+        return jsonify({'error': 'celdas debe ser una lista'}), 400
+    if len(celdas) > MATRIZ_MAX_CELDAS:
+        return jsonify({'error': f'Se admiten hasta {MATRIZ_MAX_CELDAS} celdas por guardado'}), 400
+
+    query = db.text(MATRIZ_EVENTOS_CTES + """
+      SELECT
+          eb.evento_id,
+          eb.parroquia_id,
+          v.afectacion_variable_id,
+          r.id,
+          COALESCE(r.cantidad, 0) AS cantidad,
+          COALESCE(r.costo, 0) AS costo
+      FROM eventos_base eb
+      CROSS JOIN variables_base v
+      LEFT JOIN registros_unicos r
+            ON r.evento_id = eb.evento_id
+            AND r.afectacion_variable_id = v.afectacion_variable_id
+    """)
+    result = db.session.execute(query, {'emergencia_id': emergencia_id, 'provincia_id': provincia_id, 'canton_id': canton_id, 'coe_id': coe_id, 'mesa_grupo_id': mesa_grupo_id})
+    vigentes = {(row.evento_id, row.afectacion_variable_id): row for row in result}
+
+    errores = []
+    vistas = set()
+    cambios = []
+    for index, celda in enumerate(celdas):
+        if not isinstance(celda, dict):
+            errores.append({'index': index, 'error': 'La celda debe ser un objeto'})
+            continue
+        key = (celda.get('evento_id'), celda.get('afectacion_variable_id'))
+        if key not in vigentes:
+            errores.append({'index': index, 'error': 'La celda no pertenece a la matriz'})
+            continue
+        if key in vistas:
+            errores.append({'index': index, 'error': 'Celda repetida'})
+            continue
+        vistas.add(key)
+        if not _es_numero(celda.get('cantidad')) or not _es_numero(celda.get('costo')):
+            errores.append({'index': index, 'error': 'cantidad y costo deben ser numericos'})
+            continue
+        vigente = vigentes[key]
+        if vigente.cantidad == celda['cantidad'] and vigente.costo == celda['costo']:
+            continue
+        cambios.append((vigente, celda))
+    if errores:
+        return jsonify({'error': 'Celdas invalidas', 'errores': errores}), 400
+
+    if not cambios:
+        return jsonify({'cambios': [], 'insertados': 0, 'actualizados': 0, 'sin_cambios': len(celdas)})
+
+    now = datetime.now(timezone.utc)
+    modificador = data.get('modificador', 'Sistema')
+    filas = [{
+        'emergencia_id': emergencia_id,
+        'provincia_id': provincia_id,
+        'canton_id': canton_id,
+        'parroquia_id': vigente.parroquia_id,
+        'evento_id': vigente.evento_id,
+        'afectacion_variable_id': vigente.afectacion_variable_id,
+        'cantidad': celda['cantidad'],
+        'costo': celda['costo'],
+        'activo': True,
+        'creador': modificador,
+        'creacion': now,
+        'modificador': modificador,
+        'modificacion': now
+    } for vigente, celda in cambios]
+
+    try:
+        escritas = _upsert_celdas(filas)
+        db.session.commit()
+    except IntegrityError as ex:
+        db.session.rollback()
+        return jsonify({'error': 'Conflicto al guardar la matriz', 'detalle': str(getattr(ex, 'orig', ex))}), 409
+
+    insertados = sum(1 for row in escritas if row.insertado)
+    return jsonify({
+        'cambios': [{
+            'id': row.id,
+            'parroquia_id': row.parroquia_id,
+            'evento_id': row.evento_id,
+            'afectacion_variable_id': row.afectacion_variable_id,
+            'cantidad': row.cantidad,
+            'costo': row.costo,
+            'insertado': row.insertado
+        } for row in escritas],
+        'insertados': insertados,
+        'actualizados': len(escritas) - insertados,
+        'sin_cambios': len(celdas) - len(escritas)
+    })
+
+
 @afectacion_variable_registros_bp.route('/api/afectacion_variable_registros/parroquia/<int:parroquia_id>/emergencia/<int:emergencia_id>/mesa_grupo/<int:mesa_grupo_id>', methods=['GET'])
 def get_data_afectaciones_registro_by_parroquia(parroquia_id, emergencia_id, mesa_grupo_id):
     """Obtener data afectaciones registro por parroquia
@@ -529,21 +743,28 @@ def create_afectacion_variable_registro():
         RETURNING id
     """)
 
-    result = db.session.execute(query, {
-        'emergencia_id': data['emergencia_id'],
-        'provincia_id': data['provincia_id'],
-        'canton_id': data['canton_id'],
-        'parroquia_id': data['parroquia_id'],
-        'evento_id': data['evento_id'],
-        'afectacion_variable_id': data['afectacion_variable_id'],
-        'cantidad': data['cantidad'],
-        'costo': data['costo'],
-        'activo': data.get('activo', True),
-        'creador': data.get('creador', 'Sistema'),
-        'creacion': now,
-        'modificador': data.get('creador', 'Sistema'),
-        'modificacion': now
-    })
+    try:
+        result = db.session.execute(query, {
+            'emergencia_id': data['emergencia_id'],
+            'provincia_id': data['provincia_id'],
+            'canton_id': data['canton_id'],
+            'parroquia_id': data['parroquia_id'],
+            'evento_id': data['evento_id'],
+            'afectacion_variable_id': data['afectacion_variable_id'],
+            'cantidad': data['cantidad'],
+            'costo': data['costo'],
+            'activo': data.get('activo', True),
+            'creador': data.get('creador', 'Sistema'),
+            'creacion': now,
+            'modificador': data.get('creador', 'Sistema'),
+            'modificacion': now
+        })
+    except IntegrityError as ex:
+        db.session.rollback()
+        message = str(getattr(ex, 'orig', ex))
+        if 'ux_afectacion_variable_registros_celda' in message:
+            return jsonify({'error': 'Ya existe un registro activo para el evento y la variable', 'detalle': message}), 409
+        raise
 
     row = result.fetchone()
     if row is None:
@@ -744,18 +965,156 @@ def delete_afectacion_variable_registro(id):
     db.session.commit()
     return jsonify({'mensaje': 'Registro eliminado correctamente'})
 
+RECIENTES_LIMITE = 500
+RECIENTES_LIMITE_MAX = 5000
+USUARIOS_DESTINO_TTL = float(os.getenv('USUARIOS_DESTINO_TTL', '60'))
+
+# coe_id -> (monotonic de carga, usuarios); la lista cambia poco y se pide en cada poll
+_usuarios_destino_cache = {}
+_usuarios_destino_lock = threading.Lock()
+
+_RECIENTES_CURSOR_SQL = """
+    WITH corte AS (
+        SELECT txid_snapshot_xmin(txid_current_snapshot()) AS hasta
+    )
+    SELECT
+        r.cambio_txid,
+        r.id AS afectacion_variable_registro_id,
+        r.afectacion_variable_id,
+        v.nombre AS afectacion_variable_nombre,
+        r.creador,
+        r.creacion,
+        r.modificador,
+        r.modificacion
+    FROM afectacion_variable_registros r
+    CROSS JOIN corte
+    INNER JOIN afectacion_variables v ON v.id = r.afectacion_variable_id
+    WHERE (r.cambio_txid, r.id) > (:txid, :id)
+      AND r.cambio_txid < corte.hasta
+    ORDER BY r.cambio_txid, r.id
+    LIMIT :limite
+"""
+
+_CORTE_CURSOR_SQL = "SELECT txid_snapshot_xmin(txid_current_snapshot())"
+
+_USUARIOS_DESTINO_SQL = """
+    SELECT u.id, u.usuario, u.descripcion
+    FROM usuarios u
+    INNER JOIN usuario_perfil_coe_dpa_mesa ux ON u.id = ux.usuario_id
+    WHERE ux.coe_id = :coe_id AND u.activo = TRUE AND ux.activo = TRUE
+"""
+
+
+def _usuarios_destino(coe_id):
+    """Usuarios activos del COE, cacheados por ``USUARIOS_DESTINO_TTL`` segundos."""
+    now = time.monotonic()
+    with _usuarios_destino_lock:
+        entry = _usuarios_destino_cache.get(coe_id)
+    if entry is not None and now - entry[0] < USUARIOS_DESTINO_TTL:
+        return entry[1]
+    usuarios = []
+    for row in db.session.execute(db.text(_USUARIOS_DESTINO_SQL), {'coe_id': coe_id}):
+        usuarios.append({  # type: ignore
+            'id': row.id,
+            'usuario': row.usuario,
+            'descripcion': row.descripcion,
+        })
+    with _usuarios_destino_lock:
+        _usuarios_destino_cache[coe_id] = (now, usuarios)
+    return usuarios
+
+
+def _registro_reciente(row):
+    return {
+        'afectacion_variable_registro_id': row.afectacion_variable_registro_id,
+        'afectacion_variable_id': row.afectacion_variable_id,
+        'afectacion_variable_nombre': row.afectacion_variable_nombre,
+        'creador': row.creador,
+        'creacion': row.creacion.isoformat() if row.creacion else None,
+        'modificador': row.modificador,
+        'modificacion': row.modificacion.isoformat() if row.modificacion else None
+    }
+
+
+def _parse_cursor(raw):
+    """``'txid:id'`` -> (txid, id); ``'0'`` o vacio es el inicio. None si es invalido."""
+    if raw in ('', '0'):
+        return 0, 0
+    partes = raw.split(':')
+    if len(partes) != 2 or not all(p.isdigit() for p in partes):
+        return None
+    return int(partes[0]), int(partes[1])
+
+
+def _recientes_por_cursor(raw_cursor, coe_id):
+    if raw_cursor == 'actual':
+        hasta = db.session.execute(db.text(_CORTE_CURSOR_SQL)).scalar()
+        return jsonify({
+            'cursor': f'{hasta}:0',
+            'hay_mas': False,
+            'coe_id': coe_id,
+            'registros': [],
+            'usuarios_destino': _usuarios_destino(coe_id)
+        })
+
+    cursor = _parse_cursor(raw_cursor)
+    if cursor is None:
+        return jsonify({'error': 'cursor must be "txid:id", "0" or "actual"'}), 400
+    limite = request.args.get('limit', default=RECIENTES_LIMITE, type=int)
+    limite = max(1, min(limite, RECIENTES_LIMITE_MAX))
+
+    rows = db.session.execute(db.text(_RECIENTES_CURSOR_SQL), {
+        'txid': cursor[0],
+        'id': cursor[1],
+        'limite': limite + 1
+    }).fetchall()
+    hay_mas = len(rows) > limite
+    rows = rows[:limite]
+    if hay_mas:
+        siguiente = f'{rows[-1].cambio_txid}:{rows[-1].afectacion_variable_registro_id}'
+    else:
+        # Sin pendientes: se avanza hasta el corte para que el proximo poll no recorra nada
+        hasta = db.session.execute(db.text(_CORTE_CURSOR_SQL)).scalar()
+        txid, registro_id = max((hasta, 0), cursor)
+        siguiente = f'{txid}:{registro_id}'
+
+    return jsonify({
+        'cursor': siguiente,
+        'hay_mas': hay_mas,
+        'coe_id': coe_id,
+        'registros': [_registro_reciente(row) for row in rows],
+        'usuarios_destino': _usuarios_destino(coe_id)
+    })
+
+
 @afectacion_variable_registros_bp.route('/api/afectacion_variable_registros/recientes', methods=['GET'])
 def get_afectacion_variable_registros_recientes():
     """Obtener afectacion_variable_registros recientes para notificaciones
     ---
     tags:
       - Afectacion Variable Registros
+    description: >
+      Con cursor se devuelven los cambios posteriores al cursor en lotes de a lo
+      sumo limit filas, junto con el cursor siguiente (hay_mas=true indica que
+      hay que volver a pedir enseguida). cursor=0 recorre desde el inicio y
+      cursor=actual devuelve solo el cursor actual, para empezar desde ahora.
+      El modo since (timestamp) se mantiene por compatibilidad.
     parameters:
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Cursor "txid:id" devuelto por la consulta anterior, "0" o "actual"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximo de registros por lote en modo cursor (default 500, max 5000)
       - name: since
         in: query
         type: string
-        required: true
-        description: ISO 8601 timestamp (UTC)
+        required: false
+        description: ISO 8601 timestamp (UTC); requerido si no se envia cursor
       - name: coe_id
         in: query
         type: integer
@@ -765,17 +1124,20 @@ def get_afectacion_variable_registros_recientes():
       200:
         description: Lista de registros recientes
     """
+    coe_id = request.args.get('coe_id', default=2, type=int)
+    raw_cursor = request.args.get('cursor')
+    if raw_cursor is not None:
+        return _recientes_por_cursor(raw_cursor.strip(), coe_id)
+
     since_raw = request.args.get('since')
     if not since_raw:
-        return jsonify({'error': 'since is required (ISO 8601)'}), 400
+        return jsonify({'error': 'since (ISO 8601) or cursor is required'}), 400
 
     try:
         since_dt = datetime.fromisoformat(since_raw.replace('Z', '+00:00'))
     except ValueError:
         return jsonify({'error': 'since must be ISO 8601'}), 400
 
-    coe_id = request.args.get('coe_id', default=2, type=int)
-
     query = db.text("""
         SELECT
             r.id AS afectacion_variable_registro_id,
@@ -792,35 +1154,11 @@ def get_afectacion_variable_registros_recientes():
     """)
 
     result = db.session.execute(query, {'since': since_dt})
-    registros = []
-    for row in result:
-        registros.append({  # type: ignore
-            'afectacion_variable_registro_id': row.afectacion_variable_registro_id,
-            'afectacion_variable_id': row.afectacion_variable_id,
-            'afectacion_variable_nombre': row.afectacion_variable_nombre,
-            'creador': row.creador,
-            'creacion': row.creacion.isoformat() if row.creacion else None,
-            'modificador': row.modificador,
-            'modificacion': row.modificacion.isoformat() if row.modificacion else None
-        })
-
-    usuarios_query = db.text("""
-        SELECT u.id, u.usuario, u.descripcion
-        FROM usuarios u
-        INNER JOIN usuario_perfil_coe_dpa_mesa ux ON u.id = ux.usuario_id
-        WHERE ux.coe_id = :coe_id AND u.activo = TRUE AND ux.activo = TRUE
-    """)
-    usuarios = []
-    for row in db.session.execute(usuarios_query, {'coe_id': coe_id}):
-        usuarios.append({  # type: ignore
-            'id': row.id,
-            'usuario': row.usuario,
-            'descripcion': row.descripcion,
-        })
+    registros = [_registro_reciente(row) for row in result]
 
     return jsonify({
         'since': since_dt.isoformat(),
         'coe_id': coe_id,
         'registros': registros,
-        'usuarios_destino': usuarios
+        'usuarios_destino': _usuarios_destino(coe_id)
     })
@@ -3,15 +3,24 @@ from flask_sqlalchemy import SQLAlchemy
 from config import DATABASE_URL, FRONTEND_ORIGIN
 from flasgger import Swagger
 from flask_cors import CORS
-from auth import decode_token
+from auth import PasswordHasherBusy, decode_token, password_hasher, token_cache
+from catalog_cache import catalogs, init_catalog_cache
+from conditional_get import init_conditional_get, register_cache_policy
+from json_provider import FastJSONProvider
+from permisos_cache import accesos, matrices
+from pg_notifications import hub
+from public_routes import compile_public_routes, public_route, register_public_path, register_public_prefix
+from table_versions import init_table_versions, track_blueprint_writes
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 CORS(
     app,
     origins=[FRONTEND_ORIGIN],
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["X-Insertados", "X-Actualizados", "X-Desactivados"],
     supports_credentials=True
 )
 
@@ -120,6 +129,8 @@ from reportes.recursos_movilizados import recursos_movilizados_script_bp
 from reportes.geoJson_afectaciones import geoJson_afectaciones_script_bp
 from reportes.geoJson_asistencias import geoJson_asistencias_script_bp
 from reportes.geoJson_afectaciones_vs_asistencias import geoJson_afectaciones_vs_asistencias_script_bp
+from reportes.mysql_pool import mysql_pool_bp
+from reportes.mysql_cache import mysql_cache_bp
 from coes_activados import coes_activados_bp
 from barridos import barridos_bp
 from barrido_estado import barrido_estado_bp
@@ -127,6 +138,7 @@ from barrido_intensidad import barrido_intensidad_bp
 from barrido_monitoreo import barrido_monitoreo_bp
 from accidente_geografico_tipos import accidente_geografico_tipos_bp
 from accidentes_geograficos import accidentes_geograficos_bp
+from notificaciones import notificaciones_bp
 
 
 
@@ -200,6 +212,8 @@ app.register_blueprint(recursos_movilizados_script_bp)
 app.register_blueprint(geoJson_afectaciones_script_bp)
 app.register_blueprint(geoJson_asistencias_script_bp)
 app.register_blueprint(geoJson_afectaciones_vs_asistencias_script_bp)  # <-- corregido para evitar conflicto de rutas
+app.register_blueprint(mysql_pool_bp)
+app.register_blueprint(mysql_cache_bp)
 app.register_blueprint(coes_activados_bp)
 app.register_blueprint(barridos_bp)
 app.register_blueprint(barrido_estado_bp)
@@ -207,54 +221,26 @@ app.register_blueprint(barrido_intensidad_bp)
 app.register_blueprint(barrido_monitoreo_bp)
 app.register_blueprint(accidente_geografico_tipos_bp)
 app.register_blueprint(accidentes_geograficos_bp)
+app.register_blueprint(notificaciones_bp)
 
 
 # Initialize Swagger after all blueprints are registered so Flasgger picks up docstrings from new modules
 swagger = Swagger(app, template=swagger_template)
 
-# Global before_request: require JWT for all endpoints except whitelist
-WHITELIST_PATHS = [
-    '/api/health',
-    '/api/usuarios/login',
-    '/api/usuarios',  # allow user creation (POST) - if you want it public
-    '/api/admin/eventos_historico_cache/refresh',
-    '/api/admin/eventos_historico_cache/status',
-    '/api/admin/eventos_dashboard_cache/refresh',
-    '/api/admin/eventos_dashboard_cache/status',
-    '/eventos_historico',
-    '/eventos_historico_json',
-    '/eventos_dashboard_json',
-    '/eventos_dashboard_json_stream',
-    '/eventos_dashboard',
-    '/apidocs',             # UI Swagger
-    '/apidocs/',            # por si acaso
-    '/flasgger_static',     # archivos estáticos de Swagger UI
-    '/apispec_1.json'       # especificación de la API que consume Swagger
-    '/api/public/asistencia_humanitaria_json',
-    '/api/public/alojamientos_temporales_json',
-    '/api/public/movilizaciones_aereas_json',
-    '/api/public/recursos_movilizados_json',
-    '/api/public/get_geoJson_asistencias',
-    '/api/public/get_geoJson_afectaciones'
-    '/api/public/get_geoJson_afectaciones_vs_asistencias'
-    '/api/public/movilizaciones_aereas_looker_json'
-
-]
+# Global before_request: require JWT for all endpoints except public routes.
+# Las vistas se marcan con @public_route; aca solo lo que no es vista propia.
+register_public_prefix('/api/public')
+register_public_prefix('/apidocs')          # UI Swagger
+register_public_prefix('/flasgger_static')  # archivos estáticos de Swagger UI
+register_public_path('/apispec_1.json')     # especificación de la API que consume Swagger
 
 @app.before_request
 def require_jwt_for_all():
     # Allow OPTIONS for CORS preflight
     if request.method == 'OPTIONS':
         return None
-    path = request.path
-    # Allow whitelisted paths
-    if (
-        path in WHITELIST_PATHS
-        or path.startswith("/apidocs")
-        or path.startswith("/flasgger_static")
-        or path.startswith("/apispec")
-        or path.startswith("/api/public")
-    ):
+    # Allow public routes
+    if PUBLIC_ROUTES.matches(request.path, request.method):
         return None
     # Extract token
     auth = request.headers.get('Authorization', None)
@@ -270,15 +256,92 @@ def require_jwt_for_all():
     # Attach decoded to request for downstream handlers
     g.user = decoded
 
+# Versiones por tabla: las escrituras de estos blueprints incrementan su contador
+# (los blueprints de catalogos se registran en catalog_cache)
+for versioned_bp in ('menus', 'opciones', 'perfiles', 'perfil_coe_mesa_menu_opcion'):
+    track_blueprint_writes(versioned_bp)
+init_table_versions(app)
+
+# ETag / 304 en los GET de catalogos: blueprint -> tablas que leen sus GET.
+# Se registra despues del hook de JWT para no responder 304 sin token.
+DPA_CACHE_CONTROL = 'private, max-age=300'
+register_cache_policy('provincias', ['provincias'], DPA_CACHE_CONTROL,
+                      exclude=['provincias.get_provincias_by_emergencia'])
+register_cache_policy('cantones', ['cantones'], DPA_CACHE_CONTROL,
+                      exclude=['cantones.get_cantones_by_emergencia_by_provincia'])
+register_cache_policy('parroquias', ['parroquias'], DPA_CACHE_CONTROL,
+                      exclude=['parroquias.get_parroquias_by_canton',
+                               'parroquias.get_parroquias_by_emergencia_by_canton'])
+register_cache_policy('coes', ['coes'])
+register_cache_policy('mesas', ['mesas', 'mesa_grupos'], exclude=['mesas.get_mesa_lista'])
+register_cache_policy('mesa_grupos', ['mesa_grupos'])
+register_cache_policy('evento_tipos', ['evento_tipos', 'evento_clases', 'evento_fenomenos'])
+register_cache_policy('evento_subtipos', ['evento_subtipos', 'evento_tipos'])
+register_cache_policy('recurso_tipos', ['recurso_tipos', 'recurso_grupos'])
+register_cache_policy('recurso_grupos', ['recurso_grupos'])
+register_cache_policy('recurso_categorias', ['recurso_categorias'])
+register_cache_policy('menus', ['menus', 'perfil_coe_mesa_menu_opcion'])
+register_cache_policy('opciones', ['opciones', 'perfil_coe_mesa_menu_opcion'])
+register_cache_policy('perfiles', ['perfiles'])
+for estados_bp in ('accion_respuesta_estados', 'acta_coe_estados', 'acta_coe_resolucion_estados',
+                   'alojamiento_estados', 'barrido_estado', 'evento_atencion_estados',
+                   'evento_estados', 'requerimiento_estados', 'respuesta_estados'):
+    register_cache_policy(estados_bp, [estados_bp])
+init_conditional_get(app)
+
 # Ruta de salud
 @app.route('/api/health', methods=['GET'])
+@public_route
 def health_check():
     # Health check
     return jsonify({'estado': 'OK', 'mensaje': 'API funcionando correctamente'})
 
+# Metricas de la cache de tokens JWT verificados
+@app.route('/api/admin/jwt_cache/status', methods=['GET'])
+def jwt_cache_status():
+    return jsonify(token_cache.stats())
+
+# Metricas de bcrypt (turnos, espera, latencia de verify, rehash)
+@app.route('/api/admin/password_hasher/status', methods=['GET'])
+def password_hasher_status():
+    return jsonify(password_hasher.stats())
+
+# Sin turno para bcrypt (avalancha de logins): 503 para que el cliente reintente
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(error):
+    response = jsonify({'error': 'Servicio ocupado, reintente en unos segundos'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+# Estado de la cache de catalogos en memoria
+@app.route('/api/admin/catalog_cache/status', methods=['GET'])
+def catalog_cache_status():
+    return jsonify(catalogs.status())
+
+# Estado de las caches de permisos (matrices y accesos por perfil)
+@app.route('/api/admin/permisos_cache/status', methods=['GET'])
+def permisos_cache_status():
+    return jsonify({'matrices': matrices.status(), 'accesos': accesos.status()})
+
+# Estado del listener LISTEN/NOTIFY y de los streams de notificaciones de este worker
+@app.route('/api/admin/notificaciones/status', methods=['GET'])
+def notificaciones_status():
+    return jsonify(hub.status())
+
+# Compilar rutas públicas una vez registradas todas las vistas
+PUBLIC_ROUTES = compile_public_routes(app)
+
 # Inicializar base de datos
 with app.app_context():
     db.create_all()
 
+# Catalogos en memoria (se recargan cuando cambia la version de su tabla)
+init_catalog_cache(app)
+
+# Refresco programado de caches MySQL (MYSQL_CACHE_SCHEDULER=1)
+from reportes.cache_scheduler import start_cache_scheduler
+start_cache_scheduler(app)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
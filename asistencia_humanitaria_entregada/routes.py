@@ -3,9 +3,13 @@ from datetime import datetime, timezone
 from flask import jsonify, request
 
 from asistencia_humanitaria_entregada import asistencia_humanitaria_entregada_bp
+from catalog_cache import catalogs
 from models import db
 
 
+ASISTENCIA_HUMANITARIA_CATEGORIA_ID = 1
+
+
 def _to_iso_optional(value):
     if value is None or value == "":
         return None
@@ -31,24 +35,54 @@ def _to_float_optional(value):
         return None
 
 
-def _serialize_asistencia(row):
+def _recurso_asistencia(recurso_tipo_id):
+    """(tipo, grupo, categoria) desde la cache de catalogos, o None si el tipo
+    no pertenece a la categoria de asistencia humanitaria."""
+    tipo = catalogs.get("recurso_tipos", recurso_tipo_id)
+    if tipo is None:
+        return None
+    grupo = catalogs.get(
+        "recurso_grupos",
+        tipo.get("recurso_grupo_id"),
+        recurso_categoria_id=ASISTENCIA_HUMANITARIA_CATEGORIA_ID,
+    )
+    if grupo is None:
+        return None
+    categoria = catalogs.get("recurso_categorias", grupo.get("recurso_categoria_id"))
+    if categoria is None:
+        return None
+    return tipo, grupo, categoria
+
+
+def _serialize_asistencia(row, recurso=None):
+    if recurso is None:
+        recurso = _recurso_asistencia(row.recurso_tipo_id)
+    tipo, grupo, categoria = recurso
+    provincia_destino_id = getattr(row, "provincia_destino_id", None)
+    canton_destino_id = getattr(row, "canton_destino_id", None)
+    parroquia_destino_id = getattr(row, "parroquia_destino_id", None)
     return {
         "id": getattr(row, "id", None),
         "emergencia_id": getattr(row, "emergencia_id", None),
         "recurso_tipo_id": getattr(row, "recurso_tipo_id", None),
-        "recurso_tipo": getattr(row, "recurso_tipo", None),
-        "recurso_grupo_id": getattr(row, "recurso_grupo_id", None),
-        "recurso_grupo": getattr(row, "recurso_grupo", None),
-        "recurso_categoria_id": getattr(row, "recurso_categoria_id", None),
-        "recurso_categoria": getattr(row, "recurso_categoria", None),
+        "recurso_tipo": tipo.get("nombre"),
+        "recurso_grupo_id": grupo.get("id"),
+        "recurso_grupo": grupo.get("nombre"),
+        "recurso_categoria_id": categoria.get("id"),
+        "recurso_categoria": categoria.get("nombre"),
         "institucion_donante_id": getattr(row, "institucion_donante_id", None),
         "institucion_donante": getattr(row, "institucion_donante", None),
-        "provincia_destino_id": getattr(row, "provincia_destino_id", None),
-        "provincia_destino": getattr(row, "provincia_destino", None),
-        "canton_destino_id": getattr(row, "canton_destino_id", None),
-        "canton_destino": getattr(row, "canton_destino", None),
-        "parroquia_destino_id": getattr(row, "parroquia_destino_id", None),
-        "parroquia_destino": getattr(row, "parroquia_destino", None),
+        "provincia_destino_id": provincia_destino_id,
+        "provincia_destino": catalogs.value("provincias", provincia_destino_id),
+        "canton_destino_id": canton_destino_id,
+        "canton_destino": catalogs.value("cantones", canton_destino_id),
+        "parroquia_destino_id": parroquia_destino_id,
+        "parroquia_destino": catalogs.value(
+            "parroquias",
+            parroquia_destino_id,
+            provincia_id=provincia_destino_id,
+            canton_id=canton_destino_id,
+        ),
         "sector_destino": getattr(row, "sector_destino", None),
         "longitud_destino": _to_float_optional(getattr(row, "longitud_destino", None)),
         "latitud_destino": _to_float_optional(getattr(row, "latitud_destino", None)),
@@ -64,38 +98,26 @@ def _serialize_asistencia(row):
     }
 
 
+def _serialize_asistencias(result):
+    # Reemplaza al INNER JOIN con recurso_tipos/recurso_grupos: solo tipos de asistencia humanitaria
+    items = []
+    for row in result:
+        recurso = _recurso_asistencia(row.recurso_tipo_id)
+        if recurso is not None:
+            items.append(_serialize_asistencia(row, recurso))
+    return items
+
+
 def _select_asistencias(where_clause=""):
+    # Tipo de recurso y DPA se resuelven desde la cache de catalogos
     return db.text(
         f"""
         SELECT
             a.*,
-            rt.nombre AS recurso_tipo,
-            rg.id AS recurso_grupo_id,
-            rg.nombre AS recurso_grupo,
-            rc.id AS recurso_categoria_id,
-            rc.nombre AS recurso_categoria,
-            i.nombre AS institucion_donante,
-            p.nombre AS provincia_destino,
-            c.nombre AS canton_destino,
-            q.nombre AS parroquia_destino
+            i.nombre AS institucion_donante
         FROM public.asistencia_humanitaria_entregada a
-        INNER JOIN public.recurso_tipos rt
-            ON a.recurso_tipo_id = rt.id
-        INNER JOIN public.recurso_grupos rg
-            ON rt.recurso_grupo_id = rg.id
-           AND rg.recurso_categoria_id = 1
-        INNER JOIN public.recurso_categorias rc
-            ON rg.recurso_categoria_id = rc.id
         LEFT JOIN public.instituciones i
             ON a.institucion_donante_id = i.id
-        LEFT JOIN public.provincias p
-            ON a.provincia_destino_id = p.id
-        LEFT JOIN public.cantones c
-            ON a.canton_destino_id = c.id
-        LEFT JOIN public.parroquias q
-            ON a.provincia_destino_id = q.provincia_id
-           AND a.canton_destino_id = q.canton_id
-           AND a.parroquia_destino_id = q.id
         {where_clause}
         ORDER BY a.id ASC
         """
@@ -103,10 +125,13 @@ def _select_asistencias(where_clause=""):
 
 
 def _get_asistencia_by_id(asistencia_id):
-    return db.session.execute(
+    row = db.session.execute(
         _select_asistencias("WHERE a.id = :id"),
         {"id": asistencia_id},
     ).fetchone()
+    if row is None or _recurso_asistencia(row.recurso_tipo_id) is None:
+        return None
+    return row
 
 
 def _recurso_tipo_es_asistencia_humanitaria(recurso_tipo_id):
@@ -174,7 +199,7 @@ def get_asistencia_humanitaria_entregada():
               modificacion: {type: string, format: date-time}
     """
     result = db.session.execute(_select_asistencias())
-    return jsonify([_serialize_asistencia(row) for row in result])
+    return jsonify(_serialize_asistencias(result))
 
 
 @asistencia_humanitaria_entregada_bp.route(
@@ -238,36 +263,13 @@ def get_asistencia_humanitaria_entregada_by_emergencia_by_usuario(emergencia_id,
         """
         SELECT DISTINCT
             a.*,
-            rt.nombre AS recurso_tipo,
-            rg.id AS recurso_grupo_id,
-            rg.nombre AS recurso_grupo,
-            rc.id AS recurso_categoria_id,
-            rc.nombre AS recurso_categoria,
-            i.nombre AS institucion_donante,
-            p.nombre AS provincia_destino,
-            c.nombre AS canton_destino,
-            q.nombre AS parroquia_destino
+            i.nombre AS institucion_donante
         FROM public.asistencia_humanitaria_entregada a
         INNER JOIN public.usuario_perfil_coe_dpa_mesa x
             ON (a.provincia_destino_id = x.provincia_id OR x.provincia_id = 0)
            AND (a.canton_destino_id = x.canton_id OR x.canton_id = 0)
-        INNER JOIN public.recurso_tipos rt
-            ON a.recurso_tipo_id = rt.id
-        INNER JOIN public.recurso_grupos rg
-            ON rt.recurso_grupo_id = rg.id
-           AND rg.recurso_categoria_id = 1
-        INNER JOIN public.recurso_categorias rc
-            ON rg.recurso_categoria_id = rc.id
         LEFT JOIN public.instituciones i
             ON a.institucion_donante_id = i.id
-        LEFT JOIN public.provincias p
-            ON a.provincia_destino_id = p.id
-        LEFT JOIN public.cantones c
-            ON a.canton_destino_id = c.id
-        LEFT JOIN public.parroquias q
-            ON a.provincia_destino_id = q.provincia_id
-           AND a.canton_destino_id = q.canton_id
-           AND a.parroquia_destino_id = q.id
         WHERE a.emergencia_id = :emergencia_id
           AND x.usuario_id = :usuario_id
           AND COALESCE(a.activo, true) = true
@@ -275,7 +277,7 @@ def get_asistencia_humanitaria_entregada_by_emergencia_by_usuario(emergencia_id,
         """
     )
     result = db.session.execute(query, {"emergencia_id": emergencia_id, "usuario_id": usuario_id})
-    return jsonify([_serialize_asistencia(row) for row in result])
+    return jsonify(_serialize_asistencias(result))
 
 
 @asistencia_humanitaria_entregada_bp.route("/api/asistencia_humanitaria_entregada", methods=["POST"])
@@ -1,5 +1,9 @@
 import os
 import datetime
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify, current_app, g
 import jwt
@@ -10,12 +14,23 @@ from passlib.hash import bcrypt
 JWT_SECRET = os.environ.get('JWT_SECRET', 'change_this_secret_in_production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXP_DELTA_SECONDS = int(os.environ.get('JWT_EXP_SECONDS', 28800))  # 1 hour default
+# Tokens ya verificados que se recuerdan (0 desactiva la cache)
+JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', 4096))
+
+# bcrypt: costo de los hashes nuevos, operaciones simultaneas por proceso y
+# espera maxima por un turno antes de responder 503
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 5))
+
+_bcrypt = bcrypt.using(rounds=BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
-    return bcrypt.hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.verify(password, hashed)
+    return password_hasher.verify(password, hashed)
 
 def generate_token(payload: dict, exp_seconds: int = None):
     exp_seconds = exp_seconds or JWT_EXP_DELTA_SECONDS
@@ -27,14 +42,188 @@ def generate_token(payload: dict, exp_seconds: int = None):
         token = token.decode('utf-8')
     return token
 
+class VerifiedTokenCache:
+    """LRU acotada de tokens ya verificados, indexada por el SHA-256 del token.
+
+    Cada entrada guarda los claims y el ``exp`` del token; pasada esa hora la
+    entrada se descarta y el token vuelve a verificarse (y a fallar) con PyJWT.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # digest -> (claims, exp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, exp = entry
+            if exp is not None and exp <= time.time():
+                del self._entries[digest]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims):
+        if self.max_size <= 0:
+            return
+        exp = claims.get('exp')
+        exp = float(exp) if isinstance(exp, (int, float)) else None
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (claims, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expired': self.expired,
+                'evictions': self.evictions,
+            }
+
+
+token_cache = VerifiedTokenCache(JWT_CACHE_SIZE)
+
+
+class PasswordHasherBusy(Exception):
+    """No hubo turno para bcrypt dentro de ``PASSWORD_HASH_QUEUE_TIMEOUT``."""
+
+    retry_after = PASSWORD_HASH_RETRY_AFTER
+
+
+class BoundedPasswordHasher:
+    """bcrypt con a lo sumo ``concurrency`` operaciones simultaneas por proceso.
+
+    El resto espera su turno hasta ``queue_timeout`` segundos y luego falla con
+    ``PasswordHasherBusy``: una avalancha de logins no ocupa todos los hilos
+    del worker calculando bcrypt. Corre en el hilo del request (que igual
+    tendria que esperar el resultado); solo se acota cuantos calculan a la vez.
+    """
+
+    def __init__(self, concurrency, queue_timeout):
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.max_queued = 0
+        self.rejected = 0
+        self.verifies = 0
+        self.verify_seconds = 0.0
+        self.verify_max_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.hashes = 0
+        self.rehashes = 0
+
+    def _run(self, fn, *args):
+        started = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.queued -= 1
+            self.wait_seconds += waited
+            self.wait_max_seconds = max(self.wait_max_seconds, waited)
+            if not acquired:
+                self.rejected += 1
+        if not acquired:
+            raise PasswordHasherBusy()
+        try:
+            started = time.monotonic()
+            return fn(*args), time.monotonic() - started
+        finally:
+            self._slots.release()
+
+    def verify(self, password, hashed):
+        result, elapsed = self._run(_bcrypt.verify, password, hashed)
+        with self._lock:
+            self.verifies += 1
+            self.verify_seconds += elapsed
+            self.verify_max_seconds = max(self.verify_max_seconds, elapsed)
+        return result
+
+    def hash(self, password):
+        result, _elapsed = self._run(_bcrypt.hash, password)
+        with self._lock:
+            self.hashes += 1
+        return result
+
+    def rehash_if_needed(self, password, hashed):
+        """Hash nuevo con BCRYPT_ROUNDS si ``hashed`` usa otro costo; si no, None."""
+        if not _bcrypt.needs_update(hashed):
+            return None
+        new_hash = self.hash(password)
+        with self._lock:
+            self.rehashes += 1
+        return new_hash
+
+    def stats(self):
+        with self._lock:
+            attempts = self.verifies + self.hashes + self.rejected
+            return {
+                'concurrency': self.concurrency,
+                'queue_timeout': self.queue_timeout,
+                'rounds': BCRYPT_ROUNDS,
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'rejected': self.rejected,
+                'verifies': self.verifies,
+                'verify_avg_ms': round(1000 * self.verify_seconds / self.verifies, 2) if self.verifies else 0.0,
+                'verify_max_ms': round(1000 * self.verify_max_seconds, 2),
+                'wait_avg_ms': round(1000 * self.wait_seconds / attempts, 2) if attempts else 0.0,
+                'wait_max_ms': round(1000 * self.wait_max_seconds, 2),
+                'hashes': self.hashes,
+                'rehashes': self.rehashes,
+            }
+
+
+password_hasher = BoundedPasswordHasher(PASSWORD_HASH_CONCURRENCY, PASSWORD_HASH_QUEUE_TIMEOUT)
+
+
 def decode_token(token: str):
+    claims = token_cache.get(token)
+    if claims is not None:
+        # copia: quien recibe g.user no debe poder alterar la entrada cacheada
+        return dict(claims)
     try:
         decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return decoded
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    token_cache.put(token, decoded)
+    return dict(decoded)
 
 def get_token_from_header():
     auth = request.headers.get('Authorization', None)
@@ -45,15 +234,25 @@ def get_token_from_header():
         return None
     return parts[1]
 
+def _current_user():
+    """Claims del request: reutiliza g.user si el hook global ya verifico el token."""
+    decoded = g.get('user')
+    if isinstance(decoded, dict):
+        return decoded, None
+    token = get_token_from_header()
+    if not token:
+        return None, (jsonify({'error': 'Authorization header missing or malformed'}), 401)
+    decoded = decode_token(token)
+    if not decoded:
+        return None, (jsonify({'error': 'Invalid or expired token'}), 401)
+    return decoded, None
+
 def login_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        token = get_token_from_header()
-        if not token:
-            return jsonify({'error': 'Authorization header missing or malformed'}), 401
-        decoded = decode_token(token)
-        if not decoded:
-            return jsonify({'error': 'Invalid or expired token'}), 401
+        decoded, error = _current_user()
+        if error:
+            return error
         # attach user info to request context (Flask's global 'g' is used)
         g.user = decoded
         return fn(*args, **kwargs)
@@ -63,12 +262,9 @@ def roles_required(*allowed_roles):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            token = get_token_from_header()
-            if not token:
-                return jsonify({'error': 'Authorization header missing or malformed'}), 401
-            decoded = decode_token(token)
-            if not decoded:
-                return jsonify({'error': 'Invalid or expired token'}), 401
+            decoded, error = _current_user()
+            if error:
+                return error
             roles = decoded.get('roles', [])
             # roles can be a single string or list
             if isinstance(roles, str):
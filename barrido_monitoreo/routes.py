@@ -3,7 +3,9 @@ from datetime import datetime, timezone
 from flask import jsonify, request
 
 from barrido_monitoreo import barrido_monitoreo_bp
+from catalog_cache import catalogs
 from models import db
+from utils.row_serializer import serialize_row, serialize_rows
 
 
 TABLE_NAME = "public.barrido_monitoreo"
@@ -23,39 +25,65 @@ def _to_iso_optional(value):
     return str(value)
 
 
+BARRIDO_MONITOREO_FIELDS = (
+    "id",
+    "barrido_id",
+    "barrido_evento_tipo_id",
+    "barrido_evento_tipo_nombre",
+    "barrido_evento_fecha",
+    "emergencia_id",
+    "emergencia_nombre",
+    "monitoreo_fecha",
+    "provincia_id",
+    "provincia_nombre",
+    "canton_id",
+    "canton_nombre",
+    "parroquia_id",
+    "parroquia_nombre",
+    "sector",
+    "longitud",
+    "latitud",
+    "intensidad_id",
+    "intensidad_orden",
+    "intensidad_nombre",
+    "intensidad_descripcion",
+    "fuente",
+    "observaciones",
+    "activo",
+    "creador",
+    "creacion",
+    "modificador",
+    "modificacion",
+    "monitoreo_registrado",
+    "monitoreo_estado",
+)
+
+BARRIDO_MONITOREO_CONVERTERS = {
+    "barrido_evento_fecha": _to_iso_optional,
+    "monitoreo_fecha": _to_iso_optional,
+    "longitud": _to_float_optional,
+    "latitud": _to_float_optional,
+    "creacion": _to_iso_optional,
+    "modificacion": _to_iso_optional,
+}
+
+
+def _with_catalog_names(item):
+    # Nombres de tipo de evento y DPA desde la cache de catalogos (sin JOIN)
+    item["barrido_evento_tipo_nombre"] = catalogs.value("evento_tipos", item["barrido_evento_tipo_id"])
+    item["provincia_nombre"], item["canton_nombre"], item["parroquia_nombre"] = catalogs.dpa_names(
+        item["provincia_id"], item["canton_id"], item["parroquia_id"]
+    )
+    return item
+
+
 def _serialize_barrido_monitoreo(row):
-    return {
-        "id": getattr(row, "id", None),
-        "barrido_id": getattr(row, "barrido_id", None),
-        "barrido_evento_tipo_id": getattr(row, "barrido_evento_tipo_id", None),
-        "barrido_evento_tipo_nombre": getattr(row, "barrido_evento_tipo_nombre", None),
-        "barrido_evento_fecha": _to_iso_optional(getattr(row, "barrido_evento_fecha", None)),
-        "emergencia_id": getattr(row, "emergencia_id", None),
-        "emergencia_nombre": getattr(row, "emergencia_nombre", None),
-        "monitoreo_fecha": _to_iso_optional(getattr(row, "monitoreo_fecha", None)),
-        "provincia_id": getattr(row, "provincia_id", None),
-        "provincia_nombre": getattr(row, "provincia_nombre", None),
-        "canton_id": getattr(row, "canton_id", None),
-        "canton_nombre": getattr(row, "canton_nombre", None),
-        "parroquia_id": getattr(row, "parroquia_id", None),
-        "parroquia_nombre": getattr(row, "parroquia_nombre", None),
-        "sector": getattr(row, "sector", None),
-        "longitud": _to_float_optional(getattr(row, "longitud", None)),
-        "latitud": _to_float_optional(getattr(row, "latitud", None)),
-        "intensidad_id": getattr(row, "intensidad_id", None),
-        "intensidad_orden": getattr(row, "intensidad_orden", None),
-        "intensidad_nombre": getattr(row, "intensidad_nombre", None),
-        "intensidad_descripcion": getattr(row, "intensidad_descripcion", None),
-        "fuente": getattr(row, "fuente", None),
-        "observaciones": getattr(row, "observaciones", None),
-        "activo": getattr(row, "activo", None),
-        "creador": getattr(row, "creador", None),
-        "creacion": _to_iso_optional(getattr(row, "creacion", None)),
-        "modificador": getattr(row, "modificador", None),
-        "modificacion": _to_iso_optional(getattr(row, "modificacion", None)),
-        "monitoreo_registrado": getattr(row, "monitoreo_registrado", None),
-        "monitoreo_estado": getattr(row, "monitoreo_estado", None),
-    }
+    return _with_catalog_names(serialize_row(row, BARRIDO_MONITOREO_FIELDS, BARRIDO_MONITOREO_CONVERTERS))
+
+
+def _serialize_barrido_monitoreos(result):
+    items = serialize_rows(result, BARRIDO_MONITOREO_FIELDS, BARRIDO_MONITOREO_CONVERTERS)
+    return [_with_catalog_names(item) for item in items]
 
 
 def _select_barrido_monitoreo(where_clause="", order_by="bm.id ASC"):
@@ -65,17 +93,13 @@ def _select_barrido_monitoreo(where_clause="", order_by="bm.id ASC"):
             bm.id,
             bm.barrido_id,
             b.evento_tipo_id AS barrido_evento_tipo_id,
-            et.nombre AS barrido_evento_tipo_nombre,
             b.evento_fecha AS barrido_evento_fecha,
             b.emergencia_id,
             e.nombre AS emergencia_nombre,
             bm.monitoreo_fecha,
             bm.provincia_id,
-            p.nombre AS provincia_nombre,
             bm.canton_id,
-            c.nombre AS canton_nombre,
             bm.parroquia_id,
-            q.nombre AS parroquia_nombre,
             bm.sector,
             bm.longitud,
             bm.latitud,
@@ -95,19 +119,8 @@ def _select_barrido_monitoreo(where_clause="", order_by="bm.id ASC"):
             ON b.id = bm.barrido_id
         LEFT JOIN public.emergencias e
             ON e.id = b.emergencia_id
-        LEFT JOIN public.evento_tipos et
-            ON et.id = b.evento_tipo_id
         LEFT JOIN public.barrido_intensidad bi
             ON bi.id = bm.intensidad_id
-        LEFT JOIN public.provincias p
-            ON p.id = bm.provincia_id
-        LEFT JOIN public.cantones c
-            ON c.provincia_id = bm.provincia_id
-           AND c.id = bm.canton_id
-        LEFT JOIN public.parroquias q
-            ON q.provincia_id = bm.provincia_id
-           AND q.canton_id = bm.canton_id
-           AND q.id = bm.parroquia_id
         {where_clause}
         ORDER BY {order_by}
         """
@@ -162,20 +175,14 @@ def _get_barrido_monitoreo_by_usuario_by_coe_by_barrido(usuario_id, coe_id_usuar
                 bm.id,
                 b.id AS barrido_id,
                 b.evento_tipo_id AS barrido_evento_tipo_id,
-                et.nombre AS barrido_evento_tipo_nombre,
                 b.evento_fecha AS barrido_evento_fecha,
                 b.emergencia_id,
                 e.nombre AS emergencia_nombre,
                 bm.monitoreo_fecha,
 
                 t.provincia_id,
-                p.nombre AS provincia_nombre,
-
                 t.canton_id,
-                c.nombre AS canton_nombre,
-
                 t.parroquia_id,
-                q.nombre AS parroquia_nombre,
 
                 bm.sector,
                 bm.longitud,
@@ -217,20 +224,9 @@ def _get_barrido_monitoreo_by_usuario_by_coe_by_barrido(usuario_id, coe_id_usuar
             AND COALESCE(bm.activo, true) = true
             LEFT JOIN public.emergencias e
                 ON e.id = b.emergencia_id
-            LEFT JOIN public.evento_tipos et
-                ON et.id = b.evento_tipo_id
             LEFT JOIN public.barrido_intensidad bi
                 ON bi.id = bm.intensidad_id
             AND bi.evento_tipo_id = b.evento_tipo_id
-            LEFT JOIN public.provincias p
-                ON p.id = t.provincia_id
-            LEFT JOIN public.cantones c
-                ON c.provincia_id = t.provincia_id
-            AND c.id = t.canton_id
-            LEFT JOIN public.parroquias q
-                ON q.provincia_id = t.provincia_id
-            AND q.canton_id = t.canton_id
-            AND q.id = t.parroquia_id
             ORDER BY
                 t.provincia_id ASC,
                 t.canton_id ASC,
@@ -345,7 +341,7 @@ def get_barrido_monitoreos():
         description: Error inesperado al consultar monitoreos de barrido
     """
     result = db.session.execute(_select_barrido_monitoreo())
-    return jsonify([_serialize_barrido_monitoreo(row) for row in result])
+    return jsonify(_serialize_barrido_monitoreos(result))
 
 
 @barrido_monitoreo_bp.route("/api/barrido_monitoreo/barrido/reciente", methods=["GET"])
@@ -373,7 +369,7 @@ def get_barrido_monitoreos_by_barrido_reciente():
         "bm.monitoreo_fecha DESC, bm.id DESC",
     )
     result = db.session.execute(query, {"barrido_id": barrido_id})
-    return jsonify([_serialize_barrido_monitoreo(row) for row in result])
+    return jsonify(_serialize_barrido_monitoreos(result))
 
 
 @barrido_monitoreo_bp.route("/api/barrido_monitoreo/barrido/<int:barrido_id>", methods=["GET"])
@@ -401,7 +397,7 @@ def get_barrido_monitoreos_by_barrido(barrido_id):
         "bm.monitoreo_fecha DESC, bm.id DESC",
     )
     result = db.session.execute(query, {"barrido_id": barrido_id})
-    return jsonify([_serialize_barrido_monitoreo(row) for row in result])
+    return jsonify(_serialize_barrido_monitoreos(result))
 
 
 @barrido_monitoreo_bp.route(
@@ -477,7 +473,7 @@ def get_barrido_monitoreo_by_usuario_by_coe_by_barrido(usuario_id, coe_id_usuari
         coe_id_usuario,
         barrido_id,
     )
-    return jsonify([_serialize_barrido_monitoreo(row) for row in result])
+    return jsonify(_serialize_barrido_monitoreos(result))
 
 
 @barrido_monitoreo_bp.route(
@@ -519,7 +515,7 @@ def get_barrido_monitoreo_by_usuario_by_coe_by_barrido_reciente(usuario_id, coe_
         coe_id_usuario,
         barrido_id,
     )
-    return jsonify([_serialize_barrido_monitoreo(row) for row in result])
+    return jsonify(_serialize_barrido_monitoreos(result))
 
 
 @barrido_monitoreo_bp.route("/api/barrido_monitoreo/<int:id>", methods=["GET"])
@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 from flask import jsonify, request
 
 from barridos import barridos_bp
+from catalog_cache import catalogs
 from models import db
 
 
@@ -72,81 +73,20 @@ def _serialize_barrido(row):
         "profundidad": _to_float_optional(getattr(row, "profundidad", None)),
         "epicentro": getattr(row, "epicentro", None),
         "barrido_estado_id": getattr(row, "barrido_estado_id", None),
-        "barrido_estado_codigo": getattr(row, "barrido_estado_codigo", None),
-        "barrido_estado_nombre": getattr(row, "barrido_estado_nombre", None),
+        "barrido_estado_codigo": catalogs.value("barrido_estado", row.barrido_estado_id, "codigo"),
+        "barrido_estado_nombre": catalogs.value("barrido_estado", row.barrido_estado_id),
         "activo": getattr(row, "activo", None),
+        "emergencia_nombre": getattr(row, "emergencia_nombre", None),
+        "evento_tipo_nombre": catalogs.value("evento_tipos", row.evento_tipo_id),
     }
-
-    optional_fields = [
-        "emergencia_nombre",
-        "evento_tipo_nombre",
-        "provincia_nombre",
-        "canton_nombre",
-        "parroquia_nombre",
-    ]
-    for field in optional_fields:
-        if hasattr(row, field):
-            item[field] = getattr(row, field)
-
-    return item
-
-
-def _get_barrido_by_id(item_id):
-    query = db.text(
-        f"""
-        SELECT
-            b.id,
-            b.emergencia_id,
-            e.nombre AS emergencia_nombre,
-            b.evento_tipo_id,
-            et.nombre AS evento_tipo_nombre,
-            b.evento_fecha,
-            b.provincia_id,
-            p.nombre AS provincia_nombre,
-            b.canton_id,
-            c.nombre AS canton_nombre,
-            b.parroquia_id,
-            q.nombre AS parroquia_nombre,
-            b.sector,
-            b.longitud,
-            b.latitud,
-            b.accidente_geografico_id,
-            CASE WHEN vt.codigo = 'VOLCAN' THEN v.id END AS volcan_id,
-            CASE WHEN vt.codigo = 'VOLCAN' THEN v.nombre END AS volcan_nombre,
-            b.magnitud,
-            b.profundidad,
-            b.epicentro,
-            b.barrido_estado_id,
-            be.codigo AS barrido_estado_codigo,
-            be.nombre AS barrido_estado_nombre,
-            b.activo
-        FROM {TABLE_NAME} b
-        LEFT JOIN public.emergencias e
-            ON e.id = b.emergencia_id
-        LEFT JOIN public.evento_tipos et
-            ON et.id = b.evento_tipo_id
-        LEFT JOIN public.provincias p
-            ON p.id = b.provincia_id
-        LEFT JOIN public.cantones c
-            ON c.provincia_id = b.provincia_id
-           AND c.id = b.canton_id
-        LEFT JOIN public.parroquias q
-            ON q.provincia_id = b.provincia_id
-           AND q.canton_id = b.canton_id
-           AND q.id = b.parroquia_id
-        LEFT JOIN public.barrido_estado be
-            ON be.id = b.barrido_estado_id
-        LEFT JOIN public.accidentes_geograficos v
-            ON v.id = b.accidente_geografico_id
-        LEFT JOIN public.accidente_geografico_tipos vt
-            ON vt.id = v.accidente_geografico_tipo_id
-        WHERE b.id = :id
-        """
+    item["provincia_nombre"], item["canton_nombre"], item["parroquia_nombre"] = catalogs.dpa_names(
+        row.provincia_id, row.canton_id, row.parroquia_id
     )
-    return db.session.execute(query, {"id": item_id}).fetchone()
+    return item
 
 
 def _select_barridos(where_clause="", order_by="b.id ASC"):
+    # Tipo de evento, DPA y estado se resuelven desde la cache de catalogos
     query = db.text(
         f"""
         SELECT
@@ -154,14 +94,10 @@ def _select_barridos(where_clause="", order_by="b.id ASC"):
             b.emergencia_id,
             e.nombre AS emergencia_nombre,
             b.evento_tipo_id,
-            et.nombre AS evento_tipo_nombre,
             b.evento_fecha,
             b.provincia_id,
-            p.nombre AS provincia_nombre,
             b.canton_id,
-            c.nombre AS canton_nombre,
             b.parroquia_id,
-            q.nombre AS parroquia_nombre,
             b.sector,
             b.longitud,
             b.latitud,
@@ -172,25 +108,10 @@ def _select_barridos(where_clause="", order_by="b.id ASC"):
             b.profundidad,
             b.epicentro,
             b.barrido_estado_id,
-            be.codigo AS barrido_estado_codigo,
-            be.nombre AS barrido_estado_nombre,
             b.activo
         FROM {TABLE_NAME} b
         LEFT JOIN public.emergencias e
             ON e.id = b.emergencia_id
-        LEFT JOIN public.evento_tipos et
-            ON et.id = b.evento_tipo_id
-        LEFT JOIN public.provincias p
-            ON p.id = b.provincia_id
-        LEFT JOIN public.cantones c
-            ON c.provincia_id = b.provincia_id
-           AND c.id = b.canton_id
-        LEFT JOIN public.parroquias q
-            ON q.provincia_id = b.provincia_id
-           AND q.canton_id = b.canton_id
-           AND q.id = b.parroquia_id
-        LEFT JOIN public.barrido_estado be
-            ON be.id = b.barrido_estado_id
         LEFT JOIN public.accidentes_geograficos v
             ON v.id = b.accidente_geografico_id
         LEFT JOIN public.accidente_geografico_tipos vt
@@ -202,6 +123,11 @@ def _select_barridos(where_clause="", order_by="b.id ASC"):
     return query
 
 
+def _get_barrido_by_id(item_id):
+    query = _select_barridos("WHERE b.id = :id")
+    return db.session.execute(query, {"id": item_id}).fetchone()
+
+
 @barridos_bp.route("/api/barridos", methods=["GET"])
 def get_barridos():
     """Listar barridos.
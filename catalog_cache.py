@@ -0,0 +1,170 @@
+"""
+Cache en memoria de los catalogos (DPA, tipos y estados).
+
+Los listados resuelven nombres de provincia, canton, tipo de evento, estado,
+etc. desde aca en vez de hacer un JOIN por catalogo en cada consulta. Cada
+tabla se carga completa e indexada por ``id``; son tablas chicas que casi no
+cambian.
+
+La coherencia entre workers se lleva con ``table_versions``: toda escritura
+exitosa de un blueprint de catalogo incrementa la version de su tabla, y cada
+proceso compara sus versiones contra la base a lo sumo cada
+``CATALOG_VERSION_TTL`` segundos, recargando solo las tablas que cambiaron.
+"""
+import os
+import threading
+import time
+
+from flask import current_app
+
+from models import db
+from table_versions import on_tables_changed, read_versions, track_blueprint_writes
+
+# El nombre de cada blueprint de catalogo coincide con el de su tabla; las
+# tablas sin blueprint solo cambian a mano (ver table_versions)
+CATALOG_TABLES = (
+    'provincias',
+    'cantones',
+    'parroquias',
+    'coes',
+    'mesas',
+    'mesa_grupos',
+    'evento_tipos',
+    'evento_subtipos',
+    'recurso_tipos',
+    'recurso_grupos',
+    'recurso_categorias',
+    'accion_respuesta_estados',
+    'acta_coe_estados',
+    'acta_coe_resolucion_estados',
+    'alojamiento_estados',
+    'barrido_estado',
+    'coe_activado_estados',
+    'evento_atencion_estados',
+    'evento_estados',
+    'requerimiento_estados',
+    'respuesta_estados',
+    # Catalogos de la huella de requerimientos (sin blueprint propio)
+    'requerimiento_huella_log_acciones',
+    'requerimiento_huella_log_estados',
+    'requerimiento_huella_log_respuesta_estados',
+    'requerimiento_huella_log_movimiento_tipos',
+    'requerimiento_huella_log_motivos',
+)
+
+CATALOG_VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL', '5'))
+
+
+class CatalogStore:
+    """Tablas de catalogo en memoria: ``{tabla: {id: fila}}`` con su version."""
+
+    def __init__(self, tables, ttl=CATALOG_VERSION_TTL):
+        self.tables = tuple(tables)
+        self.ttl = ttl
+        self._rows = {}
+        self._versions = {}
+        self._checked = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_errors = 0
+
+    def _db_versions(self):
+        try:
+            return read_versions(self.tables)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('No se pudieron leer las versiones de catalogos')
+            return None
+
+    def _load_table(self, table):
+        """Filas de ``table`` por id, o None si la consulta fallo."""
+        try:
+            result = db.session.execute(db.text(f'SELECT * FROM public.{table}'))
+            return {row.id: dict(row._mapping) for row in result}
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('No se pudo cargar el catalogo %s', table)
+            return None
+
+    def refresh(self, force=False):
+        """Recarga las tablas cuya version cambio (o todas si ``force``)."""
+        if not force and self._checked is not None and time.monotonic() - self._checked < self.ttl:
+            return
+        with self._lock:
+            if not force and self._checked is not None and time.monotonic() - self._checked < self.ttl:
+                return
+            versions = self._db_versions()
+            for table in self.tables:
+                version = None if versions is None else versions[table]
+                if force or table not in self._rows or version is None or self._versions.get(table) != version:
+                    rows = self._load_table(table)
+                    if rows is None:
+                        # Se mantienen las filas anteriores y sin version, para
+                        # reintentar en el proximo refresh
+                        self._versions[table] = None
+                        self.load_errors += 1
+                        continue
+                    self._rows[table] = rows
+                    self._versions[table] = version
+                    self.loads += 1
+            self._checked = time.monotonic()
+
+    def discard(self, tables):
+        """Descarta localmente ``tables``; se recargan en la proxima consulta."""
+        with self._lock:
+            for table in tables:
+                if table in self.tables:
+                    self._rows.pop(table, None)
+                    self._versions.pop(table, None)
+            self._checked = None
+
+    def get(self, table, item_id, **parents):
+        """Fila del catalogo o None; ``parents`` exige que coincidan esas columnas.
+
+        Reemplaza a los JOIN compuestos, p. ej.
+        ``get('cantones', canton_id, provincia_id=provincia_id)``.
+        """
+        self.refresh()
+        row = self._rows.get(table, {}).get(item_id)
+        if row is None:
+            return None
+        for column, value in parents.items():
+            if row.get(column) != value:
+                return None
+        return row
+
+    def value(self, table, item_id, column='nombre', **parents):
+        row = self.get(table, item_id, **parents)
+        return None if row is None else row.get(column)
+
+    def dpa_names(self, provincia_id, canton_id, parroquia_id):
+        """(provincia, canton, parroquia) con las mismas reglas que los JOIN por DPA."""
+        return (
+            self.value('provincias', provincia_id),
+            self.value('cantones', canton_id, provincia_id=provincia_id),
+            self.value('parroquias', parroquia_id, provincia_id=provincia_id, canton_id=canton_id),
+        )
+
+    def status(self):
+        return {
+            'tablas': {
+                table: {'filas': len(self._rows.get(table, {})), 'version': self._versions.get(table)}
+                for table in self.tables
+            },
+            'cargas': self.loads,
+            'errores_carga': self.load_errors,
+            'ttl_segundos': self.ttl,
+        }
+
+
+catalogs = CatalogStore(CATALOG_TABLES)
+
+for _table in CATALOG_TABLES:
+    track_blueprint_writes(_table)
+on_tables_changed(catalogs.discard)
+
+
+def init_catalog_cache(app):
+    """Carga todos los catalogos al arrancar."""
+    with app.app_context():
+        catalogs.refresh(force=True)
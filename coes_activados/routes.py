@@ -2,6 +2,7 @@
 
 from flask import jsonify, request
 
+from catalog_cache import catalogs
 from coes_activados import coes_activados_bp
 from models import db
 
@@ -35,22 +36,28 @@ def _serialize_coe_activado(row):
     }
 
 
-def _serialize_coe_activado_detalle(row):
+def _serialize_coe_activado_detalle(row, coe):
+    # Nombres de COE, DPA y estado desde la cache de catalogos (sin JOIN)
     item = _serialize_coe_activado(row)
-    optional_fields = [
-        "coe_nombre",
-        "coe_siglas",
-        "provincia_nombre",
-        "canton_nombre",
-        "parroquia_nombre",
-        "estado_activacion_nombre",
-    ]
-    for field in optional_fields:
-        if hasattr(row, field):
-            item[field] = getattr(row, field)
+    item["coe_nombre"] = coe.get("nombre")
+    item["coe_siglas"] = coe.get("siglas")
+    item["provincia_nombre"], item["canton_nombre"], item["parroquia_nombre"] = catalogs.dpa_names(
+        row.provincia_id, row.canton_id, row.parroquia_id
+    )
+    item["estado_activacion_nombre"] = catalogs.value("coe_activado_estados", row.estado_activacion)
     return item
 
 
+def _serialize_coes_activados_detalle(result):
+    # Reemplaza al INNER JOIN con coes: se omiten filas cuyo COE no existe
+    items = []
+    for row in result:
+        coe = catalogs.get("coes", row.coe_id)
+        if coe is not None:
+            items.append(_serialize_coe_activado_detalle(row, coe))
+    return items
+
+
 def _get_coe_activado_by_id(item_id):
     return db.session.execute(
         db.text(f"SELECT * FROM {TABLE_NAME} WHERE id = :id"),
@@ -58,6 +65,39 @@ def _get_coe_activado_by_id(item_id):
     ).fetchone()
 
 
+def coes_activados_visibles(emergencia_ids, usuario_id):
+    """COE activados de ``emergencia_ids`` que ve ``usuario_id`` segun sus asignaciones.
+
+    Misma regla de nivel y DPA que el listado por emergencia; la usa el login.
+    """
+    if not emergencia_ids:
+        return []
+    result = db.session.execute(
+        db.text(
+            """
+            SELECT ca.*
+            FROM public.coes_activados ca
+            WHERE ca.emergencia_id = ANY(:emergencia_ids)
+              AND COALESCE(ca.activo, true) = true
+              AND EXISTS (
+                  SELECT 1
+                  FROM public.usuario_perfil_coe_dpa_mesa x
+                  WHERE x.usuario_id = :usuario_id
+                    AND COALESCE(x.activo, true) = true
+                    AND ca.coe_id >= x.coe_id
+                    AND (ca.provincia_id = x.provincia_id OR x.provincia_id IN (0, -1))
+                    AND (ca.canton_id = x.canton_id OR x.canton_id IN (0, -1))
+                    AND (ca.parroquia_id = x.parroquia_id OR x.parroquia_id IN (0, -1))
+              )
+            ORDER BY ca.emergencia_id ASC, ca.coe_id ASC, ca.provincia_id ASC,
+                     ca.canton_id ASC, ca.parroquia_id ASC, ca.id ASC
+            """
+        ),
+        {"emergencia_ids": list(emergencia_ids), "usuario_id": usuario_id},
+    )
+    return _serialize_coes_activados_detalle(result)
+
+
 @coes_activados_bp.route("/api/coes_activados", methods=["GET"])
 def get_coes_activados():
     """Listar COE activados.
@@ -147,36 +187,17 @@ def get_coes_activados_by_emergencia_by_usuario(emergencia_id):
             ca.id,
             ca.emergencia_id,
             ca.coe_id,
-            c.nombre AS coe_nombre,
-            c.siglas AS coe_siglas,
             ca.provincia_id,
-            p.nombre AS provincia_nombre,
             ca.canton_id,
-            k.nombre AS canton_nombre,
             ca.parroquia_id,
-            q.nombre AS parroquia_nombre,
             ca.fecha_activacion,
             ca.estado_activacion,
-            e.nombre AS estado_activacion_nombre,
             ca.activo,
             ca.creador,
             ca.creacion,
             ca.modificador,
             ca.modificacion
         FROM public.coes_activados ca
-        INNER JOIN public.coes c
-            ON c.id = ca.coe_id
-        LEFT JOIN public.provincias p
-            ON p.id = ca.provincia_id
-        LEFT JOIN public.cantones k
-            ON k.provincia_id = ca.provincia_id
-           AND k.id = ca.canton_id
-        LEFT JOIN public.parroquias q
-            ON q.provincia_id = ca.provincia_id
-           AND q.canton_id = ca.canton_id
-           AND q.id = ca.parroquia_id
-        LEFT JOIN public.coe_activado_estados e
-            ON e.id = ca.estado_activacion
         WHERE ca.emergencia_id = :emergencia_id
           AND COALESCE(ca.activo, true) = true
           AND EXISTS (
@@ -195,7 +216,7 @@ def get_coes_activados_by_emergencia_by_usuario(emergencia_id):
         query,
         {"emergencia_id": emergencia_id},
     )
-    return jsonify([_serialize_coe_activado_detalle(row) for row in result])
+    return jsonify(_serialize_coes_activados_detalle(result))
 
 
 @coes_activados_bp.route("/api/coes_activados/<int:id>", methods=["GET"])
@@ -0,0 +1,90 @@
+"""
+Respuestas condicionales (ETag / If-None-Match) para listados de catalogos.
+
+Cada blueprint registrado con ``register_cache_policy`` declara las tablas que
+leen sus GET. El ETag se arma con las versiones de esas tablas
+(``table_versions``), asi que se calcula con una sola consulta por clave
+primaria antes de ejecutar la vista: si coincide con ``If-None-Match`` se
+responde 304 sin correr el listado ni serializar.
+
+El hook se registra despues del de JWT, por lo que el 304 solo se entrega a
+requests autenticados.
+"""
+import hashlib
+import os
+from collections import namedtuple
+
+from flask import g, request
+
+from models import db
+from table_versions import read_versions
+
+# Sin max-age el navegador revalida siempre, pero la revalidacion cuesta un 304
+DEFAULT_CACHE_CONTROL = 'private, no-cache'
+
+# Cambiarlo en un deploy que modifique el formato de las respuestas
+ETAG_SALT = os.getenv('ETAG_SALT', '1')
+
+CachePolicy = namedtuple('CachePolicy', 'tables cache_control exclude')
+
+_policies = {}
+
+
+def register_cache_policy(blueprint, tables, cache_control=DEFAULT_CACHE_CONTROL, exclude=()):
+    """Habilita ETag en los GET de ``blueprint``.
+
+    - tables: todas las tablas que leen sus GET.
+    - exclude: endpoints (``blueprint.funcion``) que leen tablas sin version,
+      p. ej. las que no se escriben por la API.
+    """
+    _policies[blueprint] = CachePolicy(tuple(sorted(tables)), cache_control, frozenset(exclude))
+
+
+def compute_etag(blueprint, versions):
+    key = '|'.join([ETAG_SALT, blueprint] + [f'{table}:{versions[table]}' for table in sorted(versions)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+
+
+def _policy_for_request():
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    policy = _policies.get(request.blueprint)
+    if policy is None or request.endpoint in policy.exclude:
+        return None
+    return policy
+
+
+def init_conditional_get(app):
+    for blueprint, policy in sorted(_policies.items()):
+        if blueprint not in app.blueprints:
+            app.logger.warning('Politica de cache para un blueprint no registrado: %s', blueprint)
+        for endpoint in sorted(policy.exclude - set(app.view_functions)):
+            app.logger.warning('Politica de cache de %s excluye un endpoint inexistente: %s', blueprint, endpoint)
+
+    @app.before_request
+    def answer_not_modified():
+        policy = _policy_for_request()
+        if policy is None:
+            return None
+        try:
+            versions = read_versions(policy.tables)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('No se pudieron leer las versiones para el ETag de %s', request.blueprint)
+            return None
+
+        etag = compute_etag(request.blueprint, versions)
+        g.conditional_etag = (etag, policy)
+        if request.if_none_match.contains_weak(etag):
+            return app.response_class(status=304)
+        return None
+
+    @app.after_request
+    def add_etag_headers(response):
+        conditional = g.pop('conditional_etag', None)
+        if conditional is None or response.status_code not in (200, 304):
+            return response
+        etag, policy = conditional
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = policy.cache_control
+        return response
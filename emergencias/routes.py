@@ -46,28 +46,8 @@ def get_emergencias():
         })
     return jsonify(emergencias)
 
-@emergencias_bp.route('/api/emergencias/usuario/<string:usuario>', methods=['GET'])
-def get_emergencias_by_usuario(usuario):
-    """Usuarios habilitados a emergencias según ámbito (cantonal/provincial/nacional).
-
-    Parámetro:
-      usuario (str): nombre de usuario (ej: 'mttc_sal.salud').
-
-    Ejecuta la consulta que devuelve emergencias a las que el usuario tiene
-    acceso según su ámbito definido en `usuario_perfil_coe_dpa_mesa`.
-    La respuesta incluye: emergencia_id, emergencia, usuario, descripcion, ambito, identificador.
-    ---
-    tags:
-      - Emergencias
-    parameters:
-      - name: usuario
-        in: path
-        type: string
-        required: true
-    responses:
-      200:
-        description: Lista de emergencias con ámbito de acceso
-    """
+def emergencias_by_usuario(usuario):
+    """Emergencias activas visibles para ``usuario`` segun su ambito (tambien la usa el login)."""
     query = db.text("""
     SELECT DISTINCT
       e.id            AS emergencia_id,
@@ -107,7 +87,31 @@ def get_emergencias_by_usuario(usuario):
             'ambito': row.ambito,
             'identificador': row.identificador
         })
-    return jsonify(emergencias)
+    return emergencias
+
+@emergencias_bp.route('/api/emergencias/usuario/<string:usuario>', methods=['GET'])
+def get_emergencias_by_usuario(usuario):
+    """Usuarios habilitados a emergencias según ámbito (cantonal/provincial/nacional).
+
+    Parámetro:
+      usuario (str): nombre de usuario (ej: 'mttc_sal.salud').
+
+    Ejecuta la consulta que devuelve emergencias a las que el usuario tiene
+    acceso según su ámbito definido en `usuario_perfil_coe_dpa_mesa`.
+    La respuesta incluye: emergencia_id, emergencia, usuario, descripcion, ambito, identificador.
+    ---
+    tags:
+      - Emergencias
+    parameters:
+      - name: usuario
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Lista de emergencias con ámbito de acceso
+    """
+    return jsonify(emergencias_by_usuario(usuario))
 
 @emergencias_bp.route('/api/emergencias', methods=['POST'])
 def create_emergencia():
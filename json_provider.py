@@ -0,0 +1,67 @@
+import datetime
+import decimal
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa el json de la stdlib
+    orjson = None
+
+
+def json_default(o):
+    """Tipos que las consultas devuelven tal cual: fechas en ISO 8601 y Decimal como numero."""
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de la app: orjson si esta instalado, si no la stdlib.
+
+    En ambos casos datetime/date/time salen en ISO 8601 (orjson los codifica
+    de forma nativa con el mismo formato que isoformat) y Decimal como numero,
+    asi las rutas pueden entregar las filas sin convertir cada valor.
+    """
+
+    default = staticmethod(json_default)
+
+    def _orjson_option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _orjson_dumps(self, obj, indent=False):
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return self._orjson_dumps(obj).decode("utf-8")
+            except TypeError:
+                # p. ej. enteros de mas de 64 bits: la stdlib si los soporta
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._orjson_dumps(obj, indent) + b"\n"
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,107 @@
+"""
+Datos iniciales de la sesion en una sola respuesta.
+
+Despues del login el cliente necesita el ambito del usuario (datos-login), su
+arbol de menus, las emergencias activas que ve y los COE activados de esas
+emergencias. ``build_bootstrap`` arma todo en el request del login: la cadena
+emergencias -> COE corre en un hilo del pool mientras el hilo del request
+resuelve ambito -> menus (desde ``permisos_cache.accesos``).
+
+Cada hilo del pool abre su propio app context, y por lo tanto su propia
+sesion y conexion: ``LOGIN_BOOTSTRAP_WORKERS`` limita cuantas conexiones
+extra pueden usar los logins simultaneos.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from coes_activados.routes import coes_activados_visibles
+from emergencias.routes import emergencias_by_usuario
+from models import db
+from permisos_cache import accesos
+
+LOGIN_BOOTSTRAP_WORKERS = int(os.getenv('LOGIN_BOOTSTRAP_WORKERS', '4'))
+
+_executor = ThreadPoolExecutor(max_workers=LOGIN_BOOTSTRAP_WORKERS, thread_name_prefix='login-bootstrap')
+
+_DATOS_LOGIN_SQL = """
+  SELECT u.institucion_id usuario_institucion_id
+  , u.usuario usuario_login
+  , u.id usuario_id
+  , u.descripcion usuario_descripcion
+  , ux.coe_id
+  , c.siglas coe_abreviatura
+  , ux.perfil_id
+  , pf.nombre perfil_nombre
+  , ux.provincia_id
+  , COALESCE(p.nombre,'--') provincia_nombre
+  , ux.canton_id
+  , COALESCE(k.nombre,'--') canton_nombre
+  , ux.mesa_id
+  , m.nombre mesa_nombre
+  , m.siglas mesa_siglas
+  , g.id mesa_grupo_id
+  , g.nombre mesa_grupo_nombre
+  FROM public.usuarios u
+  INNER JOIN public.usuario_perfil_coe_dpa_mesa ux ON u.id = ux.usuario_id
+  INNER JOIN public.perfiles pf ON ux.perfil_id = pf.id
+  INNER JOIN public.coes c ON ux.coe_id = c.id
+  LEFT JOIN public.provincias p ON ux.provincia_id = p.id
+  LEFT JOIN public.cantones k ON ux.provincia_id = k.provincia_id AND ux.canton_id = k.id
+  LEFT JOIN public.mesas m ON ux.mesa_id = m.id
+  LEFT JOIN public.mesa_grupos g ON m.mesa_grupo_id = g.id
+  WHERE u.id = :usuario_id
+"""
+
+
+def datos_login(usuario_id):
+    """Ambito (perfil, coe, DPA, mesa) del usuario o None si no tiene asignacion."""
+    row = db.session.execute(db.text(_DATOS_LOGIN_SQL), {'usuario_id': usuario_id}).fetchone()
+    if not row:
+        return None
+    return {
+        'usuario_institucion_id': row.usuario_institucion_id,
+        'usuario_login': row.usuario_login,
+        'usuario_id': row.usuario_id,
+        'usuario_descripcion': row.usuario_descripcion,
+        'coe_id': row.coe_id,
+        'coe_abreviatura': row.coe_abreviatura,
+        'perfil_id': row.perfil_id,
+        'perfil_nombre': row.perfil_nombre,
+        'provincia_id': row.provincia_id,
+        'provincia_nombre': row.provincia_nombre,
+        'canton_id': row.canton_id,
+        'canton_nombre': row.canton_nombre,
+        'mesa_id': row.mesa_id,
+        'mesa_nombre': row.mesa_nombre,
+        'mesa_siglas': row.mesa_siglas,
+        'mesa_grupo_id': row.mesa_grupo_id,
+        'mesa_grupo_nombre': row.mesa_grupo_nombre
+    }
+
+
+def _emergencias_y_coes(app, usuario_id, usuario):
+    with app.app_context():
+        emergencias = emergencias_by_usuario(usuario)
+        emergencia_ids = sorted({item['emergencia_id'] for item in emergencias})
+        return emergencias, coes_activados_visibles(emergencia_ids, usuario_id)
+
+
+def build_bootstrap(usuario_id, usuario):
+    """``{datos_login, menus, emergencias, coes_activados}`` del usuario."""
+    app = current_app._get_current_object()
+    pendiente = _executor.submit(_emergencias_y_coes, app, usuario_id, usuario)
+
+    datos = datos_login(usuario_id)
+    menus = []
+    if datos is not None:
+        menus = accesos.get(datos['perfil_id'], datos['coe_id'], datos['mesa_id']).menus
+
+    emergencias, coes = pendiente.result()
+    return {
+        'datos_login': datos,
+        'menus': menus,
+        'emergencias': emergencias,
+        'coes_activados': coes,
+    }
@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from menus import menus_bp
 from models import db
+from permisos_cache import accesos
 from datetime import datetime, timezone
 
 @menus_bp.route('/api/menus', methods=['GET'])
@@ -50,6 +51,9 @@ def get_menus():
 @menus_bp.route('/api/menus/perfil/<int:perfil_id>/coe/<int:coe_id>/mesa/<int:mesa_id>', methods=['GET'])
 def get_menus_by_usuario(perfil_id, coe_id, mesa_id):
     """Obtener menús visibles para un usuario según perfil, COE y mesa.
+
+    Se sirve desde la cache de accesos (permisos_cache), que se reconstruye
+    cuando cambian menus, opciones o permisos.
     ---
     tags:
       - Menús
@@ -81,30 +85,7 @@ def get_menus_by_usuario(perfil_id, coe_id, mesa_id):
               ruta: {type: string}
               icono: {type: string}
     """
-    query = db.text("""
-        SELECT DISTINCT m.id, m.padre_id, m.orden, m.nombre, m.ruta, m.icono 
-        FROM menus m 
-        LEFT JOIN perfil_coe_mesa_menu_opcion x ON m.id = x.menu_id
-        WHERE ((x.perfil_id = :perfil_id AND x.coe_id = :coe_id AND (x.mesa_id = :mesa_id OR :mesa_id = 0))
-           OR m.orden = 0) AND m.activo = true
-        ORDER BY m.padre_id, m.orden;
-    """)
-    result = db.session.execute(query, {
-        'perfil_id': perfil_id,
-        'coe_id': coe_id,
-        'mesa_id': mesa_id,
-    })
-    menus = []
-    for row in result:
-        menus.append({
-            'id': row.id,
-            'padre_id': row.padre_id,
-            'orden': row.orden,
-            'nombre': row.nombre,
-            'ruta': row.ruta,
-            'icono': row.icono,
-        })
-    return jsonify(menus)
+    return jsonify(accesos.get(perfil_id, coe_id, mesa_id).menus)
 
 @menus_bp.route('/api/menus', methods=['POST'])
 def create_menu():
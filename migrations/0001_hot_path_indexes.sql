@@ -0,0 +1,57 @@
+-- Migración 0001: índices secundarios para las consultas más frecuentes
+--
+-- Aplicar con psql (cada sentencia en su propia transacción, requerido por
+-- CREATE INDEX CONCURRENTLY):
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0001_hot_path_indexes.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- requerimiento_recursos: bandejas del receptor/emisor por emergencia y estado
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_requerimiento_recursos_receptor_emergencia_estado
+    ON requerimiento_recursos (usuario_receptor_id, emergencia_id, requerimiento_estado_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_requerimiento_recursos_emisor_emergencia
+    ON requerimiento_recursos (usuario_emisor_id, emergencia_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_requerimiento_recursos_numero
+    ON requerimiento_recursos (requerimiento_numero);
+
+-- requerimiento_respuestas: disponibilidad por item de inventario
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_requerimiento_respuestas_inventario_activo
+    ON requerimiento_respuestas (recurso_inventario_id, activo);
+
+-- afectacion_variable_registros: matriz por evento/variable y feed de recientes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_afectacion_variable_registros_evento_variable_mod
+    ON afectacion_variable_registros (evento_id, afectacion_variable_id, modificacion);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_afectacion_variable_registros_parroquia_variable_emergencia
+    ON afectacion_variable_registros (parroquia_id, afectacion_variable_id, emergencia_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_afectacion_variable_registros_cambio
+    ON afectacion_variable_registros ((COALESCE(modificacion, creacion)));
+
+-- eventos: listados por emergencia y DPA
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_eventos_emergencia_provincia_canton
+    ON eventos (emergencia_id, provincia_id, canton_id);
+
+-- barrido_monitoreo: monitoreos de un barrido, más recientes primero
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_barrido_monitoreo_barrido_fecha
+    ON barrido_monitoreo (barrido_id, monitoreo_fecha DESC, id DESC);
+
+-- usuario_perfil_coe_dpa_mesa: asignaciones del usuario (login, permisos)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_usuario_perfil_coe_dpa_mesa_usuario
+    ON usuario_perfil_coe_dpa_mesa (usuario_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_usuario_perfil_coe_dpa_mesa_coe_mesa
+    ON usuario_perfil_coe_dpa_mesa (coe_id, mesa_id);
+
+ANALYZE requerimiento_recursos;
+ANALYZE requerimiento_respuestas;
+ANALYZE afectacion_variable_registros;
+ANALYZE eventos;
+ANALYZE barrido_monitoreo;
+ANALYZE usuario_perfil_coe_dpa_mesa;
+
+INSERT INTO schema_migrations (version) VALUES ('0001_hot_path_indexes')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,62 @@
+-- Migración 0002: una sola fila activa por celda de la matriz de afectaciones
+--
+-- La matriz (evento x variable) ya muestra solo el registro más reciente de
+-- cada celda; los anteriores quedan inactivos y un índice único parcial
+-- impide nuevos duplicados. Es el conflict target del guardado masivo
+-- (INSERT ... ON CONFLICT) de afectacion_variable_registros.
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0002_afectacion_registros_celda_unica.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto. La depuración y el
+-- índice van en una sola transacción con la tabla bloqueada para escritura,
+-- así ninguna fila duplicada entra entre ambos y un fallo no deja nada a medias.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+BEGIN;
+LOCK TABLE afectacion_variable_registros IN SHARE ROW EXCLUSIVE MODE;
+
+-- Índice INVALID que haya dejado una versión anterior (CONCURRENTLY) fallida
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = 'ux_afectacion_variable_registros_celda'
+          AND NOT i.indisvalid
+    ) THEN
+        DROP INDEX ux_afectacion_variable_registros_celda;
+    END IF;
+END;
+$$;
+
+-- Mismo criterio que registros_unicos en la consulta de la matriz
+UPDATE afectacion_variable_registros r
+SET activo = false,
+    modificador = 'migracion_0002',
+    modificacion = CURRENT_TIMESTAMP
+FROM (
+    SELECT
+        id,
+        ROW_NUMBER() OVER (
+            PARTITION BY emergencia_id, evento_id, afectacion_variable_id
+            ORDER BY modificacion DESC NULLS LAST, creacion DESC, id DESC
+        ) AS orden
+    FROM afectacion_variable_registros
+    WHERE COALESCE(activo, true) = true
+      AND evento_id IS NOT NULL
+) duplicados
+WHERE r.id = duplicados.id
+  AND duplicados.orden > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_afectacion_variable_registros_celda
+    ON afectacion_variable_registros (emergencia_id, evento_id, afectacion_variable_id)
+    WHERE COALESCE(activo, true) = true;
+COMMIT;
+
+INSERT INTO schema_migrations (version) VALUES ('0002_afectacion_registros_celda_unica')
+ON CONFLICT (version) DO NOTHING;
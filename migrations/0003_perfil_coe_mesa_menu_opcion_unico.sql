@@ -0,0 +1,55 @@
+-- Migración 0003: un solo permiso por perfil/coe/mesa/menu/opcion
+--
+-- La API ya validaba la combinación antes de insertar; el índice único la
+-- garantiza en la base y es el conflict target de la sincronización de
+-- permisos (INSERT ... ON CONFLICT) en perfil_coe_mesa_menu_opcion.
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0003_perfil_coe_mesa_menu_opcion_unico.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto. La depuración y el
+-- índice van en una sola transacción con la tabla bloqueada para escritura,
+-- así ningún duplicado entra entre ambos y un fallo no deja nada a medias.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+BEGIN;
+LOCK TABLE perfil_coe_mesa_menu_opcion IN SHARE ROW EXCLUSIVE MODE;
+
+-- Índice INVALID que haya dejado una versión anterior (CONCURRENTLY) fallida
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = 'ux_perfil_coe_mesa_menu_opcion_permiso'
+          AND NOT i.indisvalid
+    ) THEN
+        DROP INDEX ux_perfil_coe_mesa_menu_opcion_permiso;
+    END IF;
+END;
+$$;
+
+-- Duplicados previos: se conserva el activo más reciente
+DELETE FROM perfil_coe_mesa_menu_opcion x
+USING (
+    SELECT
+        id,
+        ROW_NUMBER() OVER (
+            PARTITION BY perfil_id, coe_id, mesa_id, menu_id, opcion_id
+            ORDER BY COALESCE(activo, false) DESC, modificacion DESC NULLS LAST, id DESC
+        ) AS orden
+    FROM perfil_coe_mesa_menu_opcion
+) duplicados
+WHERE x.id = duplicados.id
+  AND duplicados.orden > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_perfil_coe_mesa_menu_opcion_permiso
+    ON perfil_coe_mesa_menu_opcion (perfil_id, coe_id, mesa_id, menu_id, opcion_id);
+COMMIT;
+
+INSERT INTO schema_migrations (version) VALUES ('0003_perfil_coe_mesa_menu_opcion_unico')
+ON CONFLICT (version) DO NOTHING;
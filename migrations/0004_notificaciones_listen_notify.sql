@@ -0,0 +1,111 @@
+-- Migración 0004: avisos de cambios por LISTEN/NOTIFY (canal simulacro_cambios)
+--
+-- Los triggers publican un JSON corto por cada cambio en requerimiento_recursos
+-- y requerimiento_respuestas (por fila) y en afectacion_variable_registros
+-- (por sentencia, agrupado por emergencia, para que el guardado masivo de la
+-- matriz no emita miles de avisos). Lo consume pg_notifications.py y lo
+-- reparte a los clientes de /api/notificaciones/stream.
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0004_notificaciones_listen_notify.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto. Requiere PostgreSQL 11+.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Requerimientos y respuestas: un aviso por fila con emergencia, emisor y receptor
+CREATE OR REPLACE FUNCTION notificar_cambio_requerimiento() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    fila jsonb;
+    requerimiento record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        fila := to_jsonb(OLD);
+    ELSE
+        fila := to_jsonb(NEW);
+    END IF;
+
+    IF TG_TABLE_NAME = 'requerimiento_recursos' THEN
+        fila := fila || jsonb_build_object('requerimiento_recurso_id', fila->'id');
+    ELSE
+        SELECT rr.emergencia_id, rr.usuario_emisor_id, rr.usuario_receptor_id
+        INTO requerimiento
+        FROM requerimiento_recursos rr
+        WHERE rr.id = (fila->>'requerimiento_recurso_id')::integer;
+        IF FOUND THEN
+            fila := fila || jsonb_build_object(
+                'emergencia_id', requerimiento.emergencia_id,
+                'usuario_emisor_id', requerimiento.usuario_emisor_id,
+                'usuario_receptor_id', requerimiento.usuario_receptor_id
+            );
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('simulacro_cambios', jsonb_build_object(
+        'tabla', TG_TABLE_NAME,
+        'op', TG_OP,
+        'id', fila->'id',
+        'emergencia_id', fila->'emergencia_id',
+        'requerimiento_recurso_id', fila->'requerimiento_recurso_id',
+        'usuario_emisor_id', fila->'usuario_emisor_id',
+        'usuario_receptor_id', fila->'usuario_receptor_id'
+    )::text);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_notificar_cambio ON requerimiento_recursos;
+CREATE TRIGGER trg_notificar_cambio
+    AFTER INSERT OR UPDATE OR DELETE ON requerimiento_recursos
+    FOR EACH ROW EXECUTE FUNCTION notificar_cambio_requerimiento();
+
+DROP TRIGGER IF EXISTS trg_notificar_cambio ON requerimiento_respuestas;
+CREATE TRIGGER trg_notificar_cambio
+    AFTER INSERT OR UPDATE OR DELETE ON requerimiento_respuestas
+    FOR EACH ROW EXECUTE FUNCTION notificar_cambio_requerimiento();
+
+-- Afectaciones: un aviso por emergencia y sentencia (tabla de transicion "filas")
+CREATE OR REPLACE FUNCTION notificar_cambio_afectacion() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    grupo record;
+BEGIN
+    FOR grupo IN
+        SELECT emergencia_id, COUNT(*) AS cantidad
+        FROM filas
+        GROUP BY emergencia_id
+    LOOP
+        PERFORM pg_notify('simulacro_cambios', jsonb_build_object(
+            'tabla', TG_TABLE_NAME,
+            'op', TG_OP,
+            'emergencia_id', grupo.emergencia_id,
+            'filas', grupo.cantidad
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_notificar_insercion ON afectacion_variable_registros;
+CREATE TRIGGER trg_notificar_insercion
+    AFTER INSERT ON afectacion_variable_registros
+    REFERENCING NEW TABLE AS filas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_afectacion();
+
+DROP TRIGGER IF EXISTS trg_notificar_actualizacion ON afectacion_variable_registros;
+CREATE TRIGGER trg_notificar_actualizacion
+    AFTER UPDATE ON afectacion_variable_registros
+    REFERENCING NEW TABLE AS filas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_afectacion();
+
+DROP TRIGGER IF EXISTS trg_notificar_eliminacion ON afectacion_variable_registros;
+CREATE TRIGGER trg_notificar_eliminacion
+    AFTER DELETE ON afectacion_variable_registros
+    REFERENCING OLD TABLE AS filas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_afectacion();
+
+INSERT INTO schema_migrations (version) VALUES ('0004_notificaciones_listen_notify')
+ON CONFLICT (version) DO NOTHING;
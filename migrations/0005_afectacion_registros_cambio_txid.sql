@@ -0,0 +1,41 @@
+-- Migración 0005: cursor de cambios para afectacion_variable_registros/recientes
+--
+-- Cada INSERT/UPDATE deja en cambio_txid el id de la transacción que escribió
+-- la fila (txid_current(), de 64 bits, no da la vuelta). El feed por cursor
+-- lee (cambio_txid, id) > cursor y solo hasta el xmin del snapshot actual:
+-- toda transacción con txid menor ya terminó, así que ninguna fila puede
+-- aparecer después por detrás del cursor (una secuencia común sí lo permite,
+-- porque el orden de nextval no es el orden de commit).
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0005_afectacion_registros_cambio_txid.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto. Requiere PostgreSQL 11+
+-- (ADD COLUMN con DEFAULT no reescribe la tabla).
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Las filas existentes quedan en 0: el primer recorrido desde el cursor 0:0 las trae
+ALTER TABLE afectacion_variable_registros
+    ADD COLUMN IF NOT EXISTS cambio_txid BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION marcar_cambio_afectacion() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.cambio_txid := txid_current();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_marcar_cambio ON afectacion_variable_registros;
+CREATE TRIGGER trg_marcar_cambio
+    BEFORE INSERT OR UPDATE ON afectacion_variable_registros
+    FOR EACH ROW EXECUTE FUNCTION marcar_cambio_afectacion();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_afectacion_variable_registros_cambio_txid
+    ON afectacion_variable_registros (cambio_txid, id);
+
+INSERT INTO schema_migrations (version) VALUES ('0005_afectacion_registros_cambio_txid')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,36 @@
+-- Migración 0006: contador de secuencia por requerimiento para la huella
+--
+-- requerimiento_huella_logs numera sus eventos por requerimiento_recurso_id
+-- (uq_req_huella_secuencia). Calcular MAX(secuencia)+1 al insertar hace que
+-- dos escrituras simultáneas obtengan el mismo número y una termine en 409.
+-- Con una fila contador por requerimiento, la API reserva la secuencia con
+-- UPDATE ... RETURNING en la misma transacción del INSERT: el bloqueo de esa
+-- fila ordena a las escrituras concurrentes y cada una recibe un número propio.
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0006_requerimiento_huella_secuencias.sql
+--
+-- Es idempotente: se puede volver a correr sin efecto. Los requerimientos sin
+-- contador lo crean en su primera escritura desde el MAX(secuencia) existente.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS requerimiento_huella_secuencias (
+    requerimiento_recurso_id INTEGER PRIMARY KEY
+        REFERENCES requerimiento_recursos (id) ON DELETE CASCADE,
+    ultima_secuencia INTEGER NOT NULL DEFAULT 0
+);
+
+-- Contadores iniciales desde la huella existente
+INSERT INTO requerimiento_huella_secuencias (requerimiento_recurso_id, ultima_secuencia)
+SELECT h.requerimiento_recurso_id, MAX(h.secuencia)
+FROM requerimiento_huella_logs h
+INNER JOIN requerimiento_recursos rr ON rr.id = h.requerimiento_recurso_id
+GROUP BY h.requerimiento_recurso_id
+ON CONFLICT (requerimiento_recurso_id) DO UPDATE
+SET ultima_secuencia = GREATEST(requerimiento_huella_secuencias.ultima_secuencia, EXCLUDED.ultima_secuencia);
+
+INSERT INTO schema_migrations (version) VALUES ('0006_requerimiento_huella_secuencias')
+ON CONFLICT (version) DO NOTHING;
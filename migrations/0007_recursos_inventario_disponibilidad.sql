@@ -0,0 +1,234 @@
+-- Migración 0007: disponibilidad mantenida por recurso de inventario
+--
+-- Las consultas de disponibilidad restaban a las existencias la suma de todas
+-- las respuestas y movilizaciones activas del recurso, agregando ambas tablas
+-- completas en cada llamada. recursos_inventario_disponibilidad guarda esos
+-- totales por recurso_inventario_id y los triggers los ajustan (sumando la
+-- diferencia de la fila escrita) en la misma transacción de cada escritura:
+--
+--   comprometido     SUM(cantidad_asignada) de las respuestas activas
+--   asignado_en_uso  ídem, solo las respuestas con factor 1/true (o sin factor)
+--   movilizado       SUM(cantidad_asignada) de las movilizaciones activas con factor 1/-1/true
+--   disponible       existencias - asignado_en_uso - movilizado
+--
+-- La vista recursos_inventario_disponibilidad_calculada hace el cálculo
+-- completo; la usa utils/reconciliar_disponibilidad.py para medir y corregir
+-- diferencias.
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f migrations/0007_recursos_inventario_disponibilidad.sql
+--
+-- Es idempotente: se puede volver a correr (recalcula la tabla). Requiere
+-- PostgreSQL 12+ (columna generada).
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS recursos_inventario_disponibilidad (
+    recurso_inventario_id INTEGER PRIMARY KEY
+        REFERENCES recursos_inventario (id) ON DELETE CASCADE,
+    existencias BIGINT NOT NULL DEFAULT 0,
+    comprometido BIGINT NOT NULL DEFAULT 0,
+    asignado_en_uso BIGINT NOT NULL DEFAULT 0,
+    movilizado BIGINT NOT NULL DEFAULT 0,
+    disponible BIGINT GENERATED ALWAYS AS (existencias - asignado_en_uso - movilizado) STORED,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cálculo completo (mismas reglas de factor que las consultas que reemplaza)
+CREATE OR REPLACE VIEW recursos_inventario_disponibilidad_calculada AS
+SELECT
+    ri.id AS recurso_inventario_id,
+    COALESCE(ri.existencias, 0)::BIGINT AS existencias,
+    COALESCE(r.comprometido, 0)::BIGINT AS comprometido,
+    COALESCE(r.asignado_en_uso, 0)::BIGINT AS asignado_en_uso,
+    COALESCE(m.movilizado, 0)::BIGINT AS movilizado
+FROM recursos_inventario ri
+LEFT JOIN (
+    SELECT
+        recurso_inventario_id,
+        SUM(COALESCE(cantidad_asignada, 0)) AS comprometido,
+        SUM(
+            COALESCE(cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(factor::text, '1')) IN ('1', 'true', 't') THEN 1
+                ELSE 0
+            END
+        ) AS asignado_en_uso
+    FROM requerimiento_respuestas
+    WHERE COALESCE(activo, true) = true
+    GROUP BY recurso_inventario_id
+) r ON r.recurso_inventario_id = ri.id
+LEFT JOIN (
+    SELECT
+        recurso_inventario_id,
+        SUM(
+            COALESCE(cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(factor::text, '0')) IN ('1', '-1', 'true', 't') THEN 1
+                ELSE 0
+            END
+        ) AS movilizado
+    FROM recursos_movilizados
+    WHERE COALESCE(activo, true) = true
+    GROUP BY recurso_inventario_id
+) m ON m.recurso_inventario_id = ri.id;
+
+-- Suma la diferencia de una fila escrita al recurso (sin efecto si es cero)
+CREATE OR REPLACE FUNCTION disponibilidad_aplicar(
+    p_recurso_inventario_id INTEGER,
+    p_comprometido BIGINT,
+    p_asignado_en_uso BIGINT,
+    p_movilizado BIGINT
+) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_recurso_inventario_id IS NULL
+       OR (p_comprometido = 0 AND p_asignado_en_uso = 0 AND p_movilizado = 0) THEN
+        RETURN;
+    END IF;
+    INSERT INTO recursos_inventario_disponibilidad AS d (
+        recurso_inventario_id, existencias, comprometido, asignado_en_uso, movilizado
+    )
+    SELECT ri.id, COALESCE(ri.existencias, 0), p_comprometido, p_asignado_en_uso, p_movilizado
+    FROM recursos_inventario ri
+    WHERE ri.id = p_recurso_inventario_id
+    ON CONFLICT (recurso_inventario_id) DO UPDATE
+    SET comprometido = d.comprometido + EXCLUDED.comprometido,
+        asignado_en_uso = d.asignado_en_uso + EXCLUDED.asignado_en_uso,
+        movilizado = d.movilizado + EXCLUDED.movilizado,
+        actualizado = CURRENT_TIMESTAMP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION disponibilidad_por_respuesta() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND COALESCE(OLD.activo, true) THEN
+        PERFORM disponibilidad_aplicar(
+            OLD.recurso_inventario_id,
+            -COALESCE(OLD.cantidad_asignada, 0),
+            -COALESCE(OLD.cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(OLD.factor::text, '1')) IN ('1', 'true', 't') THEN 1 ELSE 0
+            END,
+            0
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND COALESCE(NEW.activo, true) THEN
+        PERFORM disponibilidad_aplicar(
+            NEW.recurso_inventario_id,
+            COALESCE(NEW.cantidad_asignada, 0),
+            COALESCE(NEW.cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(NEW.factor::text, '1')) IN ('1', 'true', 't') THEN 1 ELSE 0
+            END,
+            0
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION disponibilidad_por_movilizado() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND COALESCE(OLD.activo, true) THEN
+        PERFORM disponibilidad_aplicar(
+            OLD.recurso_inventario_id,
+            0,
+            0,
+            -COALESCE(OLD.cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(OLD.factor::text, '0')) IN ('1', '-1', 'true', 't') THEN 1 ELSE 0
+            END
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND COALESCE(NEW.activo, true) THEN
+        PERFORM disponibilidad_aplicar(
+            NEW.recurso_inventario_id,
+            0,
+            0,
+            COALESCE(NEW.cantidad_asignada, 0) * CASE
+                WHEN LOWER(COALESCE(NEW.factor::text, '0')) IN ('1', '-1', 'true', 't') THEN 1 ELSE 0
+            END
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Existencias: fila nueva al crear el recurso, y copia al cambiar existencias
+CREATE OR REPLACE FUNCTION disponibilidad_por_inventario() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO recursos_inventario_disponibilidad AS d (recurso_inventario_id, existencias)
+    VALUES (NEW.id, COALESCE(NEW.existencias, 0))
+    ON CONFLICT (recurso_inventario_id) DO UPDATE
+    SET existencias = EXCLUDED.existencias,
+        actualizado = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_disponibilidad ON requerimiento_respuestas;
+CREATE TRIGGER trg_disponibilidad
+    AFTER INSERT OR DELETE ON requerimiento_respuestas
+    FOR EACH ROW EXECUTE FUNCTION disponibilidad_por_respuesta();
+
+DROP TRIGGER IF EXISTS trg_disponibilidad_actualizacion ON requerimiento_respuestas;
+CREATE TRIGGER trg_disponibilidad_actualizacion
+    AFTER UPDATE ON requerimiento_respuestas
+    FOR EACH ROW
+    WHEN (
+        OLD.recurso_inventario_id IS DISTINCT FROM NEW.recurso_inventario_id
+        OR OLD.cantidad_asignada IS DISTINCT FROM NEW.cantidad_asignada
+        OR OLD.factor IS DISTINCT FROM NEW.factor
+        OR OLD.activo IS DISTINCT FROM NEW.activo
+    )
+    EXECUTE FUNCTION disponibilidad_por_respuesta();
+
+DROP TRIGGER IF EXISTS trg_disponibilidad ON recursos_movilizados;
+CREATE TRIGGER trg_disponibilidad
+    AFTER INSERT OR DELETE ON recursos_movilizados
+    FOR EACH ROW EXECUTE FUNCTION disponibilidad_por_movilizado();
+
+DROP TRIGGER IF EXISTS trg_disponibilidad_actualizacion ON recursos_movilizados;
+CREATE TRIGGER trg_disponibilidad_actualizacion
+    AFTER UPDATE ON recursos_movilizados
+    FOR EACH ROW
+    WHEN (
+        OLD.recurso_inventario_id IS DISTINCT FROM NEW.recurso_inventario_id
+        OR OLD.cantidad_asignada IS DISTINCT FROM NEW.cantidad_asignada
+        OR OLD.factor IS DISTINCT FROM NEW.factor
+        OR OLD.activo IS DISTINCT FROM NEW.activo
+    )
+    EXECUTE FUNCTION disponibilidad_por_movilizado();
+
+DROP TRIGGER IF EXISTS trg_disponibilidad ON recursos_inventario;
+CREATE TRIGGER trg_disponibilidad
+    AFTER INSERT ON recursos_inventario
+    FOR EACH ROW EXECUTE FUNCTION disponibilidad_por_inventario();
+
+DROP TRIGGER IF EXISTS trg_disponibilidad_existencias ON recursos_inventario;
+CREATE TRIGGER trg_disponibilidad_existencias
+    AFTER UPDATE ON recursos_inventario
+    FOR EACH ROW
+    WHEN (OLD.existencias IS DISTINCT FROM NEW.existencias)
+    EXECUTE FUNCTION disponibilidad_por_inventario();
+
+-- Carga inicial (y recálculo si se vuelve a correr). Se bloquean las tablas
+-- de origen para que ninguna escritura quede entre el cálculo y los triggers.
+BEGIN;
+LOCK TABLE requerimiento_respuestas, recursos_movilizados, recursos_inventario IN SHARE MODE;
+INSERT INTO recursos_inventario_disponibilidad AS d (
+    recurso_inventario_id, existencias, comprometido, asignado_en_uso, movilizado
+)
+SELECT recurso_inventario_id, existencias, comprometido, asignado_en_uso, movilizado
+FROM recursos_inventario_disponibilidad_calculada
+ON CONFLICT (recurso_inventario_id) DO UPDATE
+SET existencias = EXCLUDED.existencias,
+    comprometido = EXCLUDED.comprometido,
+    asignado_en_uso = EXCLUDED.asignado_en_uso,
+    movilizado = EXCLUDED.movilizado,
+    actualizado = CURRENT_TIMESTAMP;
+COMMIT;
+
+INSERT INTO schema_migrations (version) VALUES ('0007_recursos_inventario_disponibilidad')
+ON CONFLICT (version) DO NOTHING;
@@ -677,3 +677,16 @@ class AfectacionVariableRegistroDetalle(db.Model):
             'modificador': self.modificador,
             'modificacion': self.modificacion.isoformat() if self.modificacion else None
         }
+
+class TablaVersion(db.Model):
+    __tablename__ = 'tabla_versiones'
+    tabla = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    actualizado = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'tabla': self.tabla,
+            'version': self.version,
+            'actualizado': self.actualizado.isoformat() if self.actualizado else None
+        }
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+notificaciones_bp = Blueprint('notificaciones', __name__)
+
+from .routes import *
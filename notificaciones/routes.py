@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from notificaciones import notificaciones_bp
+from auth import decode_token, get_token_from_header
+from emergencias.routes import emergencias_by_usuario
+from models import db
+from pg_notifications import RESYNC, hub
+from public_routes import public_route
+
+NOTIFY_HEARTBEAT_SECONDS = float(os.getenv('NOTIFY_HEARTBEAT_SECONDS', '20'))
+# Se cierra el stream cada tanto: el navegador reconecta solo (EventSource) y
+# asi un token vencido no queda escuchando indefinidamente
+NOTIFY_STREAM_MAX_SECONDS = float(os.getenv('NOTIFY_STREAM_MAX_SECONDS', '900'))
+NOTIFY_RETRY_MS = int(os.getenv('NOTIFY_RETRY_MS', '3000'))
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def _evento_para(subscription, event):
+    data = dict(event)
+    data['para_usuario'] = subscription.usuario_id in (
+        event.get('usuario_emisor_id'), event.get('usuario_receptor_id'))
+    return data
+
+
+@notificaciones_bp.route('/api/notificaciones/stream', methods=['GET'])
+@public_route
+def stream_notificaciones():
+    """Stream de avisos de cambios de una emergencia (server-sent events)
+    ---
+    tags:
+      - Notificaciones
+    description: >
+      Reemplaza el polling de /api/requerimiento-recursos/*_notificacion y
+      /api/afectacion_variable_registros/recientes. Emite un evento por cambio en
+      requerimiento_recursos y requerimiento_respuestas (con para_usuario=true si
+      el usuario es emisor o receptor) y uno por guardado en
+      afectacion_variable_registros. El evento resync indica que se pudieron
+      perder avisos y hay que volver a consultar. EventSource no envia headers,
+      por eso el token se acepta tambien como query param access_token.
+    parameters:
+      - name: emergencia_id
+        in: query
+        type: integer
+        required: true
+      - name: access_token
+        in: query
+        type: string
+        required: false
+    responses:
+      200:
+        description: text/event-stream
+      400:
+        description: Falta emergencia_id
+      401:
+        description: Token invalido
+      403:
+        description: La emergencia no esta en el ambito del usuario
+    """
+    token = get_token_from_header() or request.args.get('access_token')
+    user = decode_token(token) if token else None
+    if not user or 'user_id' not in user:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+    emergencia_id = request.args.get('emergencia_id', type=int)
+    if emergencia_id is None:
+        return jsonify({'error': 'emergencia_id es requerido'}), 400
+    try:
+        visibles = {e['emergencia_id'] for e in emergencias_by_usuario(user.get('usuario'))}
+    finally:
+        # El stream dura minutos: no retener la conexion de la consulta
+        db.session.close()
+    if emergencia_id not in visibles:
+        return jsonify({'error': 'Emergencia fuera del ambito del usuario'}), 403
+
+    app = current_app._get_current_object()
+    subscription = hub.subscribe(app, emergencia_id, user['user_id'])
+
+    def generar():
+        try:
+            yield f'retry: {NOTIFY_RETRY_MS}\n\n'
+            yield _sse('conectado', {'emergencia_id': emergencia_id})
+            fin = time.monotonic() + NOTIFY_STREAM_MAX_SECONDS
+            while True:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    return
+                event = subscription.get(min(NOTIFY_HEARTBEAT_SECONDS, restante))
+                if event is None:
+                    yield ': ping\n\n'
+                elif event is RESYNC:
+                    yield _sse('resync', {'emergencia_id': emergencia_id})
+                else:
+                    yield _sse(event.get('tabla') or 'cambio', _evento_para(subscription, event))
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = Response(stream_with_context(generar()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
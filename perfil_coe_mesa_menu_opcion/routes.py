@@ -4,6 +4,7 @@ from flask import jsonify, request
 
 from models import db
 from perfil_coe_mesa_menu_opcion import perfil_coe_mesa_menu_opcion_bp
+from permisos_cache import matrices
 
 
 def _to_bool(value):
@@ -114,16 +115,6 @@ def _validate_coe_mesa(coe_id, mesa_id):
     return None
 
 
-def _validate_perfil(perfil_id):
-    perfil_ok = db.session.execute(
-        db.text("SELECT 1 FROM perfiles WHERE id = :id"),
-        {"id": perfil_id},
-    ).fetchone()
-    if perfil_ok is None:
-        return "El perfil_id no existe"
-    return None
-
-
 def _validate_menu_opcion(menu_id, opcion_id):
     menu_ok = db.session.execute(
         db.text("SELECT 1 FROM menus WHERE id = :id"),
@@ -170,6 +161,155 @@ def _validate_unique_combination(perfil_id, coe_id, mesa_id, menu_id, opcion_id,
     return None
 
 
+_EXISTING_IDS_SQL = """
+    SELECT 'perfiles' AS tabla, id FROM perfiles WHERE id = ANY(:perfil_ids)
+    UNION ALL
+    SELECT 'menus' AS tabla, id FROM menus WHERE id = ANY(:menu_ids)
+    UNION ALL
+    SELECT 'opciones' AS tabla, id FROM opciones WHERE id = ANY(:opcion_ids)
+"""
+
+_UPSERT_PERMISOS_SQL = """
+    INSERT INTO perfil_coe_mesa_menu_opcion (
+        perfil_id, coe_id, mesa_id, menu_id, opcion_id, activo,
+        creador, creacion, modificador, modificacion
+    )
+    SELECT
+        p.perfil_id, :coe_id, :mesa_id, p.menu_id, p.opcion_id, p.activo,
+        :creador, :now, :modificador, :now
+    FROM unnest(
+        CAST(:perfil_ids AS integer[]),
+        CAST(:menu_ids AS integer[]),
+        CAST(:opcion_ids AS integer[]),
+        CAST(:activos AS boolean[])
+    ) AS p(perfil_id, menu_id, opcion_id, activo)
+    ON CONFLICT (perfil_id, coe_id, mesa_id, menu_id, opcion_id) DO UPDATE
+    SET activo = EXCLUDED.activo,
+        modificador = EXCLUDED.modificador,
+        modificacion = EXCLUDED.modificacion
+    WHERE perfil_coe_mesa_menu_opcion.activo IS DISTINCT FROM EXCLUDED.activo
+    RETURNING (xmax = 0) AS insertado
+"""
+
+_DESACTIVAR_OMITIDOS_SQL = """
+    UPDATE perfil_coe_mesa_menu_opcion x
+    SET activo = false,
+        modificador = :modificador,
+        modificacion = :now
+    WHERE x.coe_id = :coe_id
+      AND x.mesa_id = :mesa_id
+      AND x.perfil_id = ANY(:perfiles)
+      AND COALESCE(x.activo, true) = true
+      AND NOT EXISTS (
+          SELECT 1
+          FROM unnest(
+              CAST(:perfil_ids AS integer[]),
+              CAST(:menu_ids AS integer[]),
+              CAST(:opcion_ids AS integer[])
+          ) AS p(perfil_id, menu_id, opcion_id)
+          WHERE p.perfil_id = x.perfil_id
+            AND p.menu_id = x.menu_id
+            AND p.opcion_id = x.opcion_id
+      )
+"""
+
+
+def _to_id(value):
+    """Entero o texto numerico (como lo aceptaba la API) a int; None si no lo es."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+def _validate_permisos_ids(items):
+    """Valida perfiles, menus y opciones de todos los items con una consulta.
+
+    Devuelve el primer error en el mismo formato que las validaciones por item.
+    """
+    ids = {"perfiles": set(), "menus": set(), "opciones": set()}
+    for item in items:
+        ids["perfiles"].add(item["perfil_id"])
+        ids["menus"].add(item["menu_id"])
+        ids["opciones"].add(item["opcion_id"])
+
+    existing = {tabla: set() for tabla in ids}
+    result = db.session.execute(
+        db.text(_EXISTING_IDS_SQL),
+        {
+            "perfil_ids": sorted(ids["perfiles"]),
+            "menu_ids": sorted(ids["menus"]),
+            "opcion_ids": sorted(ids["opciones"]),
+        },
+    )
+    for row in result:
+        existing[row.tabla].add(row.id)
+
+    for index, item in enumerate(items):
+        if item["perfil_id"] not in existing["perfiles"]:
+            return f"El perfil_id no existe en la posicion {index}"
+        if item["menu_id"] not in existing["menus"]:
+            return f"El menu_id no existe en la posicion {index}"
+        if item["opcion_id"] not in existing["opciones"]:
+            return f"El opcion_id no existe en la posicion {index}"
+    return None
+
+
+def _apply_permisos(coe_id, mesa_id, items, creador, modificador, desactivar_perfiles=()):
+    """Inserta o actualiza ``items`` con un INSERT ... ON CONFLICT y desactiva,
+    para ``desactivar_perfiles``, los permisos activos que no vinieron.
+
+    No hace commit. Devuelve ``(insertados, actualizados, desactivados)``; las
+    filas que ya tenian el mismo ``activo`` no se tocan ni se cuentan.
+    """
+    now = datetime.now(timezone.utc)
+    arrays = {
+        "perfil_ids": [item["perfil_id"] for item in items],
+        "menu_ids": [item["menu_id"] for item in items],
+        "opcion_ids": [item["opcion_id"] for item in items],
+    }
+
+    insertados = actualizados = 0
+    if items:
+        result = db.session.execute(
+            db.text(_UPSERT_PERMISOS_SQL),
+            {
+                **arrays,
+                "activos": [item["activo"] for item in items],
+                "coe_id": coe_id,
+                "mesa_id": mesa_id,
+                "creador": creador,
+                "modificador": modificador,
+                "now": now,
+            },
+        )
+        for row in result:
+            if row.insertado:
+                insertados += 1
+            else:
+                actualizados += 1
+
+    desactivados = 0
+    if desactivar_perfiles:
+        result = db.session.execute(
+            db.text(_DESACTIVAR_OMITIDOS_SQL),
+            {
+                **arrays,
+                "perfiles": sorted(desactivar_perfiles),
+                "coe_id": coe_id,
+                "mesa_id": mesa_id,
+                "modificador": modificador,
+                "now": now,
+            },
+        )
+        desactivados = getattr(result, "rowcount", 0) or 0
+
+    return insertados, actualizados, desactivados
+
+
 @perfil_coe_mesa_menu_opcion_bp.route("/api/perfil-coe-mesa-menu-opcion", methods=["GET"])
 def get_perfil_coe_mesa_menu_opcion():
     """Lista permisos perfil/coe/mesa/menu/opcion.
@@ -519,6 +659,9 @@ def sync_permisos_by_scope(perfil_id, coe_id, mesa_id):
         - Actualiza permisos existentes.
         - Desactiva permisos no enviados en la lista de entrada.
 
+    Se valida todo con una consulta y se aplica con un INSERT ... ON CONFLICT
+    mas un UPDATE de desactivacion (requiere la migracion 0003).
+
     Args:
         perfil_id (int): id del perfil.
         coe_id (int): id del COE.
@@ -528,7 +671,8 @@ def sync_permisos_by_scope(perfil_id, coe_id, mesa_id):
         permisos (list): lista de objetos con menu_id, opcion_id y activo opcional.
 
     Returns:
-        200: permisos sincronizados y estado final del ambito.
+        200: estado final del ambito (lista); los conteos van en las cabeceras
+            X-Insertados, X-Actualizados y X-Desactivados.
         400: validaciones de entrada.
         500: error de base de datos.
     """
@@ -549,8 +693,10 @@ def sync_permisos_by_scope(perfil_id, coe_id, mesa_id):
         if "menu_id" not in permiso or "opcion_id" not in permiso:
             return jsonify({"error": f"Falta menu_id u opcion_id en la posicion {index}"}), 400
 
-        menu_id = permiso["menu_id"]
-        opcion_id = permiso["opcion_id"]
+        menu_id = _to_id(permiso["menu_id"])
+        opcion_id = _to_id(permiso["opcion_id"])
+        if menu_id is None or opcion_id is None:
+            return jsonify({"error": f"menu_id y opcion_id deben ser enteros en la posicion {index}"}), 400
         pair = (menu_id, opcion_id)
         if pair in seen_pairs:
             return jsonify(
@@ -558,107 +704,28 @@ def sync_permisos_by_scope(perfil_id, coe_id, mesa_id):
             ), 400
         seen_pairs.add(pair)
 
-        menu_opcion_error = _validate_menu_opcion(menu_id, opcion_id)
-        if menu_opcion_error:
-            return jsonify({"error": f"{menu_opcion_error} en la posicion {index}"}), 400
-
         activo_value = permiso.get("activo", True)
         normalized.append(
             {
+                "perfil_id": perfil_id,
                 "menu_id": menu_id,
                 "opcion_id": opcion_id,
                 "activo": bool(activo_value),
             }
         )
 
-    now = datetime.now(timezone.utc)
+    if normalized:
+        ids_error = _validate_permisos_ids(normalized)
+        if ids_error:
+            return jsonify({"error": ids_error}), 400
+
     creador = data.get("creador", "Sistema")
     modificador = data.get("modificador", creador)
 
-    existing_rows = db.session.execute(
-        db.text(
-            """
-            SELECT id, menu_id, opcion_id
-            FROM perfil_coe_mesa_menu_opcion
-            WHERE perfil_id = :perfil_id AND coe_id = :coe_id AND mesa_id = :mesa_id
-            """
-        ),
-        {"perfil_id": perfil_id, "coe_id": coe_id, "mesa_id": mesa_id},
-    ).fetchall()
-
-    existing_by_pair = {(row.menu_id, row.opcion_id): row.id for row in existing_rows}
-    incoming_pairs = {(item["menu_id"], item["opcion_id"]) for item in normalized}
-
     try:
-        for permiso in normalized:
-            pair = (permiso["menu_id"], permiso["opcion_id"])
-            existing_id = existing_by_pair.get(pair)
-            if existing_id is not None:
-                db.session.execute(
-                    db.text(
-                        """
-                        UPDATE perfil_coe_mesa_menu_opcion
-                        SET activo = :activo,
-                            modificador = :modificador,
-                            modificacion = :modificacion
-                        WHERE id = :id
-                        """
-                    ),
-                    {
-                        "id": existing_id,
-                        "activo": permiso["activo"],
-                        "modificador": modificador,
-                        "modificacion": now,
-                    },
-                )
-            else:
-                db.session.execute(
-                    db.text(
-                        """
-                        INSERT INTO perfil_coe_mesa_menu_opcion (
-                            perfil_id, coe_id, mesa_id, menu_id, opcion_id, activo,
-                            creador, creacion, modificador, modificacion
-                        )
-                        VALUES (
-                            :perfil_id, :coe_id, :mesa_id, :menu_id, :opcion_id, :activo,
-                            :creador, :creacion, :modificador, :modificacion
-                        )
-                        """
-                    ),
-                    {
-                        "perfil_id": perfil_id,
-                        "coe_id": coe_id,
-                        "mesa_id": mesa_id,
-                        "menu_id": permiso["menu_id"],
-                        "opcion_id": permiso["opcion_id"],
-                        "activo": permiso["activo"],
-                        "creador": creador,
-                        "creacion": now,
-                        "modificador": modificador,
-                        "modificacion": now,
-                    },
-                )
-
-        for row in existing_rows:
-            pair = (row.menu_id, row.opcion_id)
-            if pair not in incoming_pairs:
-                db.session.execute(
-                    db.text(
-                        """
-                        UPDATE perfil_coe_mesa_menu_opcion
-                        SET activo = false,
-                            modificador = :modificador,
-                            modificacion = :modificacion
-                        WHERE id = :id
-                        """
-                    ),
-                    {
-                        "id": row.id,
-                        "modificador": modificador,
-                        "modificacion": now,
-                    },
-                )
-
+        insertados, actualizados, desactivados = _apply_permisos(
+            coe_id, mesa_id, normalized, creador, modificador, desactivar_perfiles=(perfil_id,)
+        )
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -699,7 +766,11 @@ def sync_permisos_by_scope(perfil_id, coe_id, mesa_id):
         {"perfil_id": perfil_id, "coe_id": coe_id, "mesa_id": mesa_id},
     )
 
-    return jsonify([_row_to_dict(row) for row in result_rows])
+    response = jsonify([_row_to_dict(row) for row in result_rows])
+    response.headers["X-Insertados"] = str(insertados)
+    response.headers["X-Actualizados"] = str(actualizados)
+    response.headers["X-Desactivados"] = str(desactivados)
+    return response
 
 
 @perfil_coe_mesa_menu_opcion_bp.route(
@@ -715,6 +786,13 @@ def get_permisos_matriz(coe_id, mesa_id):
 
     Query params:
         solo_activos_perfil (bool, opcional, default=true): incluye solo perfiles activos.
+        formato (str, opcional, default=completo): "completo" (perfiles, opciones, grupos
+            con botones y filas planas) o "compacto" (menus por indice, un string de
+            bits por menu x opcion en "activos" y los permisos existentes como
+            [perfil, menu, opcion, permiso_id]).
+
+    La matriz se arma una vez por (coe, mesa) y se reutiliza hasta que cambian
+    perfiles, menus, opciones o permisos (ver permisos_cache).
 
     Returns:
         200: estructura de matriz (perfiles, opciones, grupos y filas).
@@ -729,214 +807,13 @@ def get_permisos_matriz(coe_id, mesa_id):
     if solo_activos is None:
         return jsonify({"error": 'El parametro "solo_activos_perfil" debe ser true o false'}), 400
 
-    perfiles_query = "SELECT id, nombre, activo FROM perfiles"
-    if solo_activos:
-        perfiles_query += " WHERE activo = true"
-    perfiles_query += " ORDER BY nombre"
-    perfiles_rows = db.session.execute(db.text(perfiles_query)).fetchall()
-
-    perfiles = [
-        {"perfil_id": row.id, "perfil_nombre": row.nombre, "perfil_activo": row.activo}
-        for row in perfiles_rows
-    ]
-    perfil_ids = [row.id for row in perfiles_rows]
-
-    opciones_rows = db.session.execute(
-        db.text(
-            """
-            SELECT id, nombre, abreviatura
-            FROM opciones
-            WHERE activo = true
-            ORDER BY id
-            """
-        )
-    ).fetchall()
-    opciones = [
-        {
-            "opcion_id": row.id,
-            "opcion_nombre": row.nombre,
-            "opcion_abreviatura": row.abreviatura if row.abreviatura else row.nombre,
-        }
-        for row in opciones_rows
-    ]
-
-    menus_rows = db.session.execute(
-        db.text(
-            """
-            SELECT id, padre_id, orden, nombre, abreviatura
-            FROM menus
-            WHERE activo = true
-            ORDER BY padre_id, orden, nombre
-            """
-        )
-    ).fetchall()
-
-    menu_by_id = {row.id: row for row in menus_rows}
-    grupos_menus = [row for row in menus_rows if row.orden == 0]
-    hijos = [row for row in menus_rows if row.orden != 0]
-
-    hijos_by_padre = {}
-    for row in hijos:
-        hijos_by_padre.setdefault(row.padre_id, []).append(row)
-    for children in hijos_by_padre.values():
-        children.sort(key=lambda x: (x.orden, x.nombre))
-
-    permisos_rows = db.session.execute(
-        db.text(
-            """
-            SELECT id, perfil_id, menu_id, opcion_id, activo
-            FROM perfil_coe_mesa_menu_opcion
-            WHERE coe_id = :coe_id AND mesa_id = :mesa_id
-            """
-        ),
-        {"coe_id": coe_id, "mesa_id": mesa_id},
-    ).fetchall()
-
-    permisos_map = {}
-    for row in permisos_rows:
-        permisos_map[(row.perfil_id, row.menu_id, row.opcion_id)] = {
-            "id": row.id,
-            "activo": bool(row.activo),
-        }
-
-    grupos = []
-    included_menu_ids = set()
-
-    for grupo in sorted(grupos_menus, key=lambda x: (x.nombre, x.id)):
-        children = hijos_by_padre.get(grupo.id, [])
-        if not children:
-            continue
-
-        items = []
-        for menu_item in children:
-            included_menu_ids.add(menu_item.id)
-            celdas = []
-            for perfil_id in perfil_ids:
-                botones = []
-                for opcion in opciones:
-                    key = (perfil_id, menu_item.id, opcion["opcion_id"])
-                    permiso = permisos_map.get(key)
-                    botones.append(
-                        {
-                            "opcion_id": opcion["opcion_id"],
-                            "opcion_abreviatura": opcion["opcion_abreviatura"],
-                            "opcion_nombre": opcion["opcion_nombre"],
-                            "permiso_id": permiso["id"] if permiso else None,
-                            "activo": permiso["activo"] if permiso else False,
-                        }
-                    )
-                celdas.append({"perfil_id": perfil_id, "botones": botones})
-
-            items.append(
-                {
-                    "menu_id": menu_item.id,
-                    "menu_nombre": menu_item.nombre,
-                    "menu_abreviatura": menu_item.abreviatura,
-                    "menu_orden": menu_item.orden,
-                    "celdas": celdas,
-                }
-            )
-
-        grupos.append(
-            {
-                "menu_grupo_id": grupo.id,
-                "menu_grupo_nombre": grupo.nombre,
-                "menu_grupo_abreviatura": grupo.abreviatura,
-                "menu_grupo_orden": grupo.orden,
-                "items": items,
-            }
-        )
-
-    # Menus sin grupo (padre_id sin cabecera orden 0 o padre_id=0)
-    items_sin_grupo = []
-    for menu_item in hijos:
-        if menu_item.id in included_menu_ids:
-            continue
-        padre = menu_by_id.get(menu_item.padre_id)
-        if padre is not None and padre.orden == 0:
-            continue
-
-        celdas = []
-        for perfil_id in perfil_ids:
-            botones = []
-            for opcion in opciones:
-                key = (perfil_id, menu_item.id, opcion["opcion_id"])
-                permiso = permisos_map.get(key)
-                botones.append(
-                    {
-                        "opcion_id": opcion["opcion_id"],
-                        "opcion_abreviatura": opcion["opcion_abreviatura"],
-                        "opcion_nombre": opcion["opcion_nombre"],
-                        "permiso_id": permiso["id"] if permiso else None,
-                        "activo": permiso["activo"] if permiso else False,
-                    }
-                )
-            celdas.append({"perfil_id": perfil_id, "botones": botones})
-
-        items_sin_grupo.append(
-            {
-                "menu_id": menu_item.id,
-                "menu_nombre": menu_item.nombre,
-                "menu_abreviatura": menu_item.abreviatura,
-                "menu_orden": menu_item.orden,
-                "celdas": celdas,
-            }
-        )
+    formato = request.args.get("formato", "completo")
+    if formato not in ("completo", "compacto"):
+        return jsonify({"error": 'El parametro "formato" debe ser completo o compacto'}), 400
 
-    if items_sin_grupo:
-        items_sin_grupo.sort(key=lambda x: (x["menu_orden"], x["menu_nombre"]))
-        grupos.append(
-            {
-                "menu_grupo_id": 0,
-                "menu_grupo_nombre": "SIN GRUPO",
-                "menu_grupo_abreviatura": "SG",
-                "menu_grupo_orden": 9999,
-                "items": items_sin_grupo,
-            }
-        )
-
-    # Salida plana para compatibilidad con implementaciones previas
-    filas = []
-    for grupo in grupos:
-        for item in grupo["items"]:
-            for opcion in opciones:
-                celdas = []
-                for celda in item["celdas"]:
-                    boton = next(
-                        (b for b in celda["botones"] if b["opcion_id"] == opcion["opcion_id"]),
-                        None,
-                    )
-                    celdas.append(
-                        {
-                            "perfil_id": celda["perfil_id"],
-                            "permiso_id": boton["permiso_id"] if boton else None,
-                            "activo": boton["activo"] if boton else False,
-                        }
-                    )
-                filas.append(
-                    {
-                        "menu_grupo_id": grupo["menu_grupo_id"],
-                        "menu_grupo_nombre": grupo["menu_grupo_nombre"],
-                        "menu_id": item["menu_id"],
-                        "menu_nombre": item["menu_nombre"],
-                        "menu_orden": item["menu_orden"],
-                        "opcion_id": opcion["opcion_id"],
-                        "opcion_nombre": opcion["opcion_nombre"],
-                        "opcion_abreviatura": opcion["opcion_abreviatura"],
-                        "celdas": celdas,
-                    }
-                )
-
-    return jsonify(
-        {
-            "coe_id": coe_id,
-            "mesa_id": mesa_id,
-            "perfiles": perfiles,
-            "opciones": opciones,
-            "grupos": grupos,
-            "filas": filas,
-        }
-    )
+    matriz = matrices.get(coe_id, mesa_id, solo_activos)
+    body = matriz.compact() if formato == "compacto" else matriz.verbose()
+    return jsonify({"coe_id": coe_id, "mesa_id": mesa_id, "formato": formato, **body})
 
 
 @perfil_coe_mesa_menu_opcion_bp.route(
@@ -985,22 +862,17 @@ def upsert_permisos_matriz(coe_id, mesa_id):
         if missing:
             return jsonify({"error": f"Faltan campos {', '.join(missing)} en la posicion {index}"}), 400
 
-        perfil_id = celda["perfil_id"]
-        menu_id = celda["menu_id"]
-        opcion_id = celda["opcion_id"]
+        perfil_id = _to_id(celda["perfil_id"])
+        menu_id = _to_id(celda["menu_id"])
+        opcion_id = _to_id(celda["opcion_id"])
         activo = bool(celda["activo"])
+        if perfil_id is None or menu_id is None or opcion_id is None:
+            return jsonify({"error": f"perfil_id, menu_id y opcion_id deben ser enteros en la posicion {index}"}), 400
         key = (perfil_id, menu_id, opcion_id)
         if key in seen:
             return jsonify({"error": f"Celda duplicada en posicion {index}"}), 400
         seen.add(key)
 
-        perfil_error = _validate_perfil(perfil_id)
-        if perfil_error:
-            return jsonify({"error": f"{perfil_error} en la posicion {index}"}), 400
-        menu_opcion_error = _validate_menu_opcion(menu_id, opcion_id)
-        if menu_opcion_error:
-            return jsonify({"error": f"{menu_opcion_error} en la posicion {index}"}), 400
-
         perfiles_involucrados.add(perfil_id)
         normalized.append(
             {
@@ -1011,95 +883,20 @@ def upsert_permisos_matriz(coe_id, mesa_id):
             }
         )
 
-    now = datetime.now(timezone.utc)
-
-    existing_rows = db.session.execute(
-        db.text(
-            """
-            SELECT id, perfil_id, menu_id, opcion_id
-            FROM perfil_coe_mesa_menu_opcion
-            WHERE coe_id = :coe_id AND mesa_id = :mesa_id
-            """
-        ),
-        {"coe_id": coe_id, "mesa_id": mesa_id},
-    ).fetchall()
-    existing_by_key = {(r.perfil_id, r.menu_id, r.opcion_id): r.id for r in existing_rows}
-    incoming_keys = {
-        (item["perfil_id"], item["menu_id"], item["opcion_id"])
-        for item in normalized
-    }
+    if normalized:
+        ids_error = _validate_permisos_ids(normalized)
+        if ids_error:
+            return jsonify({"error": ids_error}), 400
 
     try:
-        for celda in normalized:
-            key = (celda["perfil_id"], celda["menu_id"], celda["opcion_id"])
-            existing_id = existing_by_key.get(key)
-            if existing_id is None:
-                db.session.execute(
-                    db.text(
-                        """
-                        INSERT INTO perfil_coe_mesa_menu_opcion (
-                            perfil_id, coe_id, mesa_id, menu_id, opcion_id, activo,
-                            creador, creacion, modificador, modificacion
-                        )
-                        VALUES (
-                            :perfil_id, :coe_id, :mesa_id, :menu_id, :opcion_id, :activo,
-                            :creador, :creacion, :modificador, :modificacion
-                        )
-                        """
-                    ),
-                    {
-                        "perfil_id": celda["perfil_id"],
-                        "coe_id": coe_id,
-                        "mesa_id": mesa_id,
-                        "menu_id": celda["menu_id"],
-                        "opcion_id": celda["opcion_id"],
-                        "activo": celda["activo"],
-                        "creador": creador,
-                        "creacion": now,
-                        "modificador": modificador,
-                        "modificacion": now,
-                    },
-                )
-            else:
-                db.session.execute(
-                    db.text(
-                        """
-                        UPDATE perfil_coe_mesa_menu_opcion
-                        SET activo = :activo,
-                            modificador = :modificador,
-                            modificacion = :modificacion
-                        WHERE id = :id
-                        """
-                    ),
-                    {
-                        "id": existing_id,
-                        "activo": celda["activo"],
-                        "modificador": modificador,
-                        "modificacion": now,
-                    },
-                )
-
-        if reemplazar and perfiles_involucrados:
-            for row in existing_rows:
-                key = (row.perfil_id, row.menu_id, row.opcion_id)
-                if row.perfil_id in perfiles_involucrados and key not in incoming_keys:
-                    db.session.execute(
-                        db.text(
-                            """
-                            UPDATE perfil_coe_mesa_menu_opcion
-                            SET activo = false,
-                                modificador = :modificador,
-                                modificacion = :modificacion
-                            WHERE id = :id
-                            """
-                        ),
-                        {
-                            "id": row.id,
-                            "modificador": modificador,
-                            "modificacion": now,
-                        },
-                    )
-
+        insertados, actualizados, desactivados = _apply_permisos(
+            coe_id,
+            mesa_id,
+            normalized,
+            creador,
+            modificador,
+            desactivar_perfiles=perfiles_involucrados if reemplazar else (),
+        )
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -1112,5 +909,8 @@ def upsert_permisos_matriz(coe_id, mesa_id):
             "mesa_id": mesa_id,
             "celdas_procesadas": len(normalized),
             "reemplazar": reemplazar,
+            "insertados": insertados,
+            "actualizados": actualizados,
+            "desactivados": desactivados,
         }
     )
@@ -0,0 +1,365 @@
+"""
+Cache en memoria de estructuras de permisos (perfil x coe x mesa x menu x opcion).
+
+- ``matrices``: matriz de administracion de permisos por (coe, mesa).
+- ``accesos``: menus y opciones autorizados por (perfil, coe, mesa), para la
+  navegacion.
+
+Cada entrada se guarda junto con las versiones (``table_versions``) de las
+tablas de las que depende; en cada consulta se leen esas versiones con una
+sola consulta por clave primaria y, si alguna cambio, la entrada se
+reconstruye. Asi un cambio hecho en otro worker se ve en la siguiente
+consulta, sin TTL.
+"""
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+from flask import current_app
+
+from models import db
+from table_versions import read_versions
+
+PERMISOS_TABLES = ('perfiles', 'menus', 'opciones', 'perfil_coe_mesa_menu_opcion')
+
+PERMISOS_CACHE_MAX = int(os.getenv('PERMISOS_CACHE_MAX', '256'))
+# Una entrada por (perfil, coe, mesa) en uso; son chicas
+ACCESOS_CACHE_MAX = int(os.getenv('ACCESOS_CACHE_MAX', '4096'))
+
+
+class VersionedCache:
+    """``{clave: valor}`` con LRU de ``max_entries``; ``build(*clave)`` arma cada valor."""
+
+    def __init__(self, tables, build, max_entries=PERMISOS_CACHE_MAX):
+        self.tables = tuple(sorted(tables))
+        self.build = build
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def _stamp(self):
+        try:
+            versions = read_versions(self.tables)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('No se pudieron leer las versiones de %s', ', '.join(self.tables))
+            return None
+        return tuple(versions[table] for table in self.tables)
+
+    def get(self, *key):
+        stamp = self._stamp()
+        if stamp is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+
+        value = self.build(*key)
+        with self._lock:
+            self.builds += 1
+            if stamp is not None:
+                self._entries[key] = (stamp, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def status(self):
+        return {
+            'tablas': list(self.tables),
+            'entradas': len(self._entries),
+            'max_entradas': self.max_entries,
+            'aciertos': self.hits,
+            'construcciones': self.builds,
+        }
+
+
+class MatrizPermisos:
+    """Matriz de permisos de un (coe, mesa) indexada por posicion.
+
+    - ``perfiles``, ``opciones``: listas en el orden de la respuesta.
+    - ``menus``: ``(grupo_index, fila_menu)`` en el orden de ``filas``.
+    - ``activos[m * O + o]``: bitmask de perfiles con el permiso activo.
+    - ``permiso_ids[(m * O + o) * P + p]``: id del permiso o 0 si no existe.
+    """
+
+    def __init__(self, perfiles, opciones, grupos, menus, activos, permiso_ids):
+        self.perfiles = perfiles
+        self.opciones = opciones
+        self.grupos = grupos
+        self.menus = menus
+        self.activos = activos
+        self.permiso_ids = permiso_ids
+
+    def _celdas(self, m, o):
+        n_perfiles = len(self.perfiles)
+        fila = m * len(self.opciones) + o
+        mask = self.activos[fila]
+        base = fila * n_perfiles
+        return [
+            (perfil['perfil_id'], self.permiso_ids[base + p] or None, bool(mask >> p & 1))
+            for p, perfil in enumerate(self.perfiles)
+        ]
+
+    def verbose(self):
+        """Estructura completa: perfiles, opciones, grupos (con botones) y filas planas."""
+        grupos = [dict(grupo, items=[]) for grupo in self.grupos]
+        celdas_por_menu = []
+        for m, (grupo_index, menu) in enumerate(self.menus):
+            por_opcion = [self._celdas(m, o) for o in range(len(self.opciones))]
+            celdas_por_menu.append(por_opcion)
+            celdas = []
+            for p, perfil in enumerate(self.perfiles):
+                botones = []
+                for o, opcion in enumerate(self.opciones):
+                    _perfil_id, permiso_id, activo = por_opcion[o][p]
+                    botones.append(dict(opcion, permiso_id=permiso_id, activo=activo))
+                celdas.append({'perfil_id': perfil['perfil_id'], 'botones': botones})
+            grupos[grupo_index]['items'].append(dict(menu, celdas=celdas))
+
+        filas = []
+        for m, (grupo_index, menu) in enumerate(self.menus):
+            grupo = grupos[grupo_index]
+            for o, opcion in enumerate(self.opciones):
+                filas.append({
+                    'menu_grupo_id': grupo['menu_grupo_id'],
+                    'menu_grupo_nombre': grupo['menu_grupo_nombre'],
+                    'menu_id': menu['menu_id'],
+                    'menu_nombre': menu['menu_nombre'],
+                    'menu_orden': menu['menu_orden'],
+                    'opcion_id': opcion['opcion_id'],
+                    'opcion_nombre': opcion['opcion_nombre'],
+                    'opcion_abreviatura': opcion['opcion_abreviatura'],
+                    'celdas': [
+                        {'perfil_id': perfil_id, 'permiso_id': permiso_id, 'activo': activo}
+                        for perfil_id, permiso_id, activo in celdas_por_menu[m][o]
+                    ],
+                })
+
+        return {
+            'perfiles': self.perfiles,
+            'opciones': self.opciones,
+            'grupos': grupos,
+            'filas': filas,
+        }
+
+    def compact(self):
+        """Indices y bitmasks: ``activos[m * len(opciones) + o]`` es un string
+        con un caracter por perfil ('1' = activo), en el orden de ``perfiles``.
+        """
+        n_perfiles = len(self.perfiles)
+        n_opciones = len(self.opciones)
+        permisos = []
+        for index, permiso_id in enumerate(self.permiso_ids):
+            if permiso_id:
+                fila, p = divmod(index, n_perfiles)
+                m, o = divmod(fila, n_opciones)
+                permisos.append([p, m, o, permiso_id])
+        return {
+            'perfiles': self.perfiles,
+            'opciones': self.opciones,
+            'grupos': self.grupos,
+            'menus': [dict(menu, grupo=grupo_index) for grupo_index, menu in self.menus],
+            'activos': [
+                format(mask, f'0{n_perfiles}b')[::-1] if n_perfiles else ''
+                for mask in self.activos
+            ],
+            'permisos': permisos,
+        }
+
+
+def _menu_dict(row):
+    return {
+        'menu_id': row.id,
+        'menu_nombre': row.nombre,
+        'menu_abreviatura': row.abreviatura,
+        'menu_orden': row.orden,
+    }
+
+
+def build_matriz_permisos(coe_id, mesa_id, solo_activos):
+    perfiles_query = 'SELECT id, nombre, activo FROM perfiles'
+    if solo_activos:
+        perfiles_query += ' WHERE activo = true'
+    perfiles_query += ' ORDER BY nombre'
+    perfiles = [
+        {'perfil_id': row.id, 'perfil_nombre': row.nombre, 'perfil_activo': row.activo}
+        for row in db.session.execute(db.text(perfiles_query))
+    ]
+
+    opciones = [
+        {
+            'opcion_id': row.id,
+            'opcion_nombre': row.nombre,
+            'opcion_abreviatura': row.abreviatura if row.abreviatura else row.nombre,
+        }
+        for row in db.session.execute(db.text(
+            'SELECT id, nombre, abreviatura FROM opciones WHERE activo = true ORDER BY id'
+        ))
+    ]
+
+    menus_rows = db.session.execute(db.text(
+        'SELECT id, padre_id, orden, nombre, abreviatura FROM menus '
+        'WHERE activo = true ORDER BY padre_id, orden, nombre'
+    )).fetchall()
+
+    menu_by_id = {row.id: row for row in menus_rows}
+    hijos = [row for row in menus_rows if row.orden != 0]
+    hijos_by_padre = {}
+    for row in hijos:
+        hijos_by_padre.setdefault(row.padre_id, []).append(row)
+    for children in hijos_by_padre.values():
+        children.sort(key=lambda x: (x.orden, x.nombre))
+
+    grupos = []
+    menus = []
+    included_menu_ids = set()
+    cabeceras = sorted((row for row in menus_rows if row.orden == 0), key=lambda x: (x.nombre, x.id))
+    for grupo in cabeceras:
+        children = hijos_by_padre.get(grupo.id, [])
+        if not children:
+            continue
+        for menu_item in children:
+            included_menu_ids.add(menu_item.id)
+            menus.append((len(grupos), _menu_dict(menu_item)))
+        grupos.append({
+            'menu_grupo_id': grupo.id,
+            'menu_grupo_nombre': grupo.nombre,
+            'menu_grupo_abreviatura': grupo.abreviatura,
+            'menu_grupo_orden': grupo.orden,
+        })
+
+    # Menus sin grupo (padre_id sin cabecera orden 0 o padre_id=0)
+    sin_grupo = []
+    for menu_item in hijos:
+        if menu_item.id in included_menu_ids:
+            continue
+        padre = menu_by_id.get(menu_item.padre_id)
+        if padre is not None and padre.orden == 0:
+            continue
+        sin_grupo.append(_menu_dict(menu_item))
+    if sin_grupo:
+        sin_grupo.sort(key=lambda x: (x['menu_orden'], x['menu_nombre']))
+        menus.extend((len(grupos), menu) for menu in sin_grupo)
+        grupos.append({
+            'menu_grupo_id': 0,
+            'menu_grupo_nombre': 'SIN GRUPO',
+            'menu_grupo_abreviatura': 'SG',
+            'menu_grupo_orden': 9999,
+        })
+
+    n_perfiles = len(perfiles)
+    n_opciones = len(opciones)
+    perfil_index = {perfil['perfil_id']: p for p, perfil in enumerate(perfiles)}
+    opcion_index = {opcion['opcion_id']: o for o, opcion in enumerate(opciones)}
+    menu_index = {menu['menu_id']: m for m, (_grupo, menu) in enumerate(menus)}
+    activos = [0] * (len(menus) * n_opciones)
+    permiso_ids = array('q', bytes(8 * len(activos) * n_perfiles))
+
+    permisos_rows = db.session.execute(
+        db.text(
+            'SELECT id, perfil_id, menu_id, opcion_id, activo FROM perfil_coe_mesa_menu_opcion '
+            'WHERE coe_id = :coe_id AND mesa_id = :mesa_id'
+        ),
+        {'coe_id': coe_id, 'mesa_id': mesa_id},
+    )
+    for row in permisos_rows:
+        p = perfil_index.get(row.perfil_id)
+        m = menu_index.get(row.menu_id)
+        o = opcion_index.get(row.opcion_id)
+        if p is None or m is None or o is None:
+            continue
+        fila = m * n_opciones + o
+        permiso_ids[fila * n_perfiles + p] = row.id
+        if row.activo:
+            activos[fila] |= 1 << p
+
+    return MatrizPermisos(perfiles, opciones, grupos, menus, activos, permiso_ids)
+
+
+class AccesoPerfil:
+    """Menus visibles y opciones autorizadas de un (perfil, coe, mesa)."""
+
+    def __init__(self, menus, opciones_por_menu):
+        self.menus = menus
+        self.opciones_por_menu = opciones_por_menu
+        self._permitidas = {
+            menu_id: frozenset(
+                key for opcion in opciones for key in (opcion['id'], opcion['abreviatura']) if key is not None
+            )
+            for menu_id, opciones in opciones_por_menu.items()
+        }
+
+    def opciones(self, menu_id):
+        return self.opciones_por_menu.get(menu_id, [])
+
+    def permite(self, menu_id, opcion):
+        """``opcion`` es el id o la abreviatura de la opcion."""
+        return opcion in self._permitidas.get(menu_id, ())
+
+
+def build_acceso_perfil(perfil_id, coe_id, mesa_id):
+    params = {'perfil_id': perfil_id, 'coe_id': coe_id, 'mesa_id': mesa_id}
+
+    # mesa_id = 0 abarca todas las mesas del coe; las cabeceras (orden 0) se ven siempre
+    menus_rows = db.session.execute(db.text("""
+        SELECT DISTINCT m.id, m.padre_id, m.orden, m.nombre, m.ruta, m.icono
+        FROM menus m
+        LEFT JOIN perfil_coe_mesa_menu_opcion x ON m.id = x.menu_id
+        WHERE ((x.perfil_id = :perfil_id AND x.coe_id = :coe_id AND (x.mesa_id = :mesa_id OR :mesa_id = 0))
+           OR m.orden = 0) AND m.activo = true
+        ORDER BY m.padre_id, m.orden
+    """), params)
+    menus = [
+        {
+            'id': row.id,
+            'padre_id': row.padre_id,
+            'orden': row.orden,
+            'nombre': row.nombre,
+            'ruta': row.ruta,
+            'icono': row.icono,
+        }
+        for row in menus_rows
+    ]
+
+    opciones_rows = db.session.execute(db.text("""
+        SELECT DISTINCT x.menu_id, o.*
+        FROM opciones o
+        INNER JOIN perfil_coe_mesa_menu_opcion x ON o.id = x.opcion_id
+        WHERE x.perfil_id = :perfil_id
+          AND x.coe_id = :coe_id
+          AND x.mesa_id = :mesa_id
+          AND o.activo = true
+          AND x.activo = true
+        ORDER BY x.menu_id, o.id
+    """), params)
+    opciones_por_menu = {}
+    for row in opciones_rows:
+        opciones_por_menu.setdefault(row.menu_id, []).append({
+            'id': row.id,
+            'nombre': row.nombre,
+            'abreviatura': row.abreviatura,
+            'ruta': row.ruta,
+            'activo': row.activo,
+            'creador': row.creador,
+            'creacion': row.creacion.isoformat() if row.creacion else None,
+            'modificador': row.modificador,
+            'modificacion': row.modificacion.isoformat() if row.modificacion else None,
+        })
+
+    return AccesoPerfil(menus, opciones_por_menu)
+
+
+matrices = VersionedCache(PERMISOS_TABLES, build_matriz_permisos)
+accesos = VersionedCache(
+    ('menus', 'opciones', 'perfil_coe_mesa_menu_opcion'), build_acceso_perfil, ACCESOS_CACHE_MAX
+)
@@ -0,0 +1,155 @@
+"""
+Avisos de cambios en tiempo real desde PostgreSQL (LISTEN/NOTIFY).
+
+Los triggers de ``migrations/0004_notificaciones_listen_notify.sql`` publican
+en el canal ``simulacro_cambios`` un JSON por cambio en requerimientos,
+respuestas y registros de afectacion. Cada worker abre una sola conexion
+dedicada que escucha el canal (en un hilo daemon, al primer suscriptor) y
+reparte cada aviso a las colas de los suscriptores de esa emergencia.
+
+Si la cola de un suscriptor se llena, o la conexion se cae y se reabre, el
+suscriptor recibe ``resync``: pudo perder avisos y debe volver a consultar.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+import psycopg
+
+from models import db
+
+NOTIFY_CHANNEL = 'simulacro_cambios'
+NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', '100'))
+NOTIFY_RECONNECT_SECONDS = float(os.getenv('NOTIFY_RECONNECT_SECONDS', '5'))
+
+RESYNC = {'tabla': None, 'op': 'RESYNC'}
+
+
+class Subscription:
+    def __init__(self, emergencia_id, usuario_id, maxsize=NOTIFY_QUEUE_SIZE):
+        self.emergencia_id = emergencia_id
+        self.usuario_id = usuario_id
+        self.queue = queue.Queue(maxsize)
+        self.overflow = False
+
+    def matches(self, event):
+        return event.get('emergencia_id') == self.emergencia_id
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.overflow = True
+            return False
+
+    def get(self, timeout):
+        """Siguiente aviso, ``RESYNC`` si se perdieron avisos, o None al vencer ``timeout``."""
+        if self.overflow:
+            self.overflow = False
+            self._drain()
+            return RESYNC
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class NotificationHub:
+    """Una conexion LISTEN por proceso, repartida entre suscriptores."""
+
+    def __init__(self, channel=NOTIFY_CHANNEL):
+        self.channel = channel
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+        self.connected = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def subscribe(self, app, emergencia_id, usuario_id):
+        subscription = Subscription(emergencia_id, usuario_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._thread is None:
+                self._app = app
+                self._thread = threading.Thread(target=self._listen_forever, name='pg-notify', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        with self._lock:
+            self.received += 1
+            subscriptions = [s for s in self._subscriptions if s.matches(event)]
+        for subscription in subscriptions:
+            if subscription.offer(event):
+                self.delivered += 1
+            else:
+                self.dropped += 1
+
+    def _resync_all(self):
+        with self._lock:
+            for subscription in self._subscriptions:
+                subscription.overflow = True
+
+    def _listen_forever(self):
+        try:
+            while True:
+                try:
+                    with self._app.app_context():
+                        # URL libpq, sin el "+psycopg" de SQLAlchemy
+                        conninfo = db.engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+                    with psycopg.connect(conninfo, autocommit=True) as conn:
+                        conn.execute(f'LISTEN {self.channel}')
+                        if self.reconnects:
+                            self._resync_all()
+                        self.connected = True
+                        for notify in conn.notifies():
+                            self.dispatch(notify.payload)
+                except Exception:
+                    self._app.logger.exception('Se perdio la conexion LISTEN %s', self.channel)
+                self.connected = False
+                self.reconnects += 1
+                self._resync_all()
+                time.sleep(NOTIFY_RECONNECT_SECONDS)
+        finally:
+            # Si el hilo muere igual, la proxima suscripcion arranca otro
+            self.connected = False
+            with self._lock:
+                self._thread = None
+
+    def status(self):
+        with self._lock:
+            subscriptions = len(self._subscriptions)
+        return {
+            'canal': self.channel,
+            'conectado': self.connected,
+            'suscriptores': subscriptions,
+            'recibidos': self.received,
+            'entregados': self.delivered,
+            'descartados': self.dropped,
+            'reconexiones': self.reconnects,
+        }
+
+
+hub = NotificationHub()
@@ -0,0 +1,181 @@
+"""
+Registro de rutas publicas (sin JWT) para el hook global de app.py.
+
+Las vistas se marcan con ``@public_route`` en su blueprint; las rutas que no son
+vistas propias (Swagger, prefijos completos) se registran con
+``register_public_path`` / ``register_public_prefix``. Al arrancar, todo se
+compila en un trie por segmentos de path, asi que decidir si un request es
+publico cuesta lo mismo sin importar cuantas rutas publicas haya.
+"""
+import re
+
+from werkzeug.exceptions import HTTPException, NotFound
+
+PUBLIC_ROUTE_ATTR = '_public_route'
+
+_CONVERTER_SEGMENT = re.compile(r'^<(?:(\w+)(?:\([^)]*\))?:)?\w+>$')
+# Raices de la API: si aparecen a mitad de una entrada casi seguro es una coma faltante
+_ROOTS = ('/api/', '/apidocs', '/apispec', '/flasgger_static')
+
+_public_paths = {}   # path -> metodos (None = todos)
+_public_prefixes = set()
+
+
+def public_route(fn):
+    """Marca una vista como publica; va debajo de ``@bp.route(...)``."""
+    setattr(fn, PUBLIC_ROUTE_ATTR, True)
+    return fn
+
+
+def register_public_path(path, methods=None):
+    _public_paths[path] = None if methods is None else frozenset(m.upper() for m in methods)
+
+
+def register_public_prefix(prefix):
+    _public_prefixes.add(prefix)
+
+
+def validate_public_pattern(pattern):
+    """Devuelve la lista de problemas de una entrada (vacia si esta bien)."""
+    if not isinstance(pattern, str):
+        return [f'{pattern!r}: no es un string']
+    problems = []
+    if not pattern.startswith('/'):
+        problems.append(f'{pattern!r}: debe empezar con "/"')
+    if any(ch.isspace() for ch in pattern):
+        problems.append(f'{pattern!r}: contiene espacios')
+    if '//' in pattern:
+        problems.append(f'{pattern!r}: contiene "//"')
+    for root in _ROOTS:
+        if pattern.find(root, 1) > 0:
+            problems.append(f'{pattern!r}: contiene {root!r} a mitad del path (¿falta una coma?)')
+            break
+    return problems
+
+
+class _Node:
+    __slots__ = ('children', 'wildcard', 'methods', 'terminal', 'prefix')
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        self.methods = None
+        self.terminal = False
+        self.prefix = False
+
+
+def _segments(path):
+    path = path.strip('/')
+    return path.split('/') if path else []
+
+
+class PublicRouteMatcher:
+    """Trie de segmentos: literales, ``<conversor>`` (un segmento) y prefijos."""
+
+    def __init__(self):
+        self._root = _Node()
+        self.patterns = []
+
+    def add(self, pattern, methods=None, prefix=False):
+        node = self._root
+        for segment in _segments(pattern):
+            match = _CONVERTER_SEGMENT.match(segment)
+            if match and match.group(1) == 'path':
+                # <path:...> abarca el resto del path
+                prefix = True
+                break
+            if match:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            elif '<' in segment:
+                raise ValueError(f'{pattern!r}: segmento con conversor parcial, registrar paths exactos')
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        if prefix:
+            node.prefix = True
+        else:
+            # Dos vistas en el mismo path (GET y POST separados) suman metodos
+            if not node.terminal:
+                node.methods = methods
+            elif node.methods is not None:
+                node.methods = None if methods is None else node.methods | methods
+            node.terminal = True
+        self.patterns.append(pattern)
+
+    @staticmethod
+    def _allows(node, method):
+        return node.methods is None or method in node.methods
+
+    def matches(self, path, method='GET'):
+        segments = _segments(path)
+        stack = [(self._root, 0)]
+        while stack:
+            node, index = stack.pop()
+            if node.prefix:
+                return True
+            if index == len(segments):
+                if node.terminal and self._allows(node, method):
+                    return True
+                continue
+            if node.wildcard is not None:
+                stack.append((node.wildcard, index + 1))
+            child = node.children.get(segments[index])
+            if child is not None:
+                stack.append((child, index + 1))
+        return False
+
+
+def _has_view(adapter, path):
+    try:
+        adapter.match(path)
+    except NotFound:
+        return False
+    except HTTPException:
+        # MethodNotAllowed / redirect por barra final: la ruta existe
+        return True
+    return True
+
+
+def compile_public_routes(app):
+    """Arma el matcher con las vistas marcadas y lo registrado a mano.
+
+    Lanza ValueError si alguna entrada esta mal formada y deja un warning por
+    cada path registrado a mano que no corresponde a ninguna ruta de la app.
+    """
+    matcher = PublicRouteMatcher()
+    problems = []
+    rules = list(app.url_map.iter_rules())
+
+    for rule in rules:
+        view = app.view_functions.get(rule.endpoint)
+        if view is None or not getattr(view, PUBLIC_ROUTE_ATTR, False):
+            continue
+        problems.extend(validate_public_pattern(rule.rule))
+        try:
+            matcher.add(rule.rule, methods=frozenset(rule.methods or ()))
+        except ValueError as exc:
+            problems.append(str(exc))
+
+    for prefix in sorted(_public_prefixes):
+        problems.extend(validate_public_pattern(prefix))
+        matcher.add(prefix, prefix=True)
+
+    adapter = app.url_map.bind('localhost')
+    for path, methods in sorted(_public_paths.items()):
+        entry_problems = validate_public_pattern(path)
+        problems.extend(entry_problems)
+        if entry_problems:
+            continue
+        try:
+            matcher.add(path, methods=methods)
+        except ValueError as exc:
+            problems.append(str(exc))
+            continue
+        if not _has_view(adapter, path):
+            app.logger.warning('Ruta publica registrada sin vista asociada: %s', path)
+
+    if problems:
+        raise ValueError('Rutas publicas mal formadas:\n  ' + '\n  '.join(problems))
+    return matcher
@@ -71,9 +71,9 @@ def get_recursos_inventario_by_recurso_grupo_by_coe_by_mesa_by_provincia_by_cant
             rt.retorna AS recurso_retorna,
             COALESCE(ri.existencias, 0) AS existencias,
             0 AS movilizado,
-            COALESCE(MAX(au.comprometido), 0) AS comprometido,
-            COALESCE(MAX(au.comprometido_en_uso), 0) AS total_asignado_en_uso,
-            COALESCE(ri.existencias, 0) - COALESCE(MAX(au.comprometido_en_uso), 0) AS disponible
+            COALESCE(MAX(d.comprometido), 0) AS comprometido,
+            COALESCE(MAX(d.asignado_en_uso), 0) AS total_asignado_en_uso,
+            COALESCE(ri.existencias, 0) - COALESCE(MAX(d.asignado_en_uso), 0) AS disponible
         FROM public.instituciones_coe_mesa icm
         INNER JOIN public.instituciones i
             ON icm.institucion_id = i.id
@@ -86,16 +86,8 @@ def get_recursos_inventario_by_recurso_grupo_by_coe_by_mesa_by_provincia_by_cant
            AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
            AND (ri.canton_id = :canton_id OR :canton_id = 0)
            AND COALESCE(ri.activo, true) = true
-        LEFT JOIN (
-            SELECT
-                rresp.recurso_inventario_id,
-                COALESCE(SUM(COALESCE(rresp.cantidad_asignada, 0)), 0) AS comprometido,
-                COALESCE(SUM(COALESCE(rresp.cantidad_asignada, 0) * COALESCE(rresp.factor, 1)), 0) AS comprometido_en_uso
-            FROM public.requerimiento_respuestas rresp
-            WHERE COALESCE(rresp.activo, true) = true
-            GROUP BY rresp.recurso_inventario_id
-        ) au
-            ON au.recurso_inventario_id = ri.id
+        LEFT JOIN public.recursos_inventario_disponibilidad d
+            ON d.recurso_inventario_id = ri.id
         WHERE icm.coe_id = :coe_id
           AND icm.mesa_id = :mesa_id
           AND rt.recurso_grupo_id = :recurso_grupo_id
@@ -162,50 +154,19 @@ def get_recurso_inventario_disponible(recurso_inventario_id):
       404:
         description: Recurso inventario no encontrado
     """
+    # Totales mantenidos por triggers (migracion 0007)
     query = db.text("""
         SELECT
             ri.id AS recurso_inventario_id,
             COALESCE(ri.existencias, 0) AS existencias,
-            COALESCE(rm.total_asignado_factor, 0) AS total_asignado_factor,
-            COALESCE(rr.total_asignado_en_uso, 0) AS total_asignado_en_uso,
+            COALESCE(d.movilizado, 0) AS total_asignado_factor,
+            COALESCE(d.asignado_en_uso, 0) AS total_asignado_en_uso,
             COALESCE(ri.existencias, 0)
-              - COALESCE(rm.total_asignado_factor, 0)
-              - COALESCE(rr.total_asignado_en_uso, 0) AS disponible
+              - COALESCE(d.movilizado, 0)
+              - COALESCE(d.asignado_en_uso, 0) AS disponible
         FROM public.recursos_inventario ri
-        LEFT JOIN (
-            SELECT
-                m.recurso_inventario_id,
-                COALESCE(
-                    SUM(
-                        COALESCE(m.cantidad_asignada, 0) * CASE
-                            WHEN LOWER(COALESCE(m.factor::text, '0')) IN ('1', '-1', 'true', 't')
-                                THEN 1
-                            ELSE 0
-                        END
-                    ),
-                    0
-                ) AS total_asignado_factor
-            FROM public.recursos_movilizados m
-            WHERE COALESCE(m.activo, true) = true
-            GROUP BY m.recurso_inventario_id
-        ) rm ON rm.recurso_inventario_id = ri.id
-        LEFT JOIN (
-            SELECT
-                r.recurso_inventario_id,
-                COALESCE(
-                    SUM(
-                        COALESCE(r.cantidad_asignada, 0) * CASE
-                            WHEN LOWER(COALESCE(r.factor::text, '1')) IN ('1', 'true', 't')
-                                THEN 1
-                            ELSE 0
-                        END
-                    ),
-                    0
-                ) AS total_asignado_en_uso
-            FROM public.requerimiento_respuestas r
-            WHERE COALESCE(r.activo, true) = true
-            GROUP BY r.recurso_inventario_id
-        ) rr ON rr.recurso_inventario_id = ri.id
+        LEFT JOIN public.recursos_inventario_disponibilidad d
+            ON d.recurso_inventario_id = ri.id
         WHERE ri.id = :recurso_inventario_id
           AND COALESCE(ri.activo, true) = true
     """)
@@ -222,6 +183,139 @@ def get_recurso_inventario_disponible(recurso_inventario_id):
         'disponible': row.disponible
     })
 
+# Mesas que pueden atender un requerimiento de la mesa del usuario (las demas
+# del mismo COE y las del COE superior del mismo grupo) con existencias y
+# asignaciones en uso (recursos_inventario_disponibilidad) por tipo de recurso.
+# Con :excluir_rechazos se quitan las mesas que ya rechazaron ese tipo de
+# recurso al emisor en la emergencia y se exige disponibilidad > 0; sin el,
+# basta con existencias > 0.
+_DISPONIBILIDAD_POR_MESA_SQL = """
+    WITH mesas_destino AS (
+        SELECT
+            m.coe_id,
+            m.id AS mesa_id,
+            c.siglas || ' - ' || m.nombre AS mesa_nombre
+        FROM public.mesas mu
+        INNER JOIN public.mesas m
+                ON (
+                    (
+                        m.coe_id = :coe_id_usuario
+                        AND m.id <> :mesa_id_usuario
+                    )
+
+                    OR
+
+                    (
+                        :coe_id_usuario > 1
+                        AND m.coe_id = :coe_id_usuario - 1
+                        AND m.mesa_grupo_id = mu.mesa_grupo_id
+                    )
+                )
+        INNER JOIN public.coes c
+                ON c.id = m.coe_id
+        WHERE mu.id = :mesa_id_usuario
+          AND mu.coe_id = :coe_id_usuario
+          AND COALESCE(mu.activo, true) = true
+          AND COALESCE(m.activo, true) = true
+    ),
+    inventario AS (
+        SELECT
+            ri.coe_id,
+            ri.mesa_id,
+            ri.recurso_tipo_id,
+            COALESCE(SUM(ri.existencias), 0) AS existencias,
+            COALESCE(SUM(d.asignado_en_uso), 0) AS asignadas
+        FROM public.recursos_inventario ri
+        LEFT JOIN public.recursos_inventario_disponibilidad d
+               ON d.recurso_inventario_id = ri.id
+        WHERE ri.recurso_tipo_id = ANY(:recurso_tipo_ids)
+          AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
+          AND (ri.canton_id = :canton_id OR :canton_id = 0)
+          AND COALESCE(ri.activo, true) = true
+        GROUP BY
+            ri.coe_id,
+            ri.mesa_id,
+            ri.recurso_tipo_id
+    ),
+    rechazos AS (
+        SELECT DISTINCT
+            rr.recurso_tipo_id,
+            upcdm.coe_id,
+            upcdm.mesa_id
+        FROM public.requerimiento_recursos rr
+        INNER JOIN public.usuario_perfil_coe_dpa_mesa upcdm
+                ON upcdm.usuario_id = rr.usuario_receptor_id
+               AND COALESCE(upcdm.activo, true) = true
+        WHERE :excluir_rechazos
+          AND rr.usuario_emisor_id = :usuario_emisor_id
+          AND rr.requerimiento_estado_id = :requerimiento_estado_rechazado
+          AND rr.recurso_tipo_id = ANY(:recurso_tipo_ids)
+          AND rr.emergencia_id = :emergencia_id
+          AND COALESCE(rr.activo, true) = true
+    )
+    SELECT
+        i.recurso_tipo_id,
+        md.coe_id,
+        md.mesa_id,
+        md.mesa_nombre,
+        i.existencias,
+        i.asignadas,
+        i.existencias - i.asignadas AS disponibles
+    FROM inventario i
+    INNER JOIN mesas_destino md
+            ON md.coe_id = i.coe_id
+           AND md.mesa_id = i.mesa_id
+    WHERE CASE
+            WHEN :excluir_rechazos THEN i.existencias - i.asignadas > 0
+            ELSE i.existencias > 0
+          END
+      AND NOT EXISTS (
+            SELECT 1
+            FROM rechazos x
+            WHERE x.recurso_tipo_id = i.recurso_tipo_id
+              AND x.coe_id = md.coe_id
+              AND x.mesa_id = md.mesa_id
+          )
+    ORDER BY
+        i.recurso_tipo_id,
+        md.coe_id,
+        md.mesa_id
+"""
+
+RECURSO_TIPOS_LOTE_MAX = 100
+
+
+def _disponibilidad_por_mesa(coe_id, mesa_id, recurso_tipo_ids, provincia_id, canton_id, rechazos=None):
+    """``{recurso_tipo_id: [mesas]}`` en una sola consulta; cada tipo pedido aparece aunque no tenga mesas.
+
+    ``rechazos`` es ``(usuario_emisor_id, requerimiento_estado_rechazado,
+    emergencia_id)`` para excluir las mesas que ya rechazaron el recurso.
+    """
+    usuario_emisor_id, requerimiento_estado_rechazado, emergencia_id = rechazos or (None, None, None)
+    result = db.session.execute(db.text(_DISPONIBILIDAD_POR_MESA_SQL), {
+        'coe_id_usuario': coe_id,
+        'mesa_id_usuario': mesa_id,
+        'recurso_tipo_ids': sorted(set(recurso_tipo_ids)),
+        'provincia_id': provincia_id,
+        'canton_id': canton_id,
+        'excluir_rechazos': rechazos is not None,
+        'usuario_emisor_id': usuario_emisor_id,
+        'requerimiento_estado_rechazado': requerimiento_estado_rechazado,
+        'emergencia_id': emergencia_id
+    })
+
+    disponibilidad = {recurso_tipo_id: [] for recurso_tipo_id in recurso_tipo_ids}
+    for row in result:
+        disponibilidad[row.recurso_tipo_id].append({
+            'coe_id': row.coe_id,
+            'mesa_id': row.mesa_id,
+            'mesa_nombre': row.mesa_nombre,
+            'existencias': row.existencias,
+            'asignadas': row.asignadas,
+            'disponibles': row.disponibles
+        })
+    return disponibilidad
+
 @recursos_inventario_bp.route(
     '/api/recursos_inventario/coe/<int:coe_id>/mesa/<int:mesa_id>/recurso_tipo/<int:recurso_tipo_id>/provincia/<int:provincia_id>/canton/<int:canton_id>',
     methods=['GET']
@@ -288,107 +382,10 @@ def get_recursos_inventario_by_coe_by_mesa_by_recurso_tipo(
               disponibles: {type: integer}
     """
 
-    query = db.text("""
-        WITH inventario AS (
-            SELECT
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id,
-                COALESCE(SUM(ri.existencias), 0) AS existencias
-            FROM public.recursos_inventario ri
-            WHERE ri.recurso_tipo_id = :recurso_tipo_id
-              AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
-              AND (ri.canton_id = :canton_id OR :canton_id = 0)
-              AND COALESCE(ri.activo, true) = true
-            GROUP BY
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id
-        ),
-        asignaciones_no_devueltas AS (
-            SELECT
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id,
-                COALESCE(SUM(rr.cantidad_asignada), 0) AS asignadas
-            FROM public.requerimiento_respuestas rr
-            INNER JOIN public.recursos_inventario ri
-                    ON ri.id = rr.recurso_inventario_id
-            WHERE ri.recurso_tipo_id = :recurso_tipo_id
-              AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
-              AND (ri.canton_id = :canton_id OR :canton_id = 0)
-              AND COALESCE(ri.activo, true) = true
-              AND COALESCE(rr.activo, true) = true
-              AND COALESCE(rr.factor, 0) = 1
-            GROUP BY
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id
-        )
-        SELECT
-            m.coe_id,
-            m.id AS mesa_id,
-            c.siglas || ' - ' || m.nombre AS mesa_nombre,
-            COALESCE(i.existencias, 0) AS existencias,
-            COALESCE(a.asignadas, 0) AS asignadas,
-            COALESCE(i.existencias, 0) - COALESCE(a.asignadas, 0) AS disponibles
-        FROM public.mesas mu
-        INNER JOIN public.mesas m
-                ON (
-                    (
-                        m.coe_id = :coe_id_usuario
-                        AND m.id <> :mesa_id_usuario
-                    )
-
-                    OR
-
-                    (
-                        :coe_id_usuario > 1
-                        AND m.coe_id = :coe_id_usuario - 1
-                        AND m.mesa_grupo_id = mu.mesa_grupo_id
-                    )
-                )
-        INNER JOIN public.coes c 
-                ON c.id = m.coe_id
-        LEFT JOIN inventario i
-               ON i.coe_id = m.coe_id
-              AND i.mesa_id = m.id
-              AND i.recurso_tipo_id = :recurso_tipo_id
-        LEFT JOIN asignaciones_no_devueltas a
-               ON a.coe_id = m.coe_id
-              AND a.mesa_id = m.id
-              AND a.recurso_tipo_id = :recurso_tipo_id
-        WHERE mu.id = :mesa_id_usuario
-          AND mu.coe_id = :coe_id_usuario
-          AND COALESCE(mu.activo, true) = true
-          AND COALESCE(m.activo, true) = true
-          AND COALESCE(i.existencias, 0) > 0
-        ORDER BY
-            m.coe_id,
-            m.id;
-    """)
-
-    result = db.session.execute(query, {
-        'coe_id_usuario': coe_id,
-        'mesa_id_usuario': mesa_id,
-        'recurso_tipo_id': recurso_tipo_id,
-        'provincia_id': provincia_id,
-        'canton_id': canton_id
-    })
-
-    items = []
-
-    for row in result:
-        items.append({
-            'coe_id': row.coe_id,
-            'mesa_id': row.mesa_id,
-            'mesa_nombre': row.mesa_nombre,
-            'existencias': row.existencias,
-            'asignadas': row.asignadas,
-            'disponibles': row.disponibles
-        })
-
-    return jsonify(items)
+    disponibilidad = _disponibilidad_por_mesa(
+        coe_id, mesa_id, [recurso_tipo_id], provincia_id, canton_id
+    )
+    return jsonify(disponibilidad[recurso_tipo_id])
 
 @recursos_inventario_bp.route(
     '/api/recursos_inventario/mesas-restantes/coe/<int:coe_id>/mesa/<int:mesa_id>/recurso_tipo/<int:recurso_tipo_id>/provincia/<int:provincia_id>/canton/<int:canton_id>/usuario_emisor/<int:usuario_emisor_id>/requerimiento_estado_rechazado/<int:requerimiento_estado_rechazado>/emergencia/<int:emergencia_id>',
@@ -476,126 +473,99 @@ def get_recursos_inventario_mesas_restantes(
               asignadas: {type: integer}
               disponibles: {type: integer}
     """
-    query = db.text("""
-        WITH inventario AS (
-            SELECT
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id,
-                COALESCE(SUM(ri.existencias), 0) AS existencias
-            FROM public.recursos_inventario ri
-            WHERE ri.recurso_tipo_id = :recurso_tipo_id
-              AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
-              AND (ri.canton_id = :canton_id OR :canton_id = 0)
-              AND COALESCE(ri.activo, true) = true
-            GROUP BY
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id
-        ),
-        asignaciones AS (
-            SELECT
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id,
-                COALESCE(SUM(rr.cantidad_asignada), 0) AS asignadas
-            FROM public.requerimiento_respuestas rr
-            INNER JOIN public.recursos_inventario ri
-                    ON ri.id = rr.recurso_inventario_id
-            WHERE ri.recurso_tipo_id = :recurso_tipo_id
-              AND (ri.provincia_id = :provincia_id OR :provincia_id = 0)
-              AND (ri.canton_id = :canton_id OR :canton_id = 0)
-              AND COALESCE(ri.activo, true) = true
-              AND COALESCE(rr.activo, true) = true
-              AND COALESCE(rr.factor, 0) = 1
-            GROUP BY
-                ri.coe_id,
-                ri.mesa_id,
-                ri.recurso_tipo_id
-        )
-        SELECT
-            m.coe_id,
-            m.id AS mesa_id,
-            c.siglas || ' - ' || m.nombre AS mesa_nombre,
-            COALESCE(i.existencias, 0) AS existencias,
-            COALESCE(a.asignadas, 0) AS asignadas,
-            COALESCE(i.existencias, 0) - COALESCE(a.asignadas, 0) AS disponibles
-        FROM public.mesas mu
-        INNER JOIN public.mesas m
-                ON (
-                    (
-                        m.coe_id = :coe_id_usuario
-                        AND m.id <> :mesa_id_usuario
-                    )
-
-                    OR
-
-                    (
-                        :coe_id_usuario > 1
-                        AND m.coe_id = :coe_id_usuario - 1
-                        AND m.mesa_grupo_id = mu.mesa_grupo_id
-                    )
-                )
-        INNER JOIN public.coes c
-                ON c.id = m.coe_id
-        LEFT JOIN inventario i
-               ON i.coe_id = m.coe_id
-              AND i.mesa_id = m.id
-              AND i.recurso_tipo_id = :recurso_tipo_id
-        LEFT JOIN asignaciones a
-               ON a.coe_id = m.coe_id
-              AND a.mesa_id = m.id
-              AND a.recurso_tipo_id = :recurso_tipo_id
-        WHERE mu.id = :mesa_id_usuario
-          AND mu.coe_id = :coe_id_usuario
-          AND COALESCE(mu.activo, true) = true
-          AND COALESCE(m.activo, true) = true
-
-          -- Excluir mesas que ya rechazaron este requerimiento/recurso
-          AND NOT EXISTS (
-                SELECT 1
-                FROM public.requerimiento_recursos rr
-                INNER JOIN public.usuario_perfil_coe_dpa_mesa upcdm
-                        ON upcdm.usuario_id = rr.usuario_receptor_id
-                       AND upcdm.mesa_id = m.id
-                       AND upcdm.coe_id = m.coe_id
-                       AND COALESCE(upcdm.activo, true) = true
-                WHERE rr.usuario_emisor_id = :usuario_emisor_id
-                  AND rr.requerimiento_estado_id = :requerimiento_estado_rechazado
-                  AND rr.recurso_tipo_id = :recurso_tipo_id
-                  AND rr.emergencia_id = :emergencia_id
-                  AND COALESCE(rr.activo, true) = true
-              )
-          AND (
-                COALESCE(i.existencias, 0)
-                - COALESCE(a.asignadas, 0)
-              ) > 0
-        ORDER BY
-            m.coe_id,
-            m.id
-    """)
-    result = db.session.execute(query, {
-        'coe_id_usuario': coe_id,
-        'mesa_id_usuario': mesa_id,
-        'recurso_tipo_id': recurso_tipo_id,
-        'provincia_id': provincia_id,
-        'canton_id': canton_id,
-        'usuario_emisor_id': usuario_emisor_id,
-        'requerimiento_estado_rechazado': requerimiento_estado_rechazado,
-        'emergencia_id': emergencia_id
-    })
+    disponibilidad = _disponibilidad_por_mesa(
+        coe_id, mesa_id, [recurso_tipo_id], provincia_id, canton_id,
+        rechazos=(usuario_emisor_id, requerimiento_estado_rechazado, emergencia_id)
+    )
+    return jsonify(disponibilidad[recurso_tipo_id])
 
-    items = []
-    for row in result:
-        items.append({
-            'coe_id': row.coe_id,
-            'mesa_id': row.mesa_id,
-            'mesa_nombre': row.mesa_nombre,
-            'existencias': row.existencias,
-            'asignadas': row.asignadas,
-            'disponibles': row.disponibles
-        })
-    return jsonify(items)
+@recursos_inventario_bp.route(
+    '/api/recursos_inventario/disponibilidad/coe/<int:coe_id>/mesa/<int:mesa_id>/provincia/<int:provincia_id>/canton/<int:canton_id>',
+    methods=['GET']
+)
+def get_recursos_inventario_disponibilidad_por_recurso_tipos(coe_id, mesa_id, provincia_id, canton_id):
+    """Obtener disponibilidad por mesa de varios tipos de recurso
+    ---
+    tags:
+      - Recursos Inventario
+    summary: Consultar disponibilidad de varios tipos de recurso en una sola llamada
+    description: |
+      Variante por lote de las consultas por mesa de un tipo de recurso: mismas
+      mesas, existencias, asignaciones y disponibilidad, para todos los
+      recurso_tipo_ids pedidos en una sola consulta.
+
+      Sin usuario_emisor_id, requerimiento_estado_rechazado y emergencia_id
+      responde como /coe/.../recurso_tipo/... (mesas con existencias mayores a
+      cero). Con los tres responde como /mesas-restantes/... (excluye las mesas
+      que ya rechazaron el recurso y exige disponibilidad mayor a cero).
+    parameters:
+      - name: coe_id
+        in: path
+        type: integer
+        required: true
+        description: ID del COE del usuario en sesion
+      - name: mesa_id
+        in: path
+        type: integer
+        required: true
+        description: ID de la mesa del usuario en sesion
+      - name: provincia_id
+        in: path
+        type: integer
+        required: true
+        description: ID de provincia para filtrar inventario, o 0 para no filtrar
+      - name: canton_id
+        in: path
+        type: integer
+        required: true
+        description: ID de canton para filtrar inventario, o 0 para no filtrar
+      - name: recurso_tipo_ids
+        in: query
+        type: string
+        required: true
+        description: IDs de tipo de recurso separados por coma (maximo 100)
+      - name: usuario_emisor_id
+        in: query
+        type: integer
+        required: false
+      - name: requerimiento_estado_rechazado
+        in: query
+        type: integer
+        required: false
+      - name: emergencia_id
+        in: query
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Objeto con una lista de mesas por cada recurso_tipo_id pedido
+      400:
+        description: Parametros invalidos
+    """
+    raw_ids = [value.strip() for value in request.args.get('recurso_tipo_ids', '').split(',') if value.strip()]
+    if not raw_ids:
+        return jsonify({'error': 'recurso_tipo_ids es requerido'}), 400
+    if not all(value.isdigit() for value in raw_ids):
+        return jsonify({'error': 'recurso_tipo_ids debe ser una lista de enteros separados por coma'}), 400
+    recurso_tipo_ids = list(dict.fromkeys(int(value) for value in raw_ids))
+    if len(recurso_tipo_ids) > RECURSO_TIPOS_LOTE_MAX:
+        return jsonify({'error': f'Se admiten hasta {RECURSO_TIPOS_LOTE_MAX} recurso_tipo_ids'}), 400
+
+    rechazos = tuple(
+        request.args.get(name, type=int)
+        for name in ('usuario_emisor_id', 'requerimiento_estado_rechazado', 'emergencia_id')
+    )
+    if all(value is None for value in rechazos):
+        rechazos = None
+    elif any(value is None for value in rechazos):
+        return jsonify({
+            'error': 'usuario_emisor_id, requerimiento_estado_rechazado y emergencia_id van juntos'
+        }), 400
+
+    disponibilidad = _disponibilidad_por_mesa(
+        coe_id, mesa_id, recurso_tipo_ids, provincia_id, canton_id, rechazos=rechazos
+    )
+    return jsonify({str(recurso_tipo_id): mesas for recurso_tipo_id, mesas in disponibilidad.items()})
 
 @recursos_inventario_bp.route('/api/recursos_inventario', methods=['POST'])
 def create_recurso_inventario():
@@ -1053,10 +1023,10 @@ def get_recursos_inventario_by_recurso_institucion(coe_id, mesa_id, recurso_tipo
               c.nombre AS canton,
               pr.nombre AS parroquia,
               COALESCE(ri.existencias, 0) AS existencias,
-              COALESCE(rm.total_asignado_factor, 0) AS total_asignado_factor,
+              COALESCE(rm.movilizado, 0) AS total_asignado_factor,
               COALESCE(rr.total_asignado_en_uso, 0) AS total_asignado_en_uso,
               COALESCE(ri.existencias, 0)
-                - COALESCE(rm.total_asignado_factor, 0)
+                - COALESCE(rm.movilizado, 0)
                 - COALESCE(rr.total_asignado_en_uso, 0) AS disponible
           FROM public.recursos_inventario ri
           LEFT JOIN public.provincias p 
@@ -1065,23 +1035,8 @@ def get_recursos_inventario_by_recurso_institucion(coe_id, mesa_id, recurso_tipo
               ON c.id = ri.canton_id
           LEFT JOIN public.parroquias pr 
               ON pr.id = ri.parroquia_id
-          LEFT JOIN (
-              SELECT
-                  m.recurso_inventario_id,
-                  COALESCE(
-                      SUM(
-                          COALESCE(m.cantidad_asignada, 0) * CASE
-                              WHEN LOWER(COALESCE(m.factor::text, '0')) IN ('1', '-1', 'true', 't')
-                                  THEN 1
-                              ELSE 0
-                          END
-                      ),
-                      0
-                  ) AS total_asignado_factor
-              FROM public.recursos_movilizados m
-              WHERE COALESCE(m.activo, true) = true
-              GROUP BY m.recurso_inventario_id
-          ) rm ON rm.recurso_inventario_id = ri.id
+          LEFT JOIN public.recursos_inventario_disponibilidad rm
+              ON rm.recurso_inventario_id = ri.id
           LEFT JOIN (
               SELECT
                   r.requerimiento_recurso_id,
@@ -1,6 +1,7 @@
 import os
 from flask import Blueprint, jsonify, request
 from models import db
+from utils.row_serializer import serialize_row, serialize_rows
 from config import PUBLIC_API_KEYS as CONFIG_PUBLIC_API_KEYS
 
 afectaciones_public_bp = Blueprint('afectaciones_public', __name__)
@@ -27,22 +28,7 @@ def get_afectaciones_version1():
         return jsonify({'error': msg}), 401
 
     result = db.session.execute(db.text("SELECT * FROM afectaciones_version1"))
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
     return jsonify(registros)
 
 
@@ -58,22 +44,7 @@ def get_localidad_eventos_by_emergencia(emergencia_id):
     query = db.text("SELECT * FROM vw_localidad_eventos WHERE emergencia_id = :emergencia_id")
     result = db.session.execute(query, {'emergencia_id': emergencia_id})
 
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
 
     return jsonify(registros)
 
@@ -155,22 +126,7 @@ def get_acciones_respuesta_by_emergencia(emergencia_id):
 
     result = db.session.execute(query, {'emergencia_id': emergencia_id})
 
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
 
     return jsonify(registros)
 
@@ -187,22 +143,7 @@ def get_alojamientos_by_emergencia(emergencia_id):
     query = db.text("SELECT * FROM vw_alojamientos WHERE emergencia_id = :emergencia_id")
     result = db.session.execute(query, {'emergencia_id': emergencia_id})
 
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
 
     return jsonify(registros)
 
@@ -219,22 +160,7 @@ def get__requerimietnos_by_emergencia(emergencia_id):
     query = db.text("SELECT * FROM vw_requerimientos WHERE emergencia_id = :emergencia_id")
     result = db.session.execute(query, {'emergencia_id': emergencia_id})
 
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
 
     return jsonify(registros)
 
@@ -250,20 +176,7 @@ def get_afectacion_version1_by_id(registro_id):
     row = result.fetchone()
     if not row:
         return jsonify({'error': 'Registro no encontrado'}), 404
-    try:
-        mapping = row._mapping
-    except Exception:
-        mapping = dict(row)
-    record = {}
-    for k, v in mapping.items():
-        if hasattr(v, 'isoformat'):
-            try:
-                record[k] = v.isoformat()
-            except Exception:
-                record[k] = v
-        else:
-            record[k] = v
-    return jsonify(record)
+    return jsonify(serialize_row(row))
 
 
 @afectaciones_public_bp.route('/api/public/afectacion_infraestructura/<int:emergencia_id>', methods=['GET'])
@@ -278,21 +191,6 @@ def get_afectacion_infraestructura_by_emergencia(emergencia_id):
     query = db.text("SELECT * FROM vw_afectacion_infraestructura WHERE emergencia_id = :emergencia_id")
     result = db.session.execute(query, {'emergencia_id': emergencia_id})
 
-    registros = []
-    for row in result:
-        try:
-            mapping = row._mapping
-        except Exception:
-            mapping = dict(row)
-        record = {}
-        for k, v in mapping.items():
-            if hasattr(v, 'isoformat'):
-                try:
-                    record[k] = v.isoformat()
-                except Exception:
-                    record[k] = v
-            else:
-                record[k] = v
-        registros.append(record)
+    registros = serialize_rows(result)
 
     return jsonify(registros)
@@ -0,0 +1,117 @@
+"""Refresco programado de las caches MySQL registradas en reportes.mysql_cache.
+
+Se puede correr dentro de la app (MYSQL_CACHE_SCHEDULER=1, idealmente en un
+solo worker) o como proceso aparte:
+
+    python -m reportes.cache_scheduler            # loop continuo
+    python -m reportes.cache_scheduler --once     # una pasada (cron)
+    python -m reportes.cache_scheduler --cache eventos_dashboard --mode full
+
+La decision de si una cache "toca" se toma contra json_cache_refresh_state
+en MySQL, asi que varios workers o un CLI en paralelo no duplican trabajo:
+el primero toma el GET_LOCK y el resto ve el refresh reciente.
+"""
+import argparse
+import threading
+
+from reportes.mysql_cache import (
+    CACHE_REGISTRY,
+    REFRESH_MODES,
+    is_refresh_due,
+    load_cache_state,
+    run_cache_refresh,
+)
+from reportes.mysql_pool import config_value
+
+MYSQL_CACHE_SCHEDULER = config_value("MYSQL_CACHE_SCHEDULER", 0)
+MYSQL_CACHE_SCHEDULER_POLL = config_value("MYSQL_CACHE_SCHEDULER_POLL", 60, float)
+
+
+def run_pending(app, names=None, mode="auto", force=False):
+    results = []
+    for name, cache in CACHE_REGISTRY.items():
+        if names and name not in names:
+            continue
+        if not force:
+            with app.app_context():
+                try:
+                    state = load_cache_state(cache)
+                except Exception:
+                    app.logger.exception("No se pudo leer el estado de cache %s", name)
+                    continue
+            if not is_refresh_due(cache, state):
+                continue
+        result = run_cache_refresh(app, cache, mode)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+class CacheScheduler:
+    def __init__(self, app, poll_interval=MYSQL_CACHE_SCHEDULER_POLL, names=None, mode="auto"):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.names = names
+        self.mode = mode
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                run_pending(self.app, self.names, self.mode)
+            except Exception:
+                self.app.logger.exception("Error en el scheduler de caches MySQL")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.run_forever,
+                name="mysql-cache-scheduler",
+                daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_cache_scheduler(app):
+    if not MYSQL_CACHE_SCHEDULER:
+        return None
+    return CacheScheduler(app).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresca las caches MySQL de reportes")
+    parser.add_argument("--once", action="store_true", help="una sola pasada y salir")
+    parser.add_argument("--cache", action="append", dest="names", help="nombre de cache (repetible)")
+    parser.add_argument("--mode", choices=REFRESH_MODES, default="auto")
+    parser.add_argument("--force", action="store_true", help="refrescar aunque no toque por intervalo")
+    parser.add_argument("--poll", type=float, default=MYSQL_CACHE_SCHEDULER_POLL)
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    if args.names:
+        unknown = [name for name in args.names if name not in CACHE_REGISTRY]
+        if unknown:
+            parser.error(f"caches no registradas: {', '.join(unknown)}")
+
+    if args.once or args.force:
+        results = run_pending(app, args.names, args.mode, force=args.force)
+        for result in results:
+            print(
+                f"{result['cache']}: {result['mode']} {result['rows']} filas "
+                f"(delta {result['row_delta']}) en {result['duration_ms']} ms"
+            )
+        return 0
+
+    CacheScheduler(app, args.poll, args.names, args.mode).run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
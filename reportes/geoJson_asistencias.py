@@ -1,82 +1,35 @@
-import csv
-import io
 import os
-from datetime import date, datetime
 
-from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask import Blueprint, jsonify, request
 
 import config as app_config
-from config import MYSQL_DB, MYSQL_HOST, MYSQL_PASS, MYSQL_PORT, MYSQL_USER
+from reportes.geojson import feature_collection_response, stream_feature_collection
+from reportes.mysql_cache import fetch_cache_page, register_cache
+from reportes.mysql_pool import config_value, mysql_connection, open_mysql_cursor
+from reportes.pagination import parse_pagination_args
 
 geoJson_asistencias_script_bp = Blueprint("get_geoJson_asistencias", __name__)
 
+GEOJSON_ASISTENCIAS_CACHE = register_cache(
+    "geojson_asistencias",
+    "RED-M-2026-GeoJSON-Asistencias",
+    "geojson_asistencias_json_cache",
+    schema="dmeva",
+    token_setting="geoJson_asistencias_TOKEN",
+    refresh_interval=config_value("GEOJSON_ASISTENCIAS_CACHE_INTERVAL", 900),
+)
 
-def _get_mysql_impl():
-    try:
-        import pymysql  # type: ignore
-        return ("pymysql", pymysql)
-    except Exception:
-        pass
-    try:
-        import mysql.connector  # type: ignore
-        return ("mysql-connector", mysql.connector)
-    except Exception as exc:  # pragma: no cover - runtime only
-        raise ImportError("No MySQL client library installed") from exc
-
-
-def _open_mysql_connection(mysql_impl):
-    impl_name, impl = mysql_impl
-    if impl_name == "pymysql":
-        return impl.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASS,
-            db=MYSQL_DB,
-            port=MYSQL_PORT,
-            charset="utf8mb4",
-            cursorclass=impl.cursors.SSCursor,
-        )
-    return impl.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASS,
-        database=MYSQL_DB,
-        port=MYSQL_PORT,
-    )
-
-
-def _open_mysql_cursor(conn, mysql_impl):
-    impl_name, _ = mysql_impl
-    if impl_name == "mysql-connector":
-        return conn.cursor(buffered=False)
-    return conn.cursor()
-
-
-def _format_value(value):
-    if value is None:
-        return ""
-    if isinstance(value, datetime):
-        return value.strftime("%Y-%m-%d %H:%M:%S")
-    if isinstance(value, date):
-        return value.strftime("%Y-%m-%d")
-    return value
-
-def _to_float(v):
-    if v is None:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    if isinstance(v, str):
-        s = v.strip()
-        if not s:
-            return None
-        s = s.replace(",", ".")
-        try:
-            return float(s)
-        except Exception:
-            return None
-    return None
 
+# Campos que el feed entrega como numero (vacio -> 0)
+ASISTENCIAS_NUMERIC_FIELDS = frozenset({
+    "Familias Beneficiadas", "KCA (15 días - 4 personas)", "KCAT", "KMCC AT", "KPRH (para 3 días)",
+    "Kit Colación Escolar", "Kit Escolar", "Kit Medicamentos", "Kit Purificadores\u00a0de\u00a0Agua", "Kit Volcán",
+    "Kit de Alojamiento o herramientas familiar", "Kit de Aseo Personal", "Kit de Bebé)",
+    "Kit de Cocina", "Kit de Dormir", "Kit de Limpieza (albergue)", "Kit de Limpieza)",
+    "Kit de Mujer Embarazada)", "Kit de Uniforme", "Kit de Vajilla", "Kit de Vestir",
+    "MES DE ENTREGA DE AH", "RA (24 horas)", "Total Bienes", "Personas Beneficiadas",
+    "Kit Purificadores de Agua", "Zona"
+})
 
 
 def _validate_token():
@@ -101,101 +54,31 @@ def get_geoJson_asistencias():
     if not ok:
         return jsonify({"error": msg}), 401
 
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 5000))
-    offset = (page - 1) * limit
-
-    mysql_impl = _get_mysql_impl()
-    conn = _open_mysql_connection(mysql_impl)
-    cur = _open_mysql_cursor(conn, mysql_impl)
+    # ?stream=1 entrega la coleccion completa sin paginar, leyendo por lotes
+    if request.args.get("stream") in ("1", "true"):
+        return stream_feature_collection(GEOJSON_ASISTENCIAS_CACHE, ASISTENCIAS_NUMERIC_FIELDS)
 
     try:
-        sql = "SELECT * FROM dmeva.`RED-M-2026-GeoJSON-Asistencias` LIMIT %s OFFSET %s"
-        cur.execute(sql, (limit, offset))
-
-        columns = [d[0] for d in cur.description]
-        rows = cur.fetchall()
-
-        # Validación mínima: existen las columnas
-        if "latitud" not in [c.lower() for c in columns] and "latitud" not in columns:
-            # por si viniera con otro case, abajo lo resolvemos con map
-            pass
-
-        # Mapa por índice (respeta el orden del SELECT *)
-        idx = {col: i for i, col in enumerate(columns)}
-
-        # Soporta case distinto (Latitud/LATITUD/etc.)
-        lat_col = next((c for c in columns if c.lower() == "latitud"), None)
-        lon_col = next((c for c in columns if c.lower() == "longitud"), None)
-
-        if not lat_col or not lon_col:
-            return jsonify({
-                "error": "No encuentro columnas 'latitud' y/o 'longitud' en el SELECT",
-                "columns": columns
-            }), 400
-
-        features = []
-        for r in rows:
-            # Convertir campos numéricos específicos a números
-            props = {}
-            numeric_fields = {
-                "Familias Beneficiadas", "KCA (15 días - 4 personas)", "KCAT", "KMCC AT", "KPRH (para 3 días)",
-                "Kit Colación Escolar", "Kit Escolar", "Kit Medicamentos", "Kit Purificadores\u00a0de\u00a0Agua", "Kit Volcán",
-                "Kit de Alojamiento o herramientas familiar", "Kit de Aseo Personal", "Kit de Bebé)",
-                "Kit de Cocina", "Kit de Dormir", "Kit de Limpieza (albergue)", "Kit de Limpieza)",
-                "Kit de Mujer Embarazada)", "Kit de Uniforme", "Kit de Vajilla", "Kit de Vestir",
-                "MES DE ENTREGA DE AH", "RA (24 horas)", "Total Bienes", "Personas Beneficiadas",
-                "Kit Purificadores de Agua", "Zona"
-            }
-            
-            for i, col in enumerate(columns):
-                val = r[i]
-                if col in numeric_fields:
-                    if val is None or val == "":
-                        props[col] = 0
-                    elif isinstance(val, (int, float)):
-                        props[col] = val
-                    else:
-                        try:
-                            props[col] = int(str(val).strip())
-                        except ValueError:
-                            try:
-                                props[col] = float(str(val).strip().replace(',', '.'))
-                            except ValueError:
-                                props[col] = _format_value(val)
-                else:
-                    props[col] = _format_value(val)
-
-            lat = _to_float(props.get(lat_col))
-            lon = _to_float(props.get(lon_col))
-
-            geometry = None
-            if lat is not None and lon is not None:
-                geometry = {"type": "Point", "coordinates": [lon, lat]}  # [longitud, latitud]
-
-            features.append({
-                "type": "Feature",
-                "geometry": geometry,   # null si faltan coords
-                "properties": props
-            })
-
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features,
-            "metadata": {
-                "page": page,
-                "limit": limit,
-                "count": len(features),
-                "lat_column": lat_col,
-                "lon_column": lon_col
-            }
-        }
-
-        resp = jsonify(geojson)
-        resp.mimetype = "application/geo+json"  # opcional pero recomendado
-        return resp
-
-    finally:
-        cur.close()
-        conn.close()
+        pagination = parse_pagination_args()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn, unbuffered=True)
+        try:
+            columns, rows, next_cursor, has_more = fetch_cache_page(
+                cur,
+                GEOJSON_ASISTENCIAS_CACHE,
+                pagination["limit"],
+                cursor=pagination["cursor"],
+                page=pagination["page"],
+            )
+        finally:
+            cur.close()
+
+    return feature_collection_response(columns, rows, ASISTENCIAS_NUMERIC_FIELDS, {
+        "page": pagination["page"],
+        "limit": pagination["limit"],
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    })
@@ -0,0 +1,154 @@
+"""Armado de FeatureCollections para los feeds geoJson_* de reportes.
+
+Las conversiones por columna se resuelven una sola vez a partir de las
+columnas del cursor y luego se aplican fila a fila, en vez de decidir en
+cada celda si el campo es numerico.
+"""
+from datetime import date, datetime
+
+from flask import Response, current_app, jsonify, stream_with_context
+
+from reportes.mysql_cache import iter_cache_rows
+
+GEOJSON_MIMETYPE = "application/geo+json"
+GEOJSON_STREAM_BATCH_SIZE = 1000
+
+
+def _format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def _to_float(v):
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        s = v.strip()
+        if not s:
+            return None
+        s = s.replace(",", ".")
+        try:
+            return float(s)
+        except Exception:
+            return None
+    return None
+
+
+def _to_number(val):
+    if val is None or val == "":
+        return 0
+    if isinstance(val, (int, float)):
+        return val
+    try:
+        return int(str(val).strip())
+    except ValueError:
+        try:
+            return float(str(val).strip().replace(",", "."))
+        except ValueError:
+            return _format_value(val)
+
+
+def find_lat_lon_columns(columns):
+    # Soporta case distinto (Latitud/LATITUD/etc.)
+    lat_col = next((c for c in columns if c.lower() == "latitud"), None)
+    lon_col = next((c for c in columns if c.lower() == "longitud"), None)
+    return lat_col, lon_col
+
+
+def _missing_coordinates_response(columns):
+    return jsonify({
+        "error": "No encuentro columnas 'latitud' y/o 'longitud' en el SELECT",
+        "columns": columns
+    }), 400
+
+
+def compile_feature_builder(columns, numeric_fields, lat_col, lon_col):
+    """Devuelve ``build(row) -> Feature`` con los conversores ya resueltos."""
+    converters = [_to_number if col in numeric_fields else _format_value for col in columns]
+    lat_index = columns.index(lat_col)
+    lon_index = columns.index(lon_col)
+
+    def build(row):
+        values = [convert(value) for convert, value in zip(converters, row)]
+        lat = _to_float(values[lat_index])
+        lon = _to_float(values[lon_index])
+
+        geometry = None
+        if lat is not None and lon is not None:
+            geometry = {"type": "Point", "coordinates": [lon, lat]}  # [longitud, latitud]
+
+        return {
+            "type": "Feature",
+            "geometry": geometry,   # null si faltan coords
+            "properties": dict(zip(columns, values))
+        }
+
+    return build
+
+
+def feature_collection_response(columns, rows, numeric_fields, metadata):
+    lat_col, lon_col = find_lat_lon_columns(columns)
+    if not lat_col or not lon_col:
+        return _missing_coordinates_response(columns)
+
+    build = compile_feature_builder(columns, numeric_fields, lat_col, lon_col)
+    features = [build(row) for row in rows]
+
+    resp = jsonify({
+        "type": "FeatureCollection",
+        "features": features,
+        "metadata": {
+            **metadata,
+            "count": len(features),
+            "lat_column": lat_col,
+            "lon_column": lon_col
+        }
+    })
+    resp.mimetype = GEOJSON_MIMETYPE
+    return resp
+
+
+def stream_feature_collection(cache, numeric_fields, batch_size=GEOJSON_STREAM_BATCH_SIZE):
+    """Emite la FeatureCollection completa de ``cache`` a medida que se lee.
+
+    El JSON se escribe por lotes desde un cursor sin buffer, asi que la
+    memoria del worker no crece con el tamano de la vista.
+    """
+    batches = iter_cache_rows(cache, batch_size)
+    # Arrancar el generador aqui toma la conexion y lee las columnas; desde
+    # este punto su finally garantiza devolverla al pool.
+    columns = next(batches)
+    lat_col, lon_col = find_lat_lon_columns(columns)
+    if not lat_col or not lon_col:
+        batches.close()
+        return _missing_coordinates_response(columns)
+
+    build = compile_feature_builder(columns, numeric_fields, lat_col, lon_col)
+    dumps = current_app.json.dumps
+
+    def generate():
+        count = 0
+        try:
+            yield '{"type":"FeatureCollection","features":['
+            for rows in batches:
+                chunk = ",".join(dumps(build(row)) for row in rows)
+                yield chunk if count == 0 else "," + chunk
+                count += len(rows)
+            metadata = {
+                "count": count,
+                "streamed": True,
+                "lat_column": lat_col,
+                "lon_column": lon_col
+            }
+            yield '],"metadata":' + dumps(metadata) + "}"
+        finally:
+            batches.close()
+
+    return Response(stream_with_context(generate()), mimetype=GEOJSON_MIMETYPE)
@@ -7,50 +7,20 @@ from datetime import date, datetime
 from flask import Blueprint, Response, jsonify, request, stream_with_context
 
 import config as app_config
-from config import MYSQL_DB, MYSQL_HOST, MYSQL_PASS, MYSQL_PORT, MYSQL_USER
+from reportes.mysql_cache import fetch_cache_page, register_cache
+from reportes.mysql_pool import config_value, mysql_connection, open_mysql_cursor
+from reportes.pagination import parse_pagination_args
 
 movilizaciones_aereas_bp = Blueprint("movilizaciones_aereas_json", __name__)
 
-
-def _get_mysql_impl():
-    try:
-        import pymysql  # type: ignore
-        return ("pymysql", pymysql)
-    except Exception:
-        pass
-    try:
-        import mysql.connector  # type: ignore
-        return ("mysql-connector", mysql.connector)
-    except Exception as exc:  # pragma: no cover - runtime only
-        raise ImportError("No MySQL client library installed") from exc
-
-
-def _open_mysql_connection(mysql_impl):
-    impl_name, impl = mysql_impl
-    if impl_name == "pymysql":
-        return impl.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASS,
-            db=MYSQL_DB,
-            port=MYSQL_PORT,
-            charset="utf8mb4",
-            cursorclass=impl.cursors.SSCursor,
-        )
-    return impl.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASS,
-        database=MYSQL_DB,
-        port=MYSQL_PORT,
-    )
-
-
-def _open_mysql_cursor(conn, mysql_impl):
-    impl_name, _ = mysql_impl
-    if impl_name == "mysql-connector":
-        return conn.cursor(buffered=False)
-    return conn.cursor()
+MOVILIZACIONES_AEREAS_CACHE = register_cache(
+    "movilizaciones_aereas",
+    "5. RED-M Movilizaciones Aereas 2022+",
+    "movilizaciones_aereas_json_cache",
+    schema="dmeva",
+    token_setting="movilizaciones_aereas_TOKEN",
+    refresh_interval=config_value("MOVILIZACIONES_AEREAS_CACHE_INTERVAL", 900),
+)
 
 
 def _format_value(value):
@@ -99,38 +69,40 @@ def movilizaciones_aereas_json():
     if not ok:
         return jsonify({"error": msg}), 401
 
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 5000))
-    offset = (page - 1) * limit
-
-    mysql_impl = _get_mysql_impl()
-    conn = _open_mysql_connection(mysql_impl)
-    cur = _open_mysql_cursor(conn, mysql_impl)
-
     try:
-        # Mantener el orden natural del SELECT * (no inventar orden alfabético)
-        sql = "SELECT * FROM dmeva.`5. RED-M Movilizaciones Aereas 2022+` LIMIT %s OFFSET %s"
-        cur.execute(sql, (limit, offset))
-
-        columns = [d[0] for d in cur.description]  # <-- ESTE orden es el que manda
-        rows = cur.fetchall()
-
-        # rows como arrays en el mismo orden que columns
-        data_rows = [
-            [_format_value(v) for v in r]
-            for r in rows
-        ]
-
-        return jsonify({
-            "page": page,
-            "limit": limit,
-            "count": len(data_rows),
-            "columns": columns,
-            "rows": data_rows
-        })
-    finally:
-        cur.close()
-        conn.close()
+        pagination = parse_pagination_args()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn, unbuffered=True)
+        try:
+            # Mantener el orden natural del SELECT * (no inventar orden alfabético)
+            columns, rows, next_cursor, has_more = fetch_cache_page(
+                cur,
+                MOVILIZACIONES_AEREAS_CACHE,
+                pagination["limit"],
+                cursor=pagination["cursor"],
+                page=pagination["page"],
+            )
+
+            # rows como arrays en el mismo orden que columns
+            data_rows = [
+                [_format_value(v) for v in r]
+                for r in rows
+            ]
+
+            return jsonify({
+                "page": pagination["page"],
+                "limit": pagination["limit"],
+                "count": len(data_rows),
+                "columns": columns,
+                "rows": data_rows,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            })
+        finally:
+            cur.close()
 
 @movilizaciones_aereas_bp.route("/api/public/movilizaciones_aereas_looker_json", methods=["GET"])
 def movilizaciones_aereas_looker_json():
@@ -138,31 +110,35 @@ def movilizaciones_aereas_looker_json():
     if not ok:
         return jsonify({"error": msg}), 401
 
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 5000))
-    offset = (page - 1) * limit
-
-    mysql_impl = _get_mysql_impl()
-    conn = _open_mysql_connection(mysql_impl)
-    cur = _open_mysql_cursor(conn, mysql_impl)
-
     try:
-        sql = "SELECT * FROM dmeva.`5. RED-M Movilizaciones Aereas 2022+` LIMIT %s OFFSET %s"
-        cur.execute(sql, (limit, offset))
-
-        raw_columns = [d[0] for d in cur.description]
-        clean_columns = [_sanitize_key(col) for col in raw_columns]
-
-        rows = cur.fetchall()
-
-        data = []
-        for row in rows:
-            item = {}
-            for i, value in enumerate(row):
-                item[clean_columns[i]] = _format_value(value)
-            data.append(item)
-
-        return jsonify(data)
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+        pagination = parse_pagination_args()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn, unbuffered=True)
+        try:
+            raw_columns, rows, next_cursor, has_more = fetch_cache_page(
+                cur,
+                MOVILIZACIONES_AEREAS_CACHE,
+                pagination["limit"],
+                cursor=pagination["cursor"],
+                page=pagination["page"],
+            )
+            clean_columns = [_sanitize_key(col) for col in raw_columns]
+
+            data = []
+            for row in rows:
+                item = {}
+                for i, value in enumerate(row):
+                    item[clean_columns[i]] = _format_value(value)
+                data.append(item)
+
+            # Looker espera un arreglo plano: la paginacion viaja en headers
+            resp = jsonify(data)
+            resp.headers["X-Has-More"] = "true" if has_more else "false"
+            if next_cursor:
+                resp.headers["X-Next-Cursor"] = next_cursor
+            return resp
+        finally:
+            cur.close()
@@ -0,0 +1,727 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, jsonify, request
+
+import config as app_config
+from reportes.mysql_pool import config_value, mysql_connection, open_mysql_cursor
+from reportes.pagination import CACHE_ID_COLUMN, OFFSET_CURSOR, InvalidCursor, fetch_keyset_page
+
+mysql_cache_bp = Blueprint("mysql_cache", __name__)
+
+STATE_TABLE = "json_cache_refresh_state"
+# Cada cuanto forzar un rebuild completo en modo auto: el incremental no
+# detecta filas borradas en la vista origen.
+DEFAULT_FULL_REFRESH_INTERVAL = 86400
+# Sin max_age explicito, una cache sin refresco exitoso en este multiplo de
+# refresh_interval se considera vencida y los feeds leen la vista.
+DEFAULT_MAX_AGE_FACTOR = 3
+# El incremental relee las filas con modified_column hasta estos segundos
+# antes de la marca: cubre filas que se confirman despues del refresh con un
+# modified ya alcanzado por la marca (transacciones largas, mismo segundo).
+DEFAULT_WATERMARK_OVERLAP = config_value("MYSQL_CACHE_WATERMARK_OVERLAP", 300)
+
+REFRESH_MODES = ("auto", "full", "incremental")
+
+
+class CacheRefreshInProgress(Exception):
+    pass
+
+
+def _quote_identifier(identifier):
+    return f"`{identifier.replace('`', '``')}`"
+
+
+def is_missing_table_error(exc):
+    error_code = getattr(exc, "errno", None)
+    if error_code == 1146:
+        return True
+    args = getattr(exc, "args", ())
+    return bool(args and args[0] == 1146)
+
+
+def _close_quietly(resource):
+    try:
+        if resource is not None:
+            resource.close()
+    except Exception:
+        pass
+
+
+class MaterializedCache:
+    """Declaracion de una vista MySQL que se materializa en una tabla.
+
+    La tabla cache se reconstruye con ``CREATE TABLE ... AS SELECT`` en una
+    tabla ``_new`` y se publica con un ``RENAME TABLE`` atomico, protegido
+    por ``GET_LOCK(lock_name)`` para que dos workers no refresquen a la vez.
+    """
+
+    def __init__(self, name, source_view, cache_table, schema=None, lock_name=None,
+                 token_setting=None, refresh_interval=None, indexes=(),
+                 key_column=None, modified_column=None,
+                 full_refresh_interval=DEFAULT_FULL_REFRESH_INTERVAL, max_age=None,
+                 watermark_overlap=DEFAULT_WATERMARK_OVERLAP):
+        self.name = name
+        self.source_view = source_view
+        self.schema = schema
+        self.cache_table = cache_table
+        self.lock_name = lock_name or f"{cache_table}_refresh"
+        self.token_setting = token_setting
+        self.refresh_interval = refresh_interval
+        self.key_column = key_column
+        self.modified_column = modified_column
+        self.full_refresh_interval = full_refresh_interval
+        self.watermark_overlap = watermark_overlap
+        if max_age is None and refresh_interval:
+            max_age = refresh_interval * DEFAULT_MAX_AGE_FACTOR
+        self.max_age = max_age
+
+        indexes = [tuple(columns) for columns in indexes]
+        for column in (key_column, modified_column):
+            if column and (column,) not in indexes:
+                indexes.append((column,))
+        self.indexes = tuple(indexes)
+
+    @property
+    def supports_incremental(self):
+        return bool(self.key_column and self.modified_column)
+
+    @property
+    def source_relation(self):
+        if self.schema:
+            return f"{_quote_identifier(self.schema)}.{_quote_identifier(self.source_view)}"
+        return _quote_identifier(self.source_view)
+
+    @property
+    def cache_relation(self):
+        return _quote_identifier(self.cache_table)
+
+    @property
+    def new_table(self):
+        return f"{self.cache_table}_new"
+
+    @property
+    def old_table(self):
+        return f"{self.cache_table}_old"
+
+    @property
+    def refresh_path(self):
+        return f"/api/admin/{self.name}_cache/refresh"
+
+    @property
+    def status_path(self):
+        return f"/api/admin/{self.name}_cache/status"
+
+
+CACHE_REGISTRY = {}
+
+
+def register_cache(name, source_view, cache_table, **options):
+    if name in CACHE_REGISTRY:
+        raise ValueError(f"Cache '{name}' ya registrada")
+    cache = MaterializedCache(name, source_view, cache_table, **options)
+    CACHE_REGISTRY[name] = cache
+    return cache
+
+
+def _table_exists(cur, table_name):
+    cur.execute(
+        """
+        SELECT COUNT(*)
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+            AND table_name = %s
+        """,
+        (table_name,)
+    )
+    row = cur.fetchone()
+    return bool(row and row[0] > 0)
+
+
+def _ensure_state_table(cur):
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {_quote_identifier(STATE_TABLE)} (
+            cache_name VARCHAR(100) NOT NULL PRIMARY KEY,
+            last_attempt_at DATETIME NULL,
+            last_success_at DATETIME NULL,
+            last_full_at DATETIME NULL,
+            last_mode VARCHAR(20) NULL,
+            last_duration_ms INT NULL,
+            last_row_delta BIGINT NULL,
+            last_rows BIGINT NULL,
+            watermark VARCHAR(64) NULL,
+            last_error TEXT NULL
+        )
+        """
+    )
+
+
+def _load_state(cur, cache):
+    cur.execute(
+        f"""
+        SELECT last_attempt_at, last_success_at, last_full_at, last_mode,
+            last_duration_ms, last_row_delta, last_rows, watermark, last_error,
+            TIMESTAMPDIFF(SECOND, last_success_at, NOW()),
+            TIMESTAMPDIFF(SECOND, last_full_at, NOW())
+        FROM {_quote_identifier(STATE_TABLE)}
+        WHERE cache_name = %s
+        """,
+        (cache.name,)
+    )
+    row = cur.fetchone()
+    if not row:
+        return {}
+    keys = (
+        "last_attempt_at", "last_success_at", "last_full_at", "last_mode",
+        "last_duration_ms", "last_row_delta", "last_rows", "watermark", "last_error",
+        "seconds_since_success", "seconds_since_full",
+    )
+    return dict(zip(keys, row))
+
+
+def _save_state(cur, cache, success, mode=None, duration_ms=None, row_delta=None,
+                rows=None, watermark=None, error=None):
+    if success:
+        cur.execute(
+            f"""
+            INSERT INTO {_quote_identifier(STATE_TABLE)} (
+                cache_name, last_attempt_at, last_success_at, last_full_at, last_mode,
+                last_duration_ms, last_row_delta, last_rows, watermark, last_error
+            )
+            VALUES (%s, NOW(), NOW(), IF(%s = 'full', NOW(), NULL), %s, %s, %s, %s, %s, NULL)
+            ON DUPLICATE KEY UPDATE
+                last_attempt_at = VALUES(last_attempt_at),
+                last_success_at = VALUES(last_success_at),
+                last_full_at = COALESCE(VALUES(last_full_at), last_full_at),
+                last_mode = VALUES(last_mode),
+                last_duration_ms = VALUES(last_duration_ms),
+                last_row_delta = VALUES(last_row_delta),
+                last_rows = VALUES(last_rows),
+                watermark = VALUES(watermark),
+                last_error = NULL
+            """,
+            (cache.name, mode, mode, duration_ms, row_delta, rows, watermark)
+        )
+    else:
+        cur.execute(
+            f"""
+            INSERT INTO {_quote_identifier(STATE_TABLE)} (cache_name, last_attempt_at, last_error)
+            VALUES (%s, NOW(), %s)
+            ON DUPLICATE KEY UPDATE
+                last_attempt_at = VALUES(last_attempt_at),
+                last_error = VALUES(last_error)
+            """,
+            (cache.name, error)
+        )
+
+
+def _max_modified(cur, cache, table_name):
+    if not cache.modified_column:
+        return None
+    cur.execute(
+        f"SELECT MAX({_quote_identifier(cache.modified_column)}) "
+        f"FROM {_quote_identifier(table_name)}"
+    )
+    row = cur.fetchone()
+    return str(row[0]) if row and row[0] is not None else None
+
+
+def _refresh_full(cur, cache):
+    cache_table = cache.cache_relation
+    cache_new_table = _quote_identifier(cache.new_table)
+    cache_old_table = _quote_identifier(cache.old_table)
+
+    cur.execute(f"DROP TABLE IF EXISTS {cache_new_table}")
+    cur.execute(f"CREATE TABLE {cache_new_table} AS SELECT * FROM {cache.source_relation}")
+    cur.execute(
+        f"ALTER TABLE {cache_new_table} "
+        f"ADD COLUMN {_quote_identifier(CACHE_ID_COLUMN)} "
+        "BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST"
+    )
+    for position, columns in enumerate(cache.indexes, start=1):
+        column_list = ", ".join(_quote_identifier(column) for column in columns)
+        cur.execute(
+            f"CREATE INDEX {_quote_identifier(f'idx_{cache.name}_{position}')} "
+            f"ON {cache_new_table} ({column_list})"
+        )
+
+    cur.execute(f"SELECT COUNT(*) FROM {cache_new_table}")
+    count_row = cur.fetchone()
+    row_count = count_row[0] if count_row else 0
+    watermark = _max_modified(cur, cache, cache.new_table)
+
+    previous_count = 0
+    cache_exists = _table_exists(cur, cache.cache_table)
+    if cache_exists:
+        cur.execute(f"SELECT COUNT(*) FROM {cache_table}")
+        previous_row = cur.fetchone()
+        previous_count = previous_row[0] if previous_row else 0
+
+    cur.execute(f"DROP TABLE IF EXISTS {cache_old_table}")
+    if cache_exists:
+        cur.execute(
+            f"RENAME TABLE {cache_table} TO {cache_old_table}, "
+            f"{cache_new_table} TO {cache_table}"
+        )
+        cur.execute(f"DROP TABLE IF EXISTS {cache_old_table}")
+    else:
+        cur.execute(f"RENAME TABLE {cache_new_table} TO {cache_table}")
+
+    return row_count, row_count - previous_count, watermark
+
+
+def _refresh_incremental(cur, cache, watermark):
+    """Re-copia solo las filas cuyo ``modified_column`` alcanza la marca
+    menos ``watermark_overlap`` segundos.
+
+    Las filas cambiadas se borran de la cache por ``key_column`` y se
+    vuelven a insertar (con un ``__cache_id`` nuevo) en la misma
+    transaccion, asi que releer filas ya copiadas no las duplica. La vista
+    se evalua una sola vez, en una tabla temporal.
+    """
+    delta_table = _quote_identifier(f"{cache.cache_table}_delta")
+    cache_table = cache.cache_relation
+    key = _quote_identifier(cache.key_column)
+    modified = _quote_identifier(cache.modified_column)
+
+    cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {delta_table}")
+    try:
+        cur.execute(
+            f"CREATE TEMPORARY TABLE {delta_table} AS "
+            f"SELECT * FROM {cache.source_relation} "
+            f"WHERE {modified} >= %s - INTERVAL %s SECOND",
+            (watermark, cache.watermark_overlap or 0)
+        )
+        cur.execute(f"SELECT COUNT(*), MAX({modified}) FROM {delta_table}")
+        delta_row = cur.fetchone()
+        changed = delta_row[0] if delta_row else 0
+        if changed:
+            cur.execute(f"SELECT * FROM {delta_table} LIMIT 0")
+            column_list = ", ".join(_quote_identifier(d[0]) for d in cur.description)
+            cur.fetchall()
+
+            cur.execute(f"SELECT COUNT(*) FROM {cache_table}")
+            before_row = cur.fetchone()
+            before = before_row[0] if before_row else 0
+
+            cur.execute(
+                f"DELETE c FROM {cache_table} c "
+                f"JOIN (SELECT DISTINCT {key} FROM {delta_table}) d ON c.{key} = d.{key}"
+            )
+            cur.execute(
+                f"INSERT INTO {cache_table} ({column_list}) "
+                f"SELECT {column_list} FROM {delta_table}"
+            )
+            watermark = str(delta_row[1])
+        else:
+            before = None
+
+        cur.execute(f"SELECT COUNT(*) FROM {cache_table}")
+        count_row = cur.fetchone()
+        row_count = count_row[0] if count_row else 0
+        row_delta = row_count - before if before is not None else 0
+        return row_count, row_delta, watermark, changed
+    finally:
+        cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {delta_table}")
+
+
+def _resolve_mode(cur, cache, mode, state):
+    if mode == "full" or not cache.supports_incremental:
+        return "full"
+    can_increment = bool(state.get("watermark")) and _table_exists(cur, cache.cache_table)
+    if mode == "incremental":
+        return "incremental" if can_increment else "full"
+    seconds_since_full = state.get("seconds_since_full")
+    if (
+        not can_increment
+        or seconds_since_full is None
+        or (cache.full_refresh_interval and seconds_since_full >= cache.full_refresh_interval)
+    ):
+        return "full"
+    return "incremental"
+
+
+def refresh_cache(cache, mode="auto"):
+    """Refresca la cache y registra el resultado en ``json_cache_refresh_state``.
+
+    ``mode`` puede ser ``full``, ``incremental`` o ``auto`` (incremental
+    cuando la cache lo soporta y hay una marca previa, salvo que toque el
+    rebuild completo periodico).
+    """
+    if mode not in REFRESH_MODES:
+        raise ValueError(f"mode debe ser uno de {', '.join(REFRESH_MODES)}")
+
+    cur = None
+    lock_acquired = False
+
+    with mysql_connection() as conn:
+        try:
+            cur = open_mysql_cursor(conn)
+
+            cur.execute("SELECT GET_LOCK(%s, 0)", (cache.lock_name,))
+            lock_row = cur.fetchone()
+            if not lock_row or lock_row[0] != 1:
+                raise CacheRefreshInProgress()
+            lock_acquired = True
+
+            _ensure_state_table(cur)
+            state = _load_state(cur, cache)
+            resolved_mode = _resolve_mode(cur, cache, mode, state)
+
+            started = time.monotonic()
+            try:
+                if resolved_mode == "incremental":
+                    row_count, row_delta, watermark, changed = _refresh_incremental(
+                        cur, cache, state["watermark"]
+                    )
+                else:
+                    row_count, row_delta, watermark = _refresh_full(cur, cache)
+                    changed = row_count
+            except Exception as exc:
+                try:
+                    conn.rollback()
+                    _save_state(cur, cache, False, error=str(exc)[:2000])
+                    conn.commit()
+                except Exception:
+                    current_app.logger.exception("No se pudo registrar el error de cache %s", cache.name)
+                raise
+            duration_ms = int((time.monotonic() - started) * 1000)
+
+            _save_state(
+                cur,
+                cache,
+                True,
+                mode=resolved_mode,
+                duration_ms=duration_ms,
+                row_delta=row_delta,
+                rows=row_count,
+                watermark=watermark,
+            )
+            conn.commit()
+
+            return {
+                "cache": cache.name,
+                "mode": resolved_mode,
+                "rows": row_count,
+                "row_delta": row_delta,
+                "changed_rows": changed,
+                "duration_ms": duration_ms,
+            }
+        finally:
+            if lock_acquired and cur is not None:
+                try:
+                    cur.execute("SELECT RELEASE_LOCK(%s)", (cache.lock_name,))
+                except Exception:
+                    current_app.logger.exception("No se pudo liberar lock de cache %s", cache.name)
+            _close_quietly(cur)
+
+
+def get_cache_status(cache):
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn)
+        try:
+            cur.execute("SELECT IS_FREE_LOCK(%s)", (cache.lock_name,))
+            lock_row = cur.fetchone()
+            lock_value = lock_row[0] if lock_row else None
+            is_refreshing = lock_value == 0
+
+            cur.execute(
+                """
+                SELECT CREATE_TIME
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE()
+                    AND table_name = %s
+                """,
+                (cache.cache_table,)
+            )
+            table_row = cur.fetchone()
+            cache_exists = table_row is not None
+            refreshed_at = table_row[0] if table_row else None
+
+            row_count = None
+            max_cache_id = None
+            if cache_exists:
+                cur.execute(
+                    f"SELECT COUNT(*), COALESCE(MAX({_quote_identifier(CACHE_ID_COLUMN)}), 0) "
+                    f"FROM {cache.cache_relation}"
+                )
+                cache_row = cur.fetchone()
+                if cache_row:
+                    row_count = cache_row[0]
+                    max_cache_id = cache_row[1]
+
+            state = {}
+            if _table_exists(cur, STATE_TABLE):
+                state = _load_state(cur, cache)
+
+            def _isoformat(value):
+                return value.isoformat() if value else None
+
+            return {
+                "cache": cache.name,
+                "cache_table": cache.cache_table,
+                "source_view": cache.source_view,
+                "exists": cache_exists,
+                "refreshing": is_refreshing,
+                "rows": row_count,
+                "max_cache_id": max_cache_id,
+                "refreshed_at": _isoformat(refreshed_at),
+                "refresh_interval_seconds": cache.refresh_interval,
+                "max_age_seconds": cache.max_age,
+                "incremental": cache.supports_incremental,
+                "last_attempt_at": _isoformat(state.get("last_attempt_at")),
+                "last_success_at": _isoformat(state.get("last_success_at")),
+                "last_full_at": _isoformat(state.get("last_full_at")),
+                "last_mode": state.get("last_mode"),
+                "last_duration_ms": state.get("last_duration_ms"),
+                "last_row_delta": state.get("last_row_delta"),
+                "watermark": state.get("watermark"),
+                "last_error": state.get("last_error"),
+            }
+        finally:
+            _close_quietly(cur)
+
+
+def _cache_is_stale(cur, cache):
+    """True si la cache no tiene refresco exitoso en los ultimos ``max_age`` segundos."""
+    if not cache.max_age:
+        return False
+    try:
+        cur.execute(
+            f"""
+            SELECT TIMESTAMPDIFF(SECOND, last_success_at, NOW())
+            FROM {_quote_identifier(STATE_TABLE)}
+            WHERE cache_name = %s
+            """,
+            (cache.name,)
+        )
+        rows = cur.fetchall()
+    except Exception as exc:
+        if not is_missing_table_error(exc):
+            raise
+        return True
+    return not rows or rows[0][0] is None or rows[0][0] > cache.max_age
+
+
+def fetch_cache_page(cur, cache, limit, cursor=None, page=None):
+    """Pagina la tabla cache por ``__cache_id``; si no existe o esta vencida, la vista.
+
+    Devuelve ``(columns, rows, next_cursor, has_more)`` sin la columna
+    ``__cache_id``, de modo que el feed no cambia de forma segun de donde
+    se sirva. La antiguedad se revisa solo en la primera pagina: un cursor
+    de la cache sigue en la cache y uno de la vista (``__offset``) en la
+    vista; cualquier otro es ``InvalidCursor``.
+    """
+    if cursor is None:
+        use_cache = not _cache_is_stale(cur, cache)
+    elif cursor[0] == CACHE_ID_COLUMN:
+        use_cache = True
+    elif cursor[0] == OFFSET_CURSOR:
+        use_cache = False
+    else:
+        raise InvalidCursor("cursor invalido")
+    if use_cache:
+        try:
+            columns, rows, key_index, next_cursor, has_more = fetch_keyset_page(
+                cur,
+                cache.cache_relation,
+                limit,
+                cursor=cursor,
+                page=page,
+                key_column=CACHE_ID_COLUMN,
+            )
+        except Exception as exc:
+            if cursor is not None or not is_missing_table_error(exc):
+                raise
+        else:
+            columns = columns[:key_index] + columns[key_index + 1:]
+            rows = [row[:key_index] + row[key_index + 1:] for row in rows]
+            return columns, rows, next_cursor, has_more
+
+    columns, rows, _, next_cursor, has_more = fetch_keyset_page(
+        cur,
+        cache.source_relation,
+        limit,
+        cursor=cursor,
+        page=page,
+    )
+    return columns, rows, next_cursor, has_more
+
+
+def iter_cache_rows(cache, batch_size=1000):
+    """Recorre la cache completa (o la vista si falta o esta vencida) sin bufferizarla.
+
+    Es un generador que presta su propia conexion del pool: el primer valor
+    son las columnas (sin ``__cache_id``) y luego lotes de ``fetchmany``.
+    La conexion se devuelve al agotarlo o al cerrarlo.
+    """
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn, unbuffered=True)
+        try:
+            if _cache_is_stale(cur, cache):
+                cur.execute(f"SELECT * FROM {cache.source_relation}")
+            else:
+                try:
+                    cur.execute(
+                        f"SELECT * FROM {cache.cache_relation} "
+                        f"ORDER BY {_quote_identifier(CACHE_ID_COLUMN)}"
+                    )
+                except Exception as exc:
+                    if not is_missing_table_error(exc):
+                        raise
+                    cur.execute(f"SELECT * FROM {cache.source_relation}")
+
+            columns = [d[0] for d in cur.description]
+            key_index = columns.index(CACHE_ID_COLUMN) if CACHE_ID_COLUMN in columns else None
+            if key_index is not None:
+                columns = columns[:key_index] + columns[key_index + 1:]
+            yield columns
+
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                if key_index is not None:
+                    rows = [row[:key_index] + row[key_index + 1:] for row in rows]
+                yield rows
+        finally:
+            cur.close()
+
+
+# Un solo hilo por proceso para refrescos manuales: varios POST seguidos se
+# encolan en vez de abrir un hilo (y una conexion) cada uno.
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mysql-cache-refresh")
+
+
+def is_refresh_due(cache, state):
+    if not cache.refresh_interval:
+        return False
+    seconds_since_success = state.get("seconds_since_success")
+    return seconds_since_success is None or seconds_since_success >= cache.refresh_interval
+
+
+def load_cache_state(cache):
+    with mysql_connection() as conn:
+        cur = open_mysql_cursor(conn)
+        try:
+            _ensure_state_table(cur)
+            return _load_state(cur, cache)
+        finally:
+            _close_quietly(cur)
+
+
+def run_cache_refresh(app, cache, mode="auto"):
+    with app.app_context():
+        try:
+            result = refresh_cache(cache, mode)
+            current_app.logger.info(
+                "Cache %s refrescada (%s): %s filas, delta %s, %s ms",
+                cache.name,
+                result["mode"],
+                result["rows"],
+                result["row_delta"],
+                result["duration_ms"]
+            )
+            return result
+        except CacheRefreshInProgress:
+            current_app.logger.info("Refresh de cache %s ya esta en ejecucion", cache.name)
+        except Exception:
+            current_app.logger.exception("Error refrescando cache %s", cache.name)
+        return None
+
+
+def start_cache_refresh_background(cache, mode="auto"):
+    app = current_app._get_current_object()
+    return _refresh_executor.submit(run_cache_refresh, app, cache, mode)
+
+
+def _validate_token(cache):
+    """Token adicional al JWT (que exige el hook global de app.py)."""
+    if not cache.token_setting:
+        return True, None
+    configured = os.environ.get(cache.token_setting)
+    if configured is None:
+        configured = getattr(app_config, cache.token_setting, None)
+    if configured is None:
+        return True, None
+    provided = request.args.get("token") or request.args.get("api_key")
+    if not provided:
+        return False, "Token requerido"
+    if provided != configured:
+        return False, "Token invalido"
+    return True, None
+
+
+@mysql_cache_bp.route("/api/admin/<name>_cache/refresh", methods=["POST"])
+def refresh_mysql_cache(name):
+    cache = CACHE_REGISTRY.get(name)
+    if cache is None:
+        return jsonify({"error": f"Cache '{name}' no registrada"}), 404
+
+    ok, msg = _validate_token(cache)
+    if not ok:
+        return jsonify({"error": msg}), 401
+
+    mode = request.args.get("mode", "auto")
+    if mode not in REFRESH_MODES:
+        return jsonify({"error": f"mode debe ser uno de {', '.join(REFRESH_MODES)}"}), 400
+
+    try:
+        status = get_cache_status(cache)
+        if status["refreshing"]:
+            return jsonify({
+                "status": "refreshing",
+                "message": "Refresh de cache ya en ejecucion",
+                "cache": status
+            }), 202
+
+        start_cache_refresh_background(cache, mode)
+        return jsonify({
+            "status": "refreshing",
+            "message": "Refresh de cache iniciado",
+            "mode": mode,
+            "cache_table": cache.cache_table,
+            "source_view": cache.source_view,
+            "check_status_url": cache.status_path
+        }), 202
+    except ImportError:
+        current_app.logger.exception("No MySQL client library installed")
+        return jsonify({"error": "No MySQL client library installed"}), 500
+    except Exception as exc:
+        current_app.logger.exception("Error refrescando cache %s", name)
+        return jsonify({
+            "error": f"No se pudo iniciar el refresh de cache {name}",
+            "detail": str(exc)
+        }), 500
+
+
+@mysql_cache_bp.route("/api/admin/<name>_cache/status", methods=["GET"])
+def get_mysql_cache_status(name):
+    cache = CACHE_REGISTRY.get(name)
+    if cache is None:
+        return jsonify({"error": f"Cache '{name}' no registrada"}), 404
+
+    ok, msg = _validate_token(cache)
+    if not ok:
+        return jsonify({"error": msg}), 401
+
+    try:
+        status = get_cache_status(cache)
+        if status["refreshing"]:
+            status["status"] = "refreshing"
+        elif status["exists"]:
+            status["status"] = "ready"
+        else:
+            status["status"] = "missing"
+        return jsonify(status), 200
+    except ImportError:
+        current_app.logger.exception("No MySQL client library installed")
+        return jsonify({"error": "No MySQL client library installed"}), 500
+    except Exception as exc:
+        current_app.logger.exception("Error consultando estado de cache %s", name)
+        return jsonify({
+            "error": f"No se pudo consultar el estado de cache {name}",
+            "detail": str(exc)
+        }), 500
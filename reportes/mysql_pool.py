@@ -0,0 +1,313 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import Blueprint, current_app, jsonify
+
+import config as app_config
+from config import MYSQL_DB, MYSQL_HOST, MYSQL_PASS, MYSQL_PORT, MYSQL_USER
+
+mysql_pool_bp = Blueprint("mysql_pool", __name__)
+
+
+class MySQLPoolTimeout(Exception):
+    pass
+
+
+def config_value(name, default, cast=int):
+    raw_value = os.environ.get(name)
+    if raw_value is None:
+        raw_value = getattr(app_config, name, None)
+    if raw_value is None:
+        return default
+    try:
+        return cast(raw_value)
+    except (TypeError, ValueError):
+        return default
+
+
+MYSQL_POOL_SIZE = config_value("MYSQL_POOL_SIZE", 10)
+MYSQL_POOL_TIMEOUT = config_value("MYSQL_POOL_TIMEOUT", 30, float)
+MYSQL_POOL_MAX_LIFETIME = config_value("MYSQL_POOL_MAX_LIFETIME", 1800, float)
+# Conexiones ociosas menos tiempo que esto se entregan sin ping
+MYSQL_POOL_PING_AFTER = config_value("MYSQL_POOL_PING_AFTER", 5, float)
+
+
+def get_mysql_impl():
+    try:
+        import pymysql  # type: ignore
+        return ("pymysql", pymysql)
+    except Exception:
+        pass
+    try:
+        import mysql.connector  # type: ignore
+        return ("mysql-connector", mysql.connector)
+    except Exception as exc:  # pragma: no cover - runtime only
+        raise ImportError("No MySQL client library installed") from exc
+
+
+def _connect(mysql_impl):
+    impl_name, impl = mysql_impl
+    if impl_name == "pymysql":
+        return impl.connect(
+            host=MYSQL_HOST,
+            user=MYSQL_USER,
+            password=MYSQL_PASS,
+            db=MYSQL_DB,
+            port=MYSQL_PORT,
+            charset="utf8mb4",
+            read_timeout=600,   # ✅ evita cortes por socket lento
+            write_timeout=600,
+            connect_timeout=15,
+        )
+    connect_kwargs = {
+        "host": MYSQL_HOST,
+        "user": MYSQL_USER,
+        "password": MYSQL_PASS,
+        "database": MYSQL_DB,
+        "port": MYSQL_PORT,
+        "connection_timeout": 15,
+        "read_timeout": 600,
+        "write_timeout": 600,
+        "charset": "utf8mb4",
+    }
+    try:
+        return impl.connect(**connect_kwargs)
+    except TypeError:
+        connect_kwargs.pop("read_timeout", None)
+        connect_kwargs.pop("write_timeout", None)
+        return impl.connect(**connect_kwargs)
+
+
+def _execute_session_timeouts(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SET SESSION net_read_timeout = 600")
+        cur.execute("SET SESSION net_write_timeout = 600")
+        cur.execute("SET SESSION wait_timeout = 28800")
+    finally:
+        cur.close()
+
+
+def _close_quietly(resource):
+    try:
+        if resource is not None:
+            resource.close()
+    except Exception:
+        pass
+
+
+class MySQLConnectionPool:
+    """Pool acotado y thread-safe de conexiones MySQL para los reportes.
+
+    Las conexiones se crean bajo demanda hasta ``max_size``; al devolverse
+    se hace rollback (para no arrastrar snapshots de REPEATABLE READ) y
+    quedan ociosas para el siguiente checkout. En el checkout se descartan
+    las que superaron ``max_lifetime`` y se hace ping a las que llevan mas
+    de ``ping_after`` segundos ociosas.
+    """
+
+    def __init__(self, mysql_impl, max_size, timeout, max_lifetime, ping_after):
+        self.mysql_impl = mysql_impl
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._created_at = {}
+        self._in_use = 0
+        self._waiting = 0
+
+        self._checkouts = 0
+        self._connections_created = 0
+        self._connections_recycled = 0
+        self._connections_discarded = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _is_expired(self, created_at, now):
+        return self.max_lifetime > 0 and now - created_at >= self.max_lifetime
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _open(self):
+        conn = _connect(self.mysql_impl)
+        try:
+            _execute_session_timeouts(conn)
+        except Exception:
+            _close_quietly(conn)
+            raise
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._connections_created += 1
+        return conn
+
+    def _forget(self, conn):
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        _close_quietly(conn)
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        candidate = None
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._in_use < self.max_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise MySQLPoolTimeout(
+                            "No hay conexiones MySQL disponibles en el pool"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            self._in_use += 1
+            self._checkouts += 1
+            waited = time.monotonic() - started
+            self._wait_total += waited
+            if waited > self._wait_max:
+                self._wait_max = waited
+
+        try:
+            if candidate is not None:
+                conn, created_at, last_used = candidate
+                now = time.monotonic()
+                if self._is_expired(created_at, now):
+                    self._forget(conn)
+                    with self._cond:
+                        self._connections_recycled += 1
+                elif now - last_used >= self.ping_after and not self._is_healthy(conn):
+                    self._forget(conn)
+                    with self._cond:
+                        self._connections_discarded += 1
+                else:
+                    return conn
+            return self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            created_at = self._created_at.get(id(conn), now)
+            if discard or self._is_expired(created_at, now):
+                self._created_at.pop(id(conn), None)
+                if discard:
+                    self._connections_discarded += 1
+                else:
+                    self._connections_recycled += 1
+                to_close = conn
+            else:
+                self._idle.append((conn, created_at, now))
+                to_close = None
+            self._cond.notify()
+
+        _close_quietly(to_close)
+
+    def metrics(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "driver": self.mysql_impl[0],
+                "max_size": self.max_size,
+                "size": self._in_use + idle,
+                "in_use": self._in_use,
+                "idle": idle,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "connections_created": self._connections_created,
+                "connections_recycled": self._connections_recycled,
+                "connections_discarded": self._connections_discarded,
+                "timeouts": self._timeouts,
+                "wait_ms_total": round(self._wait_total * 1000, 3),
+                "wait_ms_avg": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+                "timeout_seconds": self.timeout,
+                "max_lifetime_seconds": self.max_lifetime,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_mysql_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MySQLConnectionPool(
+                    get_mysql_impl(),
+                    max_size=MYSQL_POOL_SIZE,
+                    timeout=MYSQL_POOL_TIMEOUT,
+                    max_lifetime=MYSQL_POOL_MAX_LIFETIME,
+                    ping_after=MYSQL_POOL_PING_AFTER,
+                )
+    return _pool
+
+
+@contextmanager
+def mysql_connection():
+    """Presta una conexion del pool y la devuelve al salir del bloque.
+
+    Si el bloque lanza una excepcion la conexion se descarta en vez de
+    volver al pool, porque su estado (cursor a medio leer, lock, etc.) es
+    incierto.
+    """
+    pool = get_mysql_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except BaseException:
+        pool.release(conn, discard=True)
+        raise
+    else:
+        pool.release(conn)
+
+
+def open_mysql_cursor(conn, unbuffered=False):
+    impl_name, impl = get_mysql_pool().mysql_impl
+    if impl_name == "mysql-connector":
+        return conn.cursor(buffered=not unbuffered)
+    if impl_name == "pymysql" and unbuffered:
+        return conn.cursor(impl.cursors.SSCursor)
+    return conn.cursor()
+
+
+@mysql_pool_bp.route("/api/admin/mysql_pool/status", methods=["GET"])
+def get_mysql_pool_status():
+    try:
+        return jsonify(get_mysql_pool().metrics()), 200
+    except ImportError:
+        current_app.logger.exception("No MySQL client library installed")
+        return jsonify({"error": "No MySQL client library installed"}), 500
@@ -0,0 +1,167 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import request
+
+
+# Clave de las tablas cache (BIGINT AUTO_INCREMENT, ver mysql_cache)
+CACHE_ID_COLUMN = "__cache_id"
+# Columna ficticia de los cursores por desplazamiento (relaciones sin clave unica)
+OFFSET_CURSOR = "__offset"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _quote_identifier(identifier):
+    return f"`{identifier.replace('`', '``')}`"
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime, date, Decimal)):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+def encode_cursor(column, value):
+    payload = {"c": column, "v": _cursor_value(value), "n": value is None}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        column = payload["c"]
+        if not isinstance(column, str) or not column:
+            raise ValueError
+        return column, payload.get("v"), bool(payload.get("n"))
+    except Exception:
+        raise InvalidCursor("cursor invalido")
+
+
+def _feed_cursor(cursor):
+    column, value, is_null = cursor
+    if column not in (CACHE_ID_COLUMN, OFFSET_CURSOR) or is_null or isinstance(value, bool):
+        raise InvalidCursor("cursor invalido")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("cursor invalido")
+    if value < 0:
+        raise InvalidCursor("cursor invalido")
+    return column, value, False
+
+
+def parse_pagination_args(default_limit=5000, max_limit=10000):
+    """Lee cursor/limit (y page como compatibilidad) del query string.
+
+    ``page`` solo se usa si no viene ``cursor``; en ese caso el feed
+    responde como antes (OFFSET) pero con orden estable y ya devuelve el
+    ``next_cursor`` para que el cliente pase a paginar por cursor.
+
+    Solo se aceptan cursores de ``__cache_id`` o ``__offset`` con valor
+    entero no negativo; cualquier otro es ``InvalidCursor`` (un ValueError),
+    asi el feed responde 400 antes de abrir la conexion.
+    """
+    try:
+        limit = int(request.args.get("limit", default_limit))
+    except (TypeError, ValueError):
+        raise ValueError("limit debe ser numerico")
+    limit = max(1, min(limit, max_limit))
+
+    token = request.args.get("cursor")
+    cursor = _feed_cursor(decode_cursor(token)) if token else None
+
+    page = None
+    if cursor is None:
+        try:
+            page = max(1, int(request.args.get("page", 1)))
+        except (TypeError, ValueError):
+            raise ValueError("page debe ser numerico")
+
+    return {"limit": limit, "cursor": cursor, "page": page}
+
+
+def fetch_keyset_page(cur, relation, limit, cursor=None, page=None, key_column=None):
+    """Devuelve una pagina de ``relation``.
+
+    Con ``key_column`` (que debe ser unica, p.ej. ``__cache_id``) pagina por
+    keyset sobre esa columna. Sin ella ordena por todas las columnas, de modo
+    que el orden es total aunque ninguna sea unica, y el cursor guarda el
+    desplazamiento (``OFFSET_CURSOR``). En ambos casos cada pagina trae a lo
+    sumo ``limit`` filas.
+
+    Retorna ``(columns, rows, key_index, next_cursor, has_more)``;
+    ``key_index`` es None cuando se pagina sin clave.
+    """
+    if key_column is None:
+        if cursor is not None and cursor[0] != OFFSET_CURSOR:
+            raise InvalidCursor("cursor invalido")
+        return _fetch_offset_page(cur, relation, limit, cursor, page)
+
+    where_sql = ""
+    params = ()
+    if cursor is not None:
+        column, after, after_is_null = cursor
+        if column != key_column:
+            raise InvalidCursor("cursor invalido")
+        key = _quote_identifier(key_column)
+        if after_is_null:
+            # Los NULL ordenan primero en MySQL; tras ellos vienen los no nulos
+            where_sql = f"WHERE {key} IS NOT NULL "
+        else:
+            where_sql = f"WHERE {key} > %s "
+            params = (after,)
+
+    sql = (
+        f"SELECT * FROM {relation} {where_sql}"
+        f"ORDER BY {_quote_identifier(key_column)} LIMIT %s"
+    )
+    params = params + (limit + 1,)
+    if cursor is None and page is not None and page > 1:
+        sql += " OFFSET %s"
+        params = params + ((page - 1) * limit,)
+    cur.execute(sql, params)
+
+    columns = [d[0] for d in cur.description]
+    key_index = columns.index(key_column)
+    rows = list(cur.fetchall())
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(key_column, rows[-1][key_index]) if rows else None
+    return columns, rows, key_index, next_cursor, has_more
+
+
+def _fetch_offset_page(cur, relation, limit, cursor, page):
+    if cursor is not None:
+        try:
+            offset = max(0, int(cursor[1]))
+        except (TypeError, ValueError):
+            raise InvalidCursor("cursor invalido")
+    else:
+        offset = ((page or 1) - 1) * limit
+
+    # Solo para conocer las columnas; MySQL no ejecuta la consulta con LIMIT 0
+    cur.execute(f"SELECT * FROM {relation} LIMIT 0")
+    cur.fetchall()
+    columns = [d[0] for d in cur.description]
+    order_sql = ", ".join(str(position) for position in range(1, len(columns) + 1))
+
+    cur.execute(
+        f"SELECT * FROM {relation} ORDER BY {order_sql} LIMIT %s OFFSET %s",
+        (limit + 1, offset)
+    )
+    rows = list(cur.fetchall())
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(OFFSET_CURSOR, offset + len(rows)) if rows else None
+    return columns, rows, None, next_cursor, has_more
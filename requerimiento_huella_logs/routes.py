@@ -3,62 +3,178 @@ from datetime import datetime, timezone
 from flask import jsonify, request
 from sqlalchemy.exc import IntegrityError
 
+from catalog_cache import catalogs
 from models import db
+from utils.row_serializer import serialize_row, serialize_rows
 from requerimiento_huella_logs import requerimiento_huella_logs_bp
 
 
+REQUERIMIENTO_HUELLA_LOG_FIELDS = (
+    "id",
+    "requerimiento_recurso_id",
+    "requerimiento_numero",
+    "requerimiento_numero_original",
+    "requerimiento_respuesta_situacion",
+    "secuencia",
+    "requerimiento_accion_log_id",
+    "requerimiento_accion",
+    "requerimiento_estado_id",
+    "requerimiento_estado",
+    "respuesta_estado_id",
+    "respuesta_estado",
+    "movimiento_tipo_id",
+    "movimiento_tipo",
+    "usuario_accion_id",
+    "usuario_accion",
+    "usuario_emisor_id",
+    "usuario_emisor",
+    "usuario_receptor_id",
+    "usuario_receptor",
+    "coe_origen_id",
+    "coe_origen",
+    "mesa_origen_id",
+    "mesa_origen",
+    "coe_destino_id",
+    "coe_destino",
+    "mesa_destino_id",
+    "mesa_destino",
+    "recurso_grupo_id",
+    "recurso_grupo",
+    "recurso_tipo_id",
+    "recurso_tipo",
+    "recurso_inventario_id",
+    "cantidad_solicitada",
+    "cantidad_asignada",
+    "motivo_id",
+    "motivo",
+    "respuesta_fecha",
+)
+
+
+def _to_iso_if_present(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+REQUERIMIENTO_HUELLA_LOG_CONVERTERS = {
+    "respuesta_fecha": _to_iso_if_present,
+}
+
+
+HUELLA_REQUIRED_FIELDS = (
+    "requerimiento_recurso_id",
+    "requerimiento_accion_log_id",
+    "requerimiento_estado_id",
+    "usuario_accion_id",
+    "recurso_grupo_id",
+    "recurso_tipo_id",
+)
+
+# Llaves opcionales donde 0, "" o "null" equivalen a no enviarlas
+HUELLA_OPTIONAL_FK_FIELDS = (
+    "respuesta_estado_id",
+    "movimiento_tipo_id",
+    "usuario_emisor_id",
+    "usuario_receptor_id",
+    "coe_origen_id",
+    "mesa_origen_id",
+    "coe_destino_id",
+    "mesa_destino_id",
+    "recurso_inventario_id",
+    "motivo_id",
+)
+
+# (campo, tabla, requerido)
+HUELLA_FK_CHECKS = (
+    ("requerimiento_recurso_id", "requerimiento_recursos", True),
+    ("requerimiento_accion_log_id", "requerimiento_huella_log_acciones", True),
+    ("requerimiento_estado_id", "requerimiento_huella_log_estados", True),
+    ("respuesta_estado_id", "requerimiento_huella_log_respuesta_estados", False),
+    ("movimiento_tipo_id", "requerimiento_huella_log_movimiento_tipos", False),
+    ("usuario_accion_id", "usuarios", True),
+    ("usuario_emisor_id", "usuarios", False),
+    ("usuario_receptor_id", "usuarios", False),
+    ("coe_origen_id", "coes", False),
+    ("mesa_origen_id", "mesas", False),
+    ("coe_destino_id", "coes", False),
+    ("mesa_destino_id", "mesas", False),
+    ("recurso_grupo_id", "recurso_grupos", True),
+    ("recurso_tipo_id", "recurso_tipos", True),
+    ("recurso_inventario_id", "recursos_inventario", False),
+    ("motivo_id", "requerimiento_huella_log_motivos", False),
+)
+
+HUELLA_INSERT_COLUMNS = (
+    "requerimiento_recurso_id",
+    "requerimiento_numero",
+    "requerimiento_numero_original",
+    "requerimiento_respuesta_situacion",
+    "secuencia",
+    "requerimiento_accion_log_id",
+    "requerimiento_estado_id",
+    "respuesta_estado_id",
+    "movimiento_tipo_id",
+    "usuario_accion_id",
+    "usuario_emisor_id",
+    "usuario_receptor_id",
+    "coe_origen_id",
+    "mesa_origen_id",
+    "coe_destino_id",
+    "mesa_destino_id",
+    "recurso_grupo_id",
+    "recurso_tipo_id",
+    "recurso_inventario_id",
+    "cantidad_solicitada",
+    "cantidad_asignada",
+    "motivo_id",
+    "respuesta_fecha",
+)
+
+HUELLA_BULK_MAX = 1000
+
+# (campo de salida, campo id, catalogo, columna): nombres que en las escrituras
+# salen de la cache de catalogos en vez de los JOIN de _build_base_historial_query
+HUELLA_CATALOG_NAMES = (
+    ("requerimiento_accion", "requerimiento_accion_log_id", "requerimiento_huella_log_acciones", "nombre"),
+    ("requerimiento_estado", "requerimiento_estado_id", "requerimiento_huella_log_estados", "nombre"),
+    ("respuesta_estado", "respuesta_estado_id", "requerimiento_huella_log_respuesta_estados", "nombre"),
+    ("movimiento_tipo", "movimiento_tipo_id", "requerimiento_huella_log_movimiento_tipos", "nombre"),
+    ("motivo", "motivo_id", "requerimiento_huella_log_motivos", "nombre"),
+    ("coe_origen", "coe_origen_id", "coes", "siglas"),
+    ("mesa_origen", "mesa_origen_id", "mesas", "nombre"),
+    ("coe_destino", "coe_destino_id", "coes", "siglas"),
+    ("mesa_destino", "mesa_destino_id", "mesas", "nombre"),
+    ("recurso_grupo", "recurso_grupo_id", "recurso_grupos", "nombre"),
+    ("recurso_tipo", "recurso_tipo_id", "recurso_tipos", "nombre"),
+)
+
+# Nombres de usuario para la fila escrita: se agregan en la misma sentencia
+# (``WITH escrito AS (INSERT/UPDATE ... RETURNING *)``)
+_USUARIOS_ESCRITO_SQL = """
+    SELECT
+        escrito.*,
+        uacc.usuario AS usuario_accion,
+        uem.usuario AS usuario_emisor,
+        urec.usuario AS usuario_receptor
+    FROM escrito
+    LEFT JOIN public.usuarios uacc
+        ON escrito.usuario_accion_id = uacc.id
+    LEFT JOIN public.usuarios uem
+        ON escrito.usuario_emisor_id = uem.id
+    LEFT JOIN public.usuarios urec
+        ON escrito.usuario_receptor_id = urec.id
+"""
+
+
 def _serialize_requerimiento_huella_log(row):
-    row_mapping = getattr(row, "_mapping", {})
-
-    def _get_optional(column_name):
-        if column_name in row_mapping:
-            return row_mapping[column_name]
-        upper_column_name = column_name.upper()
-        if upper_column_name in row_mapping:
-            return row_mapping[upper_column_name]
-        return None
+    return serialize_row(row, REQUERIMIENTO_HUELLA_LOG_FIELDS, REQUERIMIENTO_HUELLA_LOG_CONVERTERS)
 
-    respuesta_fecha = _get_optional("respuesta_fecha")
-    return {
-        "id": _get_optional("id"),
-        "requerimiento_recurso_id": _get_optional("requerimiento_recurso_id"),
-        "requerimiento_numero": _get_optional("requerimiento_numero"),
-        "requerimiento_numero_original": _get_optional("requerimiento_numero_original"),
-        "requerimiento_respuesta_situacion": _get_optional("requerimiento_respuesta_situacion"),
-        "secuencia": _get_optional("secuencia"),
-        "requerimiento_accion_log_id": _get_optional("requerimiento_accion_log_id"),
-        "requerimiento_accion": _get_optional("requerimiento_accion"),
-        "requerimiento_estado_id": _get_optional("requerimiento_estado_id"),
-        "requerimiento_estado": _get_optional("requerimiento_estado"),
-        "respuesta_estado_id": _get_optional("respuesta_estado_id"),
-        "respuesta_estado": _get_optional("respuesta_estado"),
-        "movimiento_tipo_id": _get_optional("movimiento_tipo_id"),
-        "movimiento_tipo": _get_optional("movimiento_tipo"),
-        "usuario_accion_id": _get_optional("usuario_accion_id"),
-        "usuario_accion": _get_optional("usuario_accion"),
-        "usuario_emisor_id": _get_optional("usuario_emisor_id"),
-        "usuario_emisor": _get_optional("usuario_emisor"),
-        "usuario_receptor_id": _get_optional("usuario_receptor_id"),
-        "usuario_receptor": _get_optional("usuario_receptor"),
-        "coe_origen_id": _get_optional("coe_origen_id"),
-        "coe_origen": _get_optional("coe_origen"),
-        "mesa_origen_id": _get_optional("mesa_origen_id"),
-        "mesa_origen": _get_optional("mesa_origen"),
-        "coe_destino_id": _get_optional("coe_destino_id"),
-        "coe_destino": _get_optional("coe_destino"),
-        "mesa_destino_id": _get_optional("mesa_destino_id"),
-        "mesa_destino": _get_optional("mesa_destino"),
-        "recurso_grupo_id": _get_optional("recurso_grupo_id"),
-        "recurso_grupo": _get_optional("recurso_grupo"),
-        "recurso_tipo_id": _get_optional("recurso_tipo_id"),
-        "recurso_tipo": _get_optional("recurso_tipo"),
-        "recurso_inventario_id": _get_optional("recurso_inventario_id"),
-        "cantidad_solicitada": _get_optional("cantidad_solicitada"),
-        "cantidad_asignada": _get_optional("cantidad_asignada"),
-        "motivo_id": _get_optional("motivo_id"),
-        "motivo": _get_optional("motivo"),
-        "respuesta_fecha": respuesta_fecha.isoformat() if hasattr(respuesta_fecha, "isoformat") else respuesta_fecha
-    }
+
+def _serialize_huella_escrita(row):
+    """Serializa la fila devuelta por un INSERT/UPDATE resolviendo catalogos en memoria."""
+    item = _serialize_requerimiento_huella_log(row)
+    for field, id_field, table, column in HUELLA_CATALOG_NAMES:
+        item[field] = catalogs.value(table, item[id_field], column)
+    return item
 
 
 def _build_base_historial_query():
@@ -134,24 +250,36 @@ def _build_base_historial_query():
     """
 
 
-def _exists(table_name, item_id):
-    query = db.text(f"SELECT 1 FROM public.{table_name} WHERE id = :id")
-    return db.session.execute(query, {"id": item_id}).fetchone() is not None
-
-
 def _validate_required_field(data, field_name):
     return field_name in data and data[field_name] is not None
 
 
-def _validate_fk(data, field_name, table_name, required=False):
-    field_exists = field_name in data and data[field_name] is not None
-    if required and not field_exists:
-        return f"{field_name} es requerido"
-    if not field_exists:
-        return None
-    if not _exists(table_name, data[field_name]):
-        return f"{field_name} no existe en {table_name}"
-    return None
+def _validate_fks(data):
+    """Valida todas las llaves foraneas de ``HUELLA_FK_CHECKS`` con una sola consulta.
+
+    Devuelve la lista de errores: requeridos faltantes e ids que no existen
+    en su tabla.
+    """
+    errors = []
+    checks = []
+    for field_name, table_name, required in HUELLA_FK_CHECKS:
+        if _validate_required_field(data, field_name):
+            checks.append((field_name, table_name))
+        elif required:
+            errors.append(f"{field_name} es requerido")
+    if not checks:
+        return errors
+
+    lookups = [
+        f"SELECT {n} AS n WHERE NOT EXISTS (SELECT 1 FROM public.{table_name} WHERE id = :id_{n})"
+        for n, (_field_name, table_name) in enumerate(checks)
+    ]
+    params = {f"id_{n}": data[field_name] for n, (field_name, _table_name) in enumerate(checks)}
+    missing = db.session.execute(db.text("\nUNION ALL\n".join(lookups)), params).scalars().all()
+    for n in sorted(missing):
+        field_name, table_name = checks[n]
+        errors.append(f"{field_name} no existe en {table_name}")
+    return errors
 
 
 def _normalize_optional_fk_value(value):
@@ -182,43 +310,183 @@ def _validate_cantidades(cantidad_solicitada, cantidad_asignada):
     return None
 
 
-def _siguiente_secuencia(requerimiento_recurso_id):
-    query = db.text("""
-        SELECT COALESCE(MAX(secuencia), 0) + 1 AS secuencia
-        FROM public.requerimiento_huella_logs
-        WHERE requerimiento_recurso_id = :requerimiento_recurso_id
-    """)
-    row = db.session.execute(
-        query,
-        {"requerimiento_recurso_id": requerimiento_recurso_id}
-    ).fetchone()
-    return row.secuencia if row else 1
+def _as_int(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise ValueError(value)
+
+
+def _prepare_bulk_item(raw):
+    """Normaliza y valida un item del lote sin ir a la base; devuelve ``(data, errores)``."""
+    if not isinstance(raw, dict):
+        return None, ["cada log debe ser un objeto JSON"]
+
+    data = _normalize_optional_fks(raw, HUELLA_OPTIONAL_FK_FIELDS)
+    errors = [
+        f"{field_name} es requerido"
+        for field_name in HUELLA_REQUIRED_FIELDS
+        if not _validate_required_field(data, field_name)
+    ]
+    integer_fields = [field_name for field_name, _table_name, _required in HUELLA_FK_CHECKS]
+    integer_fields += ["secuencia", "cantidad_solicitada", "cantidad_asignada"]
+    for field_name in integer_fields:
+        if data.get(field_name) is None:
+            continue
+        try:
+            data[field_name] = _as_int(data[field_name])
+        except ValueError:
+            errors.append(f"{field_name} debe ser un entero")
+    if errors:
+        return data, errors
+
+    data.setdefault("cantidad_solicitada", 1)
+    data.setdefault("cantidad_asignada", 0)
+    cantidad_error = _validate_cantidades(data["cantidad_solicitada"], data["cantidad_asignada"])
+    if cantidad_error:
+        errors.append(cantidad_error)
+    if data.get("secuencia") is not None and data["secuencia"] < 1:
+        errors.append("secuencia debe ser mayor o igual a 1")
+    if data.get("respuesta_fecha") is None:
+        data["respuesta_fecha"] = datetime.now(timezone.utc)
+    return data, errors
 
 
-def _resolver_requerimiento_numero_original(
-    requerimiento_recurso_id,
-    requerimiento_numero_original,
-    requerimiento_numero
-):
-    if requerimiento_numero_original is not None:
-        return requerimiento_numero_original
+def _existing_fk_ids(items):
+    """``{tabla: ids existentes}`` para las llaves de todos los items, en una consulta.
 
+    ``requerimiento_recursos`` se valida aparte, al bloquear los requerimientos.
+    """
+    ids_by_table = {}
+    for data in items:
+        for field_name, table_name, _required in HUELLA_FK_CHECKS:
+            if table_name != "requerimiento_recursos" and data.get(field_name) is not None:
+                ids_by_table.setdefault(table_name, set()).add(data[field_name])
+    if not ids_by_table:
+        return {}
+
+    tables = sorted(ids_by_table)
+    lookups = [
+        f"SELECT '{table_name}' AS tabla, id FROM public.{table_name} WHERE id = ANY(:ids_{n})"
+        for n, table_name in enumerate(tables)
+    ]
+    params = {f"ids_{n}": sorted(ids_by_table[table_name]) for n, table_name in enumerate(tables)}
+    existing = {table_name: set() for table_name in tables}
+    for row in db.session.execute(db.text("\nUNION ALL\n".join(lookups)), params):
+        existing[row.tabla].add(row.id)
+    return existing
+
+
+# Contador por requerimiento (migracion 0006): la fila se crea la primera vez
+# desde el MAX(secuencia) existente y de ahi en mas solo se incrementa. Su
+# bloqueo de fila (hasta el commit) es lo que serializa a quienes escriben
+# logs del mismo requerimiento.
+_ASEGURAR_CONTADORES_SQL = """
+    INSERT INTO public.requerimiento_huella_secuencias (requerimiento_recurso_id, ultima_secuencia)
+    SELECT rr.id, COALESCE(MAX(h.secuencia), 0)
+    FROM public.requerimiento_recursos rr
+    LEFT JOIN public.requerimiento_huella_logs h ON h.requerimiento_recurso_id = rr.id
+    WHERE rr.id = ANY(:ids)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM public.requerimiento_huella_secuencias s
+            WHERE s.requerimiento_recurso_id = rr.id
+        )
+    GROUP BY rr.id
+    ON CONFLICT (requerimiento_recurso_id) DO NOTHING
+"""
+
+_RESERVAR_SECUENCIA_SQL = """
+    UPDATE public.requerimiento_huella_secuencias
+    SET ultima_secuencia = GREATEST(ultima_secuencia + :cantidad, :minima)
+    WHERE requerimiento_recurso_id = :requerimiento_recurso_id
+    RETURNING ultima_secuencia
+"""
+
+_GUARDAR_CONTADORES_SQL = """
+    UPDATE public.requerimiento_huella_secuencias s
+    SET ultima_secuencia = GREATEST(s.ultima_secuencia, nuevo.ultima_secuencia)
+    FROM unnest(CAST(:ids AS integer[]), CAST(:ultimas AS integer[])) AS nuevo(requerimiento_recurso_id, ultima_secuencia)
+    WHERE s.requerimiento_recurso_id = nuevo.requerimiento_recurso_id
+"""
+
+
+def _reservar_secuencia(requerimiento_recurso_id, secuencia=None):
+    """Secuencia del log a escribir, reservada en el contador del requerimiento.
+
+    Sin ``secuencia`` se toma la siguiente del contador; con ``secuencia``
+    explicita solo se adelanta el contador para que las automaticas no la
+    repitan. El contador queda bloqueado hasta el commit, asi dos escrituras
+    concurrentes nunca reciben el mismo numero.
+    """
+    db.session.execute(db.text(_ASEGURAR_CONTADORES_SQL), {"ids": [requerimiento_recurso_id]})
+    ultima = db.session.execute(db.text(_RESERVAR_SECUENCIA_SQL), {
+        "requerimiento_recurso_id": requerimiento_recurso_id,
+        "cantidad": 1 if secuencia is None else 0,
+        "minima": secuencia or 0,
+    }).scalar()
+    if secuencia is not None:
+        return secuencia
+    # Sin contador el requerimiento no existe: el INSERT falla por su llave foranea
+    return ultima if ultima is not None else 1
+
+
+def _lock_requerimientos(requerimiento_recurso_ids):
+    """Bloquea los contadores de los requerimientos (hasta el commit) y trae su
+    ultima secuencia y numero original.
+
+    Solo existen contadores para requerimientos que existen. Despues de asignar
+    las secuencias del lote hay que guardarlas con ``_guardar_contadores``.
+    """
+    ids = sorted(requerimiento_recurso_ids)
+    db.session.execute(db.text(_ASEGURAR_CONTADORES_SQL), {"ids": ids})
     query = db.text("""
-        SELECT COALESCE(requerimiento_numero_original, requerimiento_numero)
-            AS requerimiento_numero_original
-        FROM public.requerimiento_huella_logs
-        WHERE requerimiento_recurso_id = :requerimiento_recurso_id
-            AND COALESCE(requerimiento_numero_original, requerimiento_numero) IS NOT NULL
-        ORDER BY secuencia ASC, id ASC
-        LIMIT 1
+        SELECT
+            s.requerimiento_recurso_id AS id,
+            s.ultima_secuencia AS max_secuencia,
+            (
+                SELECT COALESCE(h.requerimiento_numero_original, h.requerimiento_numero)
+                FROM public.requerimiento_huella_logs h
+                WHERE h.requerimiento_recurso_id = s.requerimiento_recurso_id
+                    AND COALESCE(h.requerimiento_numero_original, h.requerimiento_numero) IS NOT NULL
+                ORDER BY h.secuencia ASC, h.id ASC
+                LIMIT 1
+            ) AS numero_original
+        FROM public.requerimiento_huella_secuencias s
+        WHERE s.requerimiento_recurso_id = ANY(:ids)
+        ORDER BY s.requerimiento_recurso_id
+        FOR UPDATE OF s
     """)
-    row = db.session.execute(
-        query,
-        {"requerimiento_recurso_id": requerimiento_recurso_id}
-    ).fetchone()
-    if row is not None:
-        return row.requerimiento_numero_original
-    return requerimiento_numero
+    result = db.session.execute(query, {"ids": ids})
+    return {row.id: row for row in result}
+
+
+def _guardar_contadores(ultimas):
+    """``{requerimiento_recurso_id: ultima secuencia usada}`` -> contadores."""
+    ids = sorted(ultimas)
+    db.session.execute(db.text(_GUARDAR_CONTADORES_SQL), {
+        "ids": ids,
+        "ultimas": [ultimas[rid] for rid in ids],
+    })
+
+
+def _insert_huella_logs(rows):
+    """Un solo INSERT multi-fila; devuelve ``{(requerimiento_recurso_id, secuencia): id}``."""
+    params = {}
+    values = []
+    for n, row in enumerate(rows):
+        values.append("(" + ", ".join(f":{column}_{n}" for column in HUELLA_INSERT_COLUMNS) + ")")
+        params.update({f"{column}_{n}": row.get(column) for column in HUELLA_INSERT_COLUMNS})
+    query = db.text(
+        f"INSERT INTO public.requerimiento_huella_logs ({', '.join(HUELLA_INSERT_COLUMNS)})\n"
+        f"VALUES {', '.join(values)}\n"
+        "RETURNING id, requerimiento_recurso_id, secuencia"
+    )
+    result = db.session.execute(query, params)
+    return {(row.requerimiento_recurso_id, row.secuencia): row.id for row in result}
 
 
 @requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs", methods=["GET"])
@@ -367,7 +635,7 @@ def get_requerimiento_huella_logs():
     sql += "\nLIMIT :limit"
 
     result = db.session.execute(db.text(sql), params)
-    return jsonify([_serialize_requerimiento_huella_log(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_HUELLA_LOG_FIELDS, REQUERIMIENTO_HUELLA_LOG_CONVERTERS))
 
 
 @requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs/<int:id>", methods=["GET"])
@@ -437,7 +705,7 @@ def get_requerimiento_huella_logs_by_requerimiento_recurso_id(requerimiento_recu
         db.text(sql),
         {"requerimiento_recurso_id": requerimiento_recurso_id}
     )
-    return jsonify([_serialize_requerimiento_huella_log(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_HUELLA_LOG_FIELDS, REQUERIMIENTO_HUELLA_LOG_CONVERTERS))
 
 
 @requerimiento_huella_logs_bp.route(
@@ -485,7 +753,7 @@ def get_requerimiento_huella_logs_by_requerimiento_numero_original(requerimiento
         db.text(sql),
         {"requerimiento_numero_original": requerimiento_numero_original}
     )
-    return jsonify([_serialize_requerimiento_huella_log(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_HUELLA_LOG_FIELDS, REQUERIMIENTO_HUELLA_LOG_CONVERTERS))
 
 
 @requerimiento_huella_logs_bp.route(
@@ -528,7 +796,7 @@ def get_requerimiento_huella_logs_by_requerimiento_numero(requerimiento_numero):
         db.text(sql),
         {"requerimiento_numero": requerimiento_numero}
     )
-    return jsonify([_serialize_requerimiento_huella_log(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_HUELLA_LOG_FIELDS, REQUERIMIENTO_HUELLA_LOG_CONVERTERS))
 
 
 @requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs", methods=["POST"])
@@ -585,56 +853,13 @@ def create_requerimiento_huella_log():
         description: Conflicto de secuencia unica
     """
     data = request.get_json() or {}
-    optional_fk_fields = [
-        "respuesta_estado_id",
-        "movimiento_tipo_id",
-        "usuario_emisor_id",
-        "usuario_receptor_id",
-        "coe_origen_id",
-        "mesa_origen_id",
-        "coe_destino_id",
-        "mesa_destino_id",
-        "recurso_inventario_id",
-        "motivo_id",
-    ]
-    data = _normalize_optional_fks(data, optional_fk_fields)
-
-    required_fields = [
-        "requerimiento_recurso_id",
-        "requerimiento_accion_log_id",
-        "requerimiento_estado_id",
-        "usuario_accion_id",
-        "recurso_grupo_id",
-        "recurso_tipo_id",
-    ]
-    missing_fields = [field for field in required_fields if not _validate_required_field(data, field)]
+    data = _normalize_optional_fks(data, HUELLA_OPTIONAL_FK_FIELDS)
+
+    missing_fields = [field for field in HUELLA_REQUIRED_FIELDS if not _validate_required_field(data, field)]
     if missing_fields:
         return jsonify({"error": f"Campos requeridos faltantes: {', '.join(missing_fields)}"}), 400
 
-    fk_errors = []
-    fk_checks = [
-        ("requerimiento_recurso_id", "requerimiento_recursos", True),
-        ("requerimiento_accion_log_id", "requerimiento_huella_log_acciones", True),
-        ("requerimiento_estado_id", "requerimiento_huella_log_estados", True),
-        ("respuesta_estado_id", "requerimiento_huella_log_respuesta_estados", False),
-        ("movimiento_tipo_id", "requerimiento_huella_log_movimiento_tipos", False),
-        ("usuario_accion_id", "usuarios", True),
-        ("usuario_emisor_id", "usuarios", False),
-        ("usuario_receptor_id", "usuarios", False),
-        ("coe_origen_id", "coes", False),
-        ("mesa_origen_id", "mesas", False),
-        ("coe_destino_id", "coes", False),
-        ("mesa_destino_id", "mesas", False),
-        ("recurso_grupo_id", "recurso_grupos", True),
-        ("recurso_tipo_id", "recurso_tipos", True),
-        ("recurso_inventario_id", "recursos_inventario", False),
-        ("motivo_id", "requerimiento_huella_log_motivos", False),
-    ]
-    for field_name, table_name, required in fk_checks:
-        error = _validate_fk(data, field_name, table_name, required=required)
-        if error:
-            fk_errors.append(error)
-
+    fk_errors = _validate_fks(data)
     if fk_errors:
         return jsonify({"error": "Validacion de llaves foraneas fallida", "detalles": fk_errors}), 400
 
@@ -645,76 +870,84 @@ def create_requerimiento_huella_log():
         return jsonify({"error": cantidad_error}), 400
 
     secuencia = data.get("secuencia")
-    if secuencia is None:
-        secuencia = _siguiente_secuencia(data["requerimiento_recurso_id"])
-    elif secuencia < 1:
+    if secuencia is not None and secuencia < 1:
         return jsonify({"error": "secuencia debe ser mayor o igual a 1"}), 400
 
     respuesta_fecha = data.get("respuesta_fecha", datetime.now(timezone.utc))
-    requerimiento_numero_original = _resolver_requerimiento_numero_original(
-        data["requerimiento_recurso_id"],
-        data.get("requerimiento_numero_original"),
-        data.get("requerimiento_numero")
-    )
 
+    # Sin numero original se usa el del primer evento del requerimiento o, si es
+    # el primero, el numero actual. La secuencia sale de _reservar_secuencia.
     query = db.text("""
-        INSERT INTO public.requerimiento_huella_logs (
-            requerimiento_recurso_id,
-            requerimiento_numero,
-            requerimiento_numero_original,
-            requerimiento_respuesta_situacion,
-            secuencia,
-            requerimiento_accion_log_id,
-            requerimiento_estado_id,
-            respuesta_estado_id,
-            movimiento_tipo_id,
-            usuario_accion_id,
-            usuario_emisor_id,
-            usuario_receptor_id,
-            coe_origen_id,
-            mesa_origen_id,
-            coe_destino_id,
-            mesa_destino_id,
-            recurso_grupo_id,
-            recurso_tipo_id,
-            recurso_inventario_id,
-            cantidad_solicitada,
-            cantidad_asignada,
-            motivo_id,
-            respuesta_fecha
+        WITH escrito AS (
+            INSERT INTO public.requerimiento_huella_logs (
+                requerimiento_recurso_id,
+                requerimiento_numero,
+                requerimiento_numero_original,
+                requerimiento_respuesta_situacion,
+                secuencia,
+                requerimiento_accion_log_id,
+                requerimiento_estado_id,
+                respuesta_estado_id,
+                movimiento_tipo_id,
+                usuario_accion_id,
+                usuario_emisor_id,
+                usuario_receptor_id,
+                coe_origen_id,
+                mesa_origen_id,
+                coe_destino_id,
+                mesa_destino_id,
+                recurso_grupo_id,
+                recurso_tipo_id,
+                recurso_inventario_id,
+                cantidad_solicitada,
+                cantidad_asignada,
+                motivo_id,
+                respuesta_fecha
+            )
+            VALUES (
+                :requerimiento_recurso_id,
+                :requerimiento_numero,
+                COALESCE(
+                    :requerimiento_numero_original,
+                    (
+                        SELECT COALESCE(o.requerimiento_numero_original, o.requerimiento_numero)
+                        FROM public.requerimiento_huella_logs o
+                        WHERE o.requerimiento_recurso_id = :requerimiento_recurso_id
+                            AND COALESCE(o.requerimiento_numero_original, o.requerimiento_numero) IS NOT NULL
+                        ORDER BY o.secuencia ASC, o.id ASC
+                        LIMIT 1
+                    ),
+                    :requerimiento_numero
+                ),
+                :requerimiento_respuesta_situacion,
+                :secuencia,
+                :requerimiento_accion_log_id,
+                :requerimiento_estado_id,
+                :respuesta_estado_id,
+                :movimiento_tipo_id,
+                :usuario_accion_id,
+                :usuario_emisor_id,
+                :usuario_receptor_id,
+                :coe_origen_id,
+                :mesa_origen_id,
+                :coe_destino_id,
+                :mesa_destino_id,
+                :recurso_grupo_id,
+                :recurso_tipo_id,
+                :recurso_inventario_id,
+                :cantidad_solicitada,
+                :cantidad_asignada,
+                :motivo_id,
+                :respuesta_fecha
+            )
+            RETURNING *
         )
-        VALUES (
-            :requerimiento_recurso_id,
-            :requerimiento_numero,
-            :requerimiento_numero_original,
-            :requerimiento_respuesta_situacion,
-            :secuencia,
-            :requerimiento_accion_log_id,
-            :requerimiento_estado_id,
-            :respuesta_estado_id,
-            :movimiento_tipo_id,
-            :usuario_accion_id,
-            :usuario_emisor_id,
-            :usuario_receptor_id,
-            :coe_origen_id,
-            :mesa_origen_id,
-            :coe_destino_id,
-            :mesa_destino_id,
-            :recurso_grupo_id,
-            :recurso_tipo_id,
-            :recurso_inventario_id,
-            :cantidad_solicitada,
-            :cantidad_asignada,
-            :motivo_id,
-            :respuesta_fecha
-        )
-        RETURNING id
-    """)
+    """ + _USUARIOS_ESCRITO_SQL)
 
     params = {
         "requerimiento_recurso_id": data["requerimiento_recurso_id"],
         "requerimiento_numero": data.get("requerimiento_numero"),
-        "requerimiento_numero_original": requerimiento_numero_original,
+        "requerimiento_numero_original": data.get("requerimiento_numero_original"),
         "requerimiento_respuesta_situacion": data.get("requerimiento_respuesta_situacion"),
         "secuencia": secuencia,
         "requerimiento_accion_log_id": data["requerimiento_accion_log_id"],
@@ -738,12 +971,11 @@ def create_requerimiento_huella_log():
     }
 
     try:
-        result = db.session.execute(query, params)
-        row = result.fetchone()
-        if row is None:
+        params["secuencia"] = _reservar_secuencia(data["requerimiento_recurso_id"], secuencia)
+        created_row = db.session.execute(query, params).fetchone()
+        if created_row is None:
             db.session.rollback()
             return jsonify({"error": "No se pudo crear el log historico"}), 500
-        log_id = row[0]
         db.session.commit()
     except IntegrityError as ex:
         db.session.rollback()
@@ -760,11 +992,136 @@ def create_requerimiento_huella_log():
             }), 400
         return jsonify({"error": "Error de integridad al crear log", "detalle": message}), 400
 
-    sql = _build_base_historial_query() + "\nWHERE rhl.id = :id"
-    created_row = db.session.execute(db.text(sql), {"id": log_id}).fetchone()
-    if created_row is None:
-        return jsonify({"error": "Log creado pero no encontrado"}), 500
-    return jsonify(_serialize_requerimiento_huella_log(created_row)), 201
+    return jsonify(_serialize_huella_escrita(created_row)), 201
+
+
+@requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs/bulk", methods=["POST"])
+def create_requerimiento_huella_logs_bulk():
+    """Crear varios registros de huella historica en una sola transaccion
+    ---
+    tags:
+      - Requerimiento Huella Logs
+    consumes:
+      - application/json
+    description: >
+      Recibe una lista (o un objeto con la clave `logs`) de hasta 1000 logs con
+      los mismos campos que el POST individual. Se validan todos en una pasada,
+      la `secuencia` faltante se asigna por `requerimiento_recurso_id` en el
+      orden del lote (con su contador bloqueado) y los validos se insertan
+      con un solo INSERT. Cada item de `resultados` trae su `id` o sus errores.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+    responses:
+      201:
+        description: Todos los logs fueron creados
+      207:
+        description: Se crearon los logs validos; el resto trae sus errores
+      400:
+        description: Ningun log valido o lote mal formado
+      409:
+        description: Conflicto de secuencia unica (no se inserto ningun log)
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get("logs") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Se espera una lista no vacia de logs"}), 400
+    if len(items) > HUELLA_BULK_MAX:
+        return jsonify({"error": f"El lote admite como maximo {HUELLA_BULK_MAX} logs"}), 400
+
+    resultados = [None] * len(items)
+    validos = []
+    for index, raw in enumerate(items):
+        data, errors = _prepare_bulk_item(raw)
+        if errors:
+            resultados[index] = {"index": index, "error": "Validacion fallida", "detalles": errors}
+        else:
+            validos.append((index, data))
+
+    requerimientos = {}
+    if validos:
+        existing = _existing_fk_ids([data for _index, data in validos])
+        requerimientos = _lock_requerimientos({data["requerimiento_recurso_id"] for _index, data in validos})
+        pendientes = []
+        for index, data in validos:
+            errors = []
+            for field_name, table_name, _required in HUELLA_FK_CHECKS:
+                value = data.get(field_name)
+                if value is None:
+                    continue
+                known = requerimientos if table_name == "requerimiento_recursos" else existing[table_name]
+                if value not in known:
+                    errors.append(f"{field_name} no existe en {table_name}")
+            if errors:
+                resultados[index] = {"index": index, "error": "Validacion de llaves foraneas fallida", "detalles": errors}
+            else:
+                pendientes.append((index, data))
+        validos = pendientes
+
+    # Secuencia y numero original como si los logs se hubieran enviado uno a uno
+    siguiente = {rid: row.max_secuencia + 1 for rid, row in requerimientos.items()}
+    numero_original = {rid: row.numero_original for rid, row in requerimientos.items()}
+    ocupadas = set()
+    filas = []
+    for index, data in validos:
+        rid = data["requerimiento_recurso_id"]
+        secuencia = data.get("secuencia")
+        if secuencia is None:
+            secuencia = siguiente[rid]
+            while (rid, secuencia) in ocupadas:
+                secuencia += 1
+        elif (rid, secuencia) in ocupadas:
+            resultados[index] = {
+                "index": index,
+                "error": "Secuencia repetida dentro del lote para este requerimiento_recurso_id",
+            }
+            continue
+        ocupadas.add((rid, secuencia))
+        siguiente[rid] = max(siguiente[rid], secuencia + 1)
+
+        original = data.get("requerimiento_numero_original")
+        if original is None:
+            original = numero_original[rid]
+        if original is None:
+            original = data.get("requerimiento_numero")
+        if numero_original[rid] is None:
+            numero_original[rid] = original
+
+        filas.append((index, {**data, "secuencia": secuencia, "requerimiento_numero_original": original}))
+
+    if not filas:
+        db.session.rollback()
+        return jsonify({"insertados": 0, "errores": len(items), "resultados": resultados}), 400
+
+    try:
+        _guardar_contadores({rid: ultima - 1 for rid, ultima in siguiente.items()})
+        ids = _insert_huella_logs([fila for _index, fila in filas])
+        db.session.commit()
+    except IntegrityError as ex:
+        db.session.rollback()
+        message = str(getattr(ex, "orig", ex))
+        if "uq_req_huella_secuencia" in message:
+            return jsonify({
+                "error": "Ya existe la secuencia para algun requerimiento_recurso_id del lote",
+                "detalle": message
+            }), 409
+        return jsonify({"error": "Error de integridad al crear los logs", "detalle": message}), 400
+
+    for index, fila in filas:
+        key = (fila["requerimiento_recurso_id"], fila["secuencia"])
+        resultados[index] = {"index": index, "id": ids.get(key), "secuencia": fila["secuencia"]}
+
+    errores = len(items) - len(filas)
+    return jsonify({
+        "insertados": len(filas),
+        "errores": errores,
+        "resultados": resultados,
+    }), 201 if errores == 0 else 207
 
 
 @requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs/<int:id>", methods=["PUT"])
@@ -869,64 +1226,45 @@ def update_requerimiento_huella_log(id):
     if cantidad_error:
         return jsonify({"error": cantidad_error}), 400
 
-    fk_data = candidate
-    fk_errors = []
-    fk_checks = [
-        ("requerimiento_recurso_id", "requerimiento_recursos", True),
-        ("requerimiento_accion_log_id", "requerimiento_huella_log_acciones", True),
-        ("requerimiento_estado_id", "requerimiento_huella_log_estados", True),
-        ("respuesta_estado_id", "requerimiento_huella_log_respuesta_estados", False),
-        ("movimiento_tipo_id", "requerimiento_huella_log_movimiento_tipos", False),
-        ("usuario_accion_id", "usuarios", True),
-        ("usuario_emisor_id", "usuarios", False),
-        ("usuario_receptor_id", "usuarios", False),
-        ("coe_origen_id", "coes", False),
-        ("mesa_origen_id", "mesas", False),
-        ("coe_destino_id", "coes", False),
-        ("mesa_destino_id", "mesas", False),
-        ("recurso_grupo_id", "recurso_grupos", True),
-        ("recurso_tipo_id", "recurso_tipos", True),
-        ("recurso_inventario_id", "recursos_inventario", False),
-        ("motivo_id", "requerimiento_huella_log_motivos", False),
-    ]
-    for field_name, table_name, required in fk_checks:
-        error = _validate_fk(fk_data, field_name, table_name, required=required)
-        if error:
-            fk_errors.append(error)
+    fk_errors = _validate_fks(candidate)
     if fk_errors:
         return jsonify({"error": "Validacion de llaves foraneas fallida", "detalles": fk_errors}), 400
 
     query = db.text("""
-        UPDATE public.requerimiento_huella_logs
-        SET requerimiento_recurso_id = :requerimiento_recurso_id,
-            requerimiento_numero = :requerimiento_numero,
-            requerimiento_numero_original = :requerimiento_numero_original,
-            requerimiento_respuesta_situacion = :requerimiento_respuesta_situacion,
-            secuencia = :secuencia,
-            requerimiento_accion_log_id = :requerimiento_accion_log_id,
-            requerimiento_estado_id = :requerimiento_estado_id,
-            respuesta_estado_id = :respuesta_estado_id,
-            movimiento_tipo_id = :movimiento_tipo_id,
-            usuario_accion_id = :usuario_accion_id,
-            usuario_emisor_id = :usuario_emisor_id,
-            usuario_receptor_id = :usuario_receptor_id,
-            coe_origen_id = :coe_origen_id,
-            mesa_origen_id = :mesa_origen_id,
-            coe_destino_id = :coe_destino_id,
-            mesa_destino_id = :mesa_destino_id,
-            recurso_grupo_id = :recurso_grupo_id,
-            recurso_tipo_id = :recurso_tipo_id,
-            recurso_inventario_id = :recurso_inventario_id,
-            cantidad_solicitada = :cantidad_solicitada,
-            cantidad_asignada = :cantidad_asignada,
-            motivo_id = :motivo_id,
-            respuesta_fecha = :respuesta_fecha
-        WHERE id = :id
-    """)
+        WITH escrito AS (
+            UPDATE public.requerimiento_huella_logs
+            SET requerimiento_recurso_id = :requerimiento_recurso_id,
+                requerimiento_numero = :requerimiento_numero,
+                requerimiento_numero_original = :requerimiento_numero_original,
+                requerimiento_respuesta_situacion = :requerimiento_respuesta_situacion,
+                secuencia = :secuencia,
+                requerimiento_accion_log_id = :requerimiento_accion_log_id,
+                requerimiento_estado_id = :requerimiento_estado_id,
+                respuesta_estado_id = :respuesta_estado_id,
+                movimiento_tipo_id = :movimiento_tipo_id,
+                usuario_accion_id = :usuario_accion_id,
+                usuario_emisor_id = :usuario_emisor_id,
+                usuario_receptor_id = :usuario_receptor_id,
+                coe_origen_id = :coe_origen_id,
+                mesa_origen_id = :mesa_origen_id,
+                coe_destino_id = :coe_destino_id,
+                mesa_destino_id = :mesa_destino_id,
+                recurso_grupo_id = :recurso_grupo_id,
+                recurso_tipo_id = :recurso_tipo_id,
+                recurso_inventario_id = :recurso_inventario_id,
+                cantidad_solicitada = :cantidad_solicitada,
+                cantidad_asignada = :cantidad_asignada,
+                motivo_id = :motivo_id,
+                respuesta_fecha = :respuesta_fecha
+            WHERE id = :id
+            RETURNING *
+        )
+    """ + _USUARIOS_ESCRITO_SQL)
     params = {"id": id, **candidate}
 
     try:
-        db.session.execute(query, params)
+        _reservar_secuencia(candidate["requerimiento_recurso_id"], candidate["secuencia"])
+        updated = db.session.execute(query, params).fetchone()
         db.session.commit()
     except IntegrityError as ex:
         db.session.rollback()
@@ -943,11 +1281,9 @@ def update_requerimiento_huella_log(id):
             }), 400
         return jsonify({"error": "Error de integridad al actualizar log", "detalle": message}), 400
 
-    sql = _build_base_historial_query() + "\nWHERE rhl.id = :id"
-    updated = db.session.execute(db.text(sql), {"id": id}).fetchone()
     if updated is None:
         return jsonify({"error": "Log no encontrado despues de actualizar"}), 500
-    return jsonify(_serialize_requerimiento_huella_log(updated))
+    return jsonify(_serialize_huella_escrita(updated))
 
 
 @requerimiento_huella_logs_bp.route("/api/requerimiento-huella-logs/<int:id>", methods=["DELETE"])
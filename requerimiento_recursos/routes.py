@@ -1,6 +1,7 @@
 from flask import request, jsonify, g
 from requerimiento_recursos import requerimiento_recursos_bp
 from models import db
+from utils.row_serializer import serialize_row, serialize_rows
 from datetime import datetime, timezone
 
 def _requerimiento_estado_existe(requerimiento_estado_id):
@@ -16,39 +17,7 @@ def _requerimiento_estado_existe(requerimiento_estado_id):
 
 
 def _serialize_requerimiento_recurso(row):
-    row_mapping = getattr(row, '_mapping', {})
-
-    def _get_optional(column_name):
-        if column_name in row_mapping:
-            return row_mapping[column_name]
-        upper_column_name = column_name.upper()
-        if upper_column_name in row_mapping:
-            return row_mapping[upper_column_name]
-        return None
-
-    return {
-        'id': row.id,
-        'requerimiento_numero': row.requerimiento_numero,
-        'requerimiento_estado_id': row.requerimiento_estado_id,
-        'usuario_receptor_id': row.usuario_receptor_id,
-        "usuario_receptor": _get_optional('usuario_receptor'),
-        'recurso_grupo_id': row.recurso_grupo_id,
-        'grupo_recurso': _get_optional('grupo_recurso'),
-        'recurso_tipo_id': row.recurso_tipo_id,
-        'cantidad_solicitada': row.cantidad_solicitada,
-        'costo': _to_float_optional(row.costo),
-        'porcentaje_avance': getattr(row, 'porcentaje_avance', None),
-        'especificaciones': row.especificaciones,
-        'destino': row.destino,
-        'detalle': row.detalle,
-        'activo': row.activo,
-        'creador': row.creador,
-        'creacion': _to_iso_optional(row.creacion),
-        'modificador': row.modificador,
-        'modificacion': _to_iso_optional(row.modificacion),
-        "usuario_emisor_id": row.usuario_emisor_id,
-        "usuario_emisor": _get_optional('usuario_emisor'),
-    }
+    return serialize_row(row, REQUERIMIENTO_RECURSO_FIELDS, REQUERIMIENTO_RECURSO_CONVERTERS)
 
 
 def _resolve_authenticated_user():
@@ -83,6 +52,37 @@ def _to_iso_optional(value):
     return str(value)
 
 
+REQUERIMIENTO_RECURSO_FIELDS = (
+    'id',
+    'requerimiento_numero',
+    'requerimiento_estado_id',
+    'usuario_receptor_id',
+    'usuario_receptor',
+    'recurso_grupo_id',
+    'grupo_recurso',
+    'recurso_tipo_id',
+    'cantidad_solicitada',
+    'costo',
+    'porcentaje_avance',
+    'especificaciones',
+    'destino',
+    'detalle',
+    'activo',
+    'creador',
+    'creacion',
+    'modificador',
+    'modificacion',
+    'usuario_emisor_id',
+    'usuario_emisor',
+)
+
+REQUERIMIENTO_RECURSO_CONVERTERS = {
+    'costo': _to_float_optional,
+    'creacion': _to_iso_optional,
+    'modificacion': _to_iso_optional,
+}
+
+
 @requerimiento_recursos_bp.route('/api/requerimiento-recursos', methods=['GET'])
 def get_requerimiento_recursos():
     """Listar todos los requerimientos de recursos.
@@ -124,7 +124,7 @@ def get_requerimiento_recursos():
         description: Error inesperado al obtener los requerimientos de recursos
     """
     result = db.session.execute(db.text("SELECT * FROM requerimiento_recursos ORDER BY id DESC"))
-    return jsonify([_serialize_requerimiento_recurso(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_RECURSO_FIELDS, REQUERIMIENTO_RECURSO_CONVERTERS))
 
 
 @requerimiento_recursos_bp.route('/api/requerimiento-recursos', methods=['POST'])
@@ -309,7 +309,7 @@ def get_requerimiento_recursos_by_usuario_receptor(usuario_receptor_id):
         """),
         {'usuario_receptor_id': usuario_receptor_id}
     )
-    return jsonify([_serialize_requerimiento_recurso(row) for row in result])
+    return jsonify(serialize_rows(result, REQUERIMIENTO_RECURSO_FIELDS, REQUERIMIENTO_RECURSO_CONVERTERS))
 
 
 @requerimiento_recursos_bp.route('/api/requerimiento-recursos/id/<int:id>', methods=['GET'])
@@ -0,0 +1,74 @@
+"""
+Contadores de version por tabla (``tabla_versiones``).
+
+Cada escritura exitosa (POST/PUT/PATCH/DELETE con respuesta < 400) de un
+blueprint registrado con ``track_blueprint_writes`` incrementa la version de
+las tablas que escribe. Los usan la cache de catalogos para saber que recargar
+y las respuestas condicionales (ETag) para saber si un listado cambio.
+
+Las tablas que no se escriben por la API quedan en version 0; si se cambian a
+mano hay que incrementar su fila en ``tabla_versiones``.
+"""
+from flask import request
+
+from models import db
+
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+_VERSIONS_SQL = """
+    SELECT tabla, version
+    FROM public.tabla_versiones
+    WHERE tabla = ANY(:tablas)
+"""
+
+_BUMP_SQL = """
+    INSERT INTO public.tabla_versiones (tabla, version, actualizado)
+    VALUES (:tabla, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (tabla) DO UPDATE
+    SET version = public.tabla_versiones.version + 1,
+        actualizado = CURRENT_TIMESTAMP
+"""
+
+_blueprint_tables = {}  # blueprint -> tablas que escribe
+_listeners = []
+
+
+def track_blueprint_writes(blueprint, tables=None):
+    """Registra las tablas que escribe ``blueprint`` (por defecto, la de su mismo nombre)."""
+    _blueprint_tables.setdefault(blueprint, set()).update(tables or (blueprint,))
+
+
+def on_tables_changed(callback):
+    """``callback(tablas)`` se llama en este proceso despues de cada incremento."""
+    _listeners.append(callback)
+
+
+def read_versions(tables):
+    """``{tabla: version}`` para ``tables``; las que nunca se escribieron valen 0."""
+    tables = list(tables)
+    result = db.session.execute(db.text(_VERSIONS_SQL), {'tablas': tables})
+    versions = dict.fromkeys(tables, 0)
+    versions.update((row.tabla, row.version) for row in result)
+    return versions
+
+
+def bump_versions(tables):
+    tables = sorted(tables)
+    for callback in _listeners:
+        callback(tables)
+    for table in tables:
+        db.session.execute(db.text(_BUMP_SQL), {'tabla': table})
+    db.session.commit()
+
+
+def init_table_versions(app):
+    @app.after_request
+    def bump_versions_on_write(response):
+        tables = _blueprint_tables.get(request.blueprint)
+        if tables and request.method in WRITE_METHODS and response.status_code < 400:
+            try:
+                bump_versions(tables)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('No se pudo incrementar la version de %s', ', '.join(sorted(tables)))
+        return response
@@ -1,10 +1,12 @@
-from flask import request, jsonify
+from flask import request, jsonify, g, current_app
 from usuarios import usuarios_bp
 from models import db
 from datetime import datetime, timezone
 from schemas import UsuarioCreateSchema, UsuarioUpdateSchema, LoginSchema, UsuarioResponseSchema
 from marshmallow import ValidationError
-from auth import hash_password, verify_password, generate_token
+from auth import hash_password, verify_password, generate_token, password_hasher, PasswordHasherBusy
+from login_bootstrap import build_bootstrap, datos_login
+from public_routes import public_route
 from typing import cast, Dict, Any
 
 from utils.db_helpers import check_row_or_abort
@@ -57,6 +59,7 @@ def get_usuarios():
     return jsonify(usuarios)
 
 @usuarios_bp.route('/api/usuarios', methods=['POST'])
+@public_route
 def create_usuario():
     """Crear usuario
     ---
@@ -339,57 +342,10 @@ def get_datos_login(usuario_id):
       404:
         description: No encontrado
     """
-    query = db.text("""
-      SELECT u.institucion_id usuario_institucion_id
-      , u.usuario usuario_login
-      , u.id usuario_id
-      , u.descripcion usuario_descripcion
-      , ux.coe_id
-      , c.siglas coe_abreviatura
-      , ux.perfil_id
-      , pf.nombre perfil_nombre
-      , ux.provincia_id
-      , COALESCE(p.nombre,'--') provincia_nombre
-      , ux.canton_id
-      , COALESCE(k.nombre,'--') canton_nombre
-      , ux.mesa_id
-      , m.nombre mesa_nombre
-      , m.siglas mesa_siglas
-      , g.id mesa_grupo_id
-      , g.nombre mesa_grupo_nombre
-      FROM public.usuarios u 
-      INNER JOIN public.usuario_perfil_coe_dpa_mesa ux ON u.id = ux.usuario_id
-      INNER JOIN public.perfiles pf ON ux.perfil_id = pf.id
-      INNER JOIN public.coes c ON ux.coe_id = c.id
-      LEFT JOIN public.provincias p ON ux.provincia_id = p.id
-      LEFT JOIN public.cantones k ON ux.provincia_id = k.provincia_id AND ux.canton_id = k.id
-      LEFT JOIN public.mesas m ON ux.mesa_id = m.id
-      LEFT JOIN public.mesa_grupos g ON m.mesa_grupo_id = g.id
-      WHERE u.id = :usuario_id
-    """)
-    result = db.session.execute(query, {'usuario_id': usuario_id})
-    row = result.fetchone()
-    if not row:
+    datos = datos_login(usuario_id)
+    if datos is None:
         return jsonify({'error': 'Datos de login no encontrados'}), 404
-    return jsonify({
-        'usuario_institucion_id': row.usuario_institucion_id,
-        'usuario_login': row.usuario_login,
-        'usuario_id': row.usuario_id,
-        'usuario_descripcion': row.usuario_descripcion, 
-        'coe_id': row.coe_id,
-        'coe_abreviatura': row.coe_abreviatura,
-        'perfil_id': row.perfil_id,
-        'perfil_nombre': row.perfil_nombre,
-        'provincia_id': row.provincia_id,
-        'provincia_nombre': row.provincia_nombre,
-        'canton_id': row.canton_id,
-        'canton_nombre': row.canton_nombre,
-        'mesa_id': row.mesa_id,
-        'mesa_nombre': row.mesa_nombre,
-        'mesa_siglas': row.mesa_siglas,
-        'mesa_grupo_id': row.mesa_grupo_id,
-        'mesa_grupo_nombre': row.mesa_grupo_nombre
-    })
+    return jsonify(datos)
 
 # Las opciones CORS preflight son manejadas por la configuración global de CORS
 
@@ -471,7 +427,47 @@ def get_usuario_nivel_superior(usuario_id_origen):
 
     return jsonify(rows)
 
+@usuarios_bp.route('/api/usuarios/bootstrap', methods=['GET'])
+def get_bootstrap_usuario():
+    """Datos iniciales de la sesion del usuario del token
+    ---
+    tags:
+      - Usuarios
+    description: >
+      Mismo contenido que el login con ?bootstrap=true, sin el token: ambito
+      (datos_login), menus autorizados, emergencias activas y COE activados
+      visibles. Sirve para recargar la sesion sin volver a autenticar.
+    responses:
+      200:
+        description: datos_login, menus, emergencias y coes_activados
+      401:
+        description: Token invalido
+    """
+    user = g.get('user') or {}
+    if 'user_id' not in user or 'usuario' not in user:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+    return jsonify(build_bootstrap(user['user_id'], user['usuario']))
+
+def _rehash_clave(usuario_row, clave):
+    """Regraba la clave con el costo bcrypt configurado si el hash usa otro."""
+    try:
+        nueva_clave = password_hasher.rehash_if_needed(clave, usuario_row.clave)
+    except PasswordHasherBusy:
+        return  # se intenta en el proximo login
+    if nueva_clave is None:
+        return
+    try:
+        db.session.execute(
+            db.text("UPDATE usuarios SET clave = :clave WHERE id = :id AND clave = :clave_anterior"),
+            {'clave': nueva_clave, 'id': usuario_row.id, 'clave_anterior': usuario_row.clave}
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('No se pudo actualizar el hash de la clave del usuario %s', usuario_row.id)
+
 @usuarios_bp.route('/api/usuarios/login', methods=['POST'])
+@public_route
 def login_usuario():
    
     data = request.get_json()
@@ -498,6 +494,7 @@ def login_usuario():
     check_row_or_abort(usuario_row, 'Not found', 404)
     
     if usuario_row and verify_password(validated_data['clave'], usuario_row.clave):
+        _rehash_clave(usuario_row, validated_data['clave'])
         # Build token payload; include roles later (example: fetch perfiles)
         payload = {
             'user_id': usuario_row.id,
@@ -512,10 +509,14 @@ def login_usuario():
             'usuario': usuario_row.usuario,
             'descripcion': usuario_row.descripcion
         }))
-        return jsonify({
+        respuesta = {
             'success': True,
             'token': token,
             **safe_data
-        }), 200
+        }
+        # ?bootstrap=true: ambito, menus, emergencias y COE en la misma respuesta
+        if request.args.get('bootstrap', '').lower() in ('1', 'true'):
+            respuesta.update(build_bootstrap(usuario_row.id, usuario_row.usuario))
+        return jsonify(respuesta), 200
     else:
         return jsonify({'success': False}), 200
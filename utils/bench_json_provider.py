@@ -0,0 +1,127 @@
+"""
+Micro-benchmark del proveedor JSON de la app: stdlib vs orjson.
+
+    python -m utils.bench_json_provider [--rows 20000]
+
+Compara, sobre payloads con la forma de /api/barrido_monitoreo (lista de filas)
+y de los feeds GeoJSON (FeatureCollection):
+
+- stdlib (filas ya convertidas): lo que hacia jsonify antes, con .isoformat() y
+  float() aplicados fila a fila por la ruta (la conversion se cuenta en el tiempo).
+- FastJSONProvider / stdlib: filas crudas, datetime y Decimal via json_default.
+- FastJSONProvider / orjson: filas crudas, codificacion nativa.
+"""
+import argparse
+import gc
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from json_provider import FastJSONProvider
+
+
+def make_rows(count):
+    base = datetime(2026, 1, 1)
+    return [
+        {
+            'id': i,
+            'barrido_id': 7,
+            'emergencia_nombre': 'Emergencia Volcán Cotopaxi',
+            'monitoreo_fecha': base + timedelta(minutes=i),
+            'provincia_nombre': 'Pichincha',
+            'canton_nombre': 'Quito',
+            'sector': f'Sector {i % 50}',
+            'longitud': Decimal('-78.512345'),
+            'latitud': Decimal('-0.223456'),
+            'intensidad_id': i % 5,
+            'observaciones': None,
+            'activo': True,
+            'creador': 'admin',
+            'creacion': base,
+            'modificacion': None,
+        }
+        for i in range(count)
+    ]
+
+
+def make_features(rows):
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [row['longitud'], row['latitud']]},
+                'properties': row,
+            }
+            for row in rows
+        ],
+        'metadata': {'count': len(rows)},
+    }
+
+
+def preconvert(value):
+    # Lo que hacen hoy las rutas antes de jsonify
+    if isinstance(value, dict):
+        return {k: preconvert(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [preconvert(v) for v in value]
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _measure(label, func, repeat=3):
+    elapsed = None
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size = len(func())
+            run = time.perf_counter() - started
+            elapsed = run if elapsed is None else min(elapsed, run)
+    finally:
+        gc.enable()
+    print(f'  {label:<38} {elapsed * 1000:9.1f} ms  {size / 1024:10.0f} KiB')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark del proveedor JSON')
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    rows = make_rows(args.rows)
+    payloads = {
+        'filas (barrido_monitoreo)': rows,
+        'FeatureCollection (geoJson)': make_features(rows),
+    }
+
+    for name, payload in payloads.items():
+        print(f'{name}: {args.rows} filas')
+        _measure('stdlib + conversion por fila', lambda: stdlib.dumps(preconvert(payload)))
+
+        engine = json_provider.orjson
+        json_provider.orjson = None
+        try:
+            _measure('FastJSONProvider (stdlib)', lambda: fast.dumps(payload))
+        finally:
+            json_provider.orjson = engine
+
+        if engine is None:
+            print('  orjson no instalado: se omite')
+        else:
+            _measure('FastJSONProvider (orjson)', lambda: fast.dumps(payload))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
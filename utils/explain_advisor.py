@@ -0,0 +1,218 @@
+"""
+Asesor de indices: corre EXPLAIN sobre las consultas SQL de los blueprints.
+
+    python -m utils.explain_advisor [--min-rows 10000] [--path eventos] [--verbose]
+
+Recorre el codigo con ``ast`` y junta cada ``db.text("...")`` cuyo SQL sea
+constante (o un f-string que solo use constantes de modulo, como TABLE_NAME).
+Los binds ``:param`` se pasan como ``$n`` con ``EXPLAIN (GENERIC_PLAN)``
+(Postgres 16+); en versiones previas se reemplazan por NULL. EXPLAIN sin
+ANALYZE no ejecuta la sentencia, igual cada una corre en una transaccion que
+se descarta.
+
+Reporta los Seq Scan sobre tablas con mas de ``--min-rows`` filas estimadas
+(pg_class.reltuples). Sale con codigo 1 si encontro alguno.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKIP_DIRS = {'.git', '__pycache__', 'utils', 'migrations', 'deploy', 'docs'}
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+BIND_PARAM = re.compile(r'(?<![:\w]):(\w+)')
+
+
+def _iter_sources(paths):
+    for base in paths:
+        base = os.path.join(ROOT, base)
+        if os.path.isfile(base):
+            yield base
+            continue
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    yield os.path.join(dirpath, filename)
+
+
+def _module_constants(tree):
+    constants = {}
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def _render(node, constants):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            elif (
+                isinstance(value, ast.FormattedValue)
+                and isinstance(value.value, ast.Name)
+                and value.value.id in constants
+            ):
+                parts.append(constants[value.value.id])
+            else:
+                return None
+        return ''.join(parts)
+    return None
+
+
+def collect_statements(paths=('.',)):
+    """Devuelve ``(statements, skipped)``: [(archivo, linea, sql)] y cuantos eran dinamicos."""
+    statements = []
+    skipped = 0
+    for filename in _iter_sources(paths):
+        with open(filename, encoding='utf-8') as handle:
+            try:
+                tree = ast.parse(handle.read(), filename)
+            except SyntaxError:
+                continue
+        constants = _module_constants(tree)
+        relative = os.path.relpath(filename, ROOT)
+        for node in ast.walk(tree):
+            if not (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'text'
+                and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == 'db'
+                and node.args
+            ):
+                continue
+            sql = _render(node.args[0], constants)
+            if sql is None:
+                skipped += 1
+                continue
+            if sql.lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+                statements.append((relative, node.lineno, sql.strip()))
+    return statements, skipped
+
+
+def _numbered_params(sql):
+    numbers = {}
+
+    def replace(match):
+        name = match.group(1)
+        if name not in numbers:
+            numbers[name] = len(numbers) + 1
+        return f'${numbers[name]}'
+
+    return BIND_PARAM.sub(replace, sql)
+
+
+def _seq_scans(plan):
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan.get('Relation Name'), plan.get('Plan Rows'), plan.get('Total Cost')
+    for child in plan.get('Plans', ()):
+        yield from _seq_scans(child)
+
+
+class Explainer:
+    def __init__(self, raw_connection):
+        self.conn = raw_connection
+        self.generic_plan = True
+        self._reltuples = {}
+
+    def _run(self, sql):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql)
+            return cur.fetchone()[0]
+        finally:
+            cur.close()
+            self.conn.rollback()
+
+    def explain(self, sql):
+        if self.generic_plan:
+            try:
+                return self._load(self._run(f'EXPLAIN (FORMAT JSON, GENERIC_PLAN) {_numbered_params(sql)}'))
+            except Exception as exc:
+                if 'GENERIC_PLAN' not in str(exc).upper():
+                    raise
+                self.generic_plan = False
+        return self._load(self._run(f'EXPLAIN (FORMAT JSON) {BIND_PARAM.sub("NULL", sql)}'))
+
+    @staticmethod
+    def _load(result):
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]['Plan']
+
+    def reltuples(self, relation):
+        if relation not in self._reltuples:
+            value = self._run(
+                "SELECT COALESCE(MAX(reltuples), 0) FROM pg_class "
+                f"WHERE relname = '{relation.replace(chr(39), chr(39) * 2)}'"
+            )
+            self._reltuples[relation] = int(value or 0)
+        return self._reltuples[relation]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EXPLAIN de las consultas de los blueprints')
+    parser.add_argument('--min-rows', type=int, default=10000,
+                        help='reportar Seq Scan sobre tablas con mas filas estimadas que esto')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='limitar a un modulo o carpeta (repetible)')
+    parser.add_argument('--verbose', action='store_true', help='mostrar tambien errores de EXPLAIN')
+    args = parser.parse_args(argv)
+
+    statements, skipped = collect_statements(args.paths or ('.',))
+    print(f'{len(statements)} sentencias a analizar ({skipped} db.text dinamicos omitidos)')
+
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import create_engine
+    from config import DATABASE_URL
+
+    engine = create_engine(DATABASE_URL)
+    raw = engine.raw_connection()
+    explainer = Explainer(raw)
+    findings = 0
+    errors = 0
+    try:
+        for filename, lineno, sql in statements:
+            try:
+                plan = explainer.explain(sql)
+            except Exception as exc:
+                errors += 1
+                if args.verbose:
+                    print(f'{filename}:{lineno}: EXPLAIN fallo: {str(exc).splitlines()[0]}')
+                continue
+            for relation, plan_rows, cost in _seq_scans(plan):
+                if relation is None:
+                    continue
+                table_rows = explainer.reltuples(relation)
+                if table_rows < args.min_rows:
+                    continue
+                findings += 1
+                print(
+                    f'{filename}:{lineno}: Seq Scan en {relation} '
+                    f'(~{table_rows} filas, plan {plan_rows} filas, costo {cost})'
+                )
+    finally:
+        raw.close()
+        engine.dispose()
+
+    mode = 'GENERIC_PLAN' if explainer.generic_plan else 'binds como NULL'
+    print(f'{findings} Seq Scan sobre tablas >= {args.min_rows} filas; {errors} sentencias sin plan ({mode})')
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""
+Reconciliacion de recursos_inventario_disponibilidad contra sus tablas de origen.
+
+    python -m utils.reconciliar_disponibilidad [--reparar] [--mostrar 20]
+
+Compara cada fila de la tabla mantenida por triggers (migracion 0007) con el
+calculo completo de la vista ``recursos_inventario_disponibilidad_calculada``
+y reporta los recursos con diferencias (incluidos los que no tienen fila).
+Con ``--reparar`` reescribe las filas con diferencias desde la vista, con las
+tablas de origen bloqueadas en modo SHARE mientras dura la correccion.
+
+Sale con codigo 1 si encontro diferencias y no se pidio ``--reparar``.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLUMNS = ('existencias', 'comprometido', 'asignado_en_uso', 'movilizado')
+
+DIFERENCIAS_SQL = """
+    SELECT
+        c.recurso_inventario_id,
+        d.recurso_inventario_id IS NULL AS faltante,
+        {selects}
+    FROM recursos_inventario_disponibilidad_calculada c
+    LEFT JOIN recursos_inventario_disponibilidad d
+        ON d.recurso_inventario_id = c.recurso_inventario_id
+    WHERE d.recurso_inventario_id IS NULL
+       OR {distinct}
+    ORDER BY c.recurso_inventario_id
+""".format(
+    selects=',\n        '.join(f'c.{col} AS {col}, d.{col} AS {col}_tabla' for col in COLUMNS),
+    distinct='\n       OR '.join(f'c.{col} IS DISTINCT FROM d.{col}' for col in COLUMNS),
+)
+
+LOCK_SQL = 'LOCK TABLE requerimiento_respuestas, recursos_movilizados, recursos_inventario IN SHARE MODE'
+
+REPARAR_SQL = """
+    INSERT INTO recursos_inventario_disponibilidad AS d (
+        recurso_inventario_id, existencias, comprometido, asignado_en_uso, movilizado
+    )
+    SELECT recurso_inventario_id, existencias, comprometido, asignado_en_uso, movilizado
+    FROM recursos_inventario_disponibilidad_calculada
+    WHERE recurso_inventario_id = ANY(:ids)
+    ON CONFLICT (recurso_inventario_id) DO UPDATE
+    SET existencias = EXCLUDED.existencias,
+        comprometido = EXCLUDED.comprometido,
+        asignado_en_uso = EXCLUDED.asignado_en_uso,
+        movilizado = EXCLUDED.movilizado,
+        actualizado = CURRENT_TIMESTAMP
+"""
+
+
+def _describir(row):
+    if row.faltante:
+        return f'recurso_inventario_id {row.recurso_inventario_id}: sin fila en la tabla'
+    partes = [
+        f'{col} {getattr(row, col + "_tabla")} -> {getattr(row, col)}'
+        for col in COLUMNS
+        if getattr(row, col) != getattr(row, col + '_tabla')
+    ]
+    return f'recurso_inventario_id {row.recurso_inventario_id}: ' + ', '.join(partes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara y corrige recursos_inventario_disponibilidad')
+    parser.add_argument('--reparar', action='store_true', help='reescribir las filas con diferencias')
+    parser.add_argument('--mostrar', type=int, default=20, help='cuantas diferencias listar')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import create_engine, text
+    from config import DATABASE_URL
+
+    engine = create_engine(DATABASE_URL)
+    try:
+        with engine.begin() as conn:
+            if args.reparar:
+                # Sin escrituras concurrentes entre la comparacion y la correccion
+                conn.execute(text(LOCK_SQL))
+            diferencias = conn.execute(text(DIFERENCIAS_SQL)).fetchall()
+            total = conn.execute(text('SELECT COUNT(*) FROM recursos_inventario')).scalar()
+
+            for row in diferencias[:args.mostrar]:
+                print(_describir(row))
+            if len(diferencias) > args.mostrar:
+                print(f'... y {len(diferencias) - args.mostrar} mas')
+            print(f'{len(diferencias)} de {total} recursos con diferencias')
+
+            if args.reparar and diferencias:
+                conn.execute(text(REPARAR_SQL), {'ids': [row.recurso_inventario_id for row in diferencias]})
+                print(f'{len(diferencias)} filas recalculadas')
+    finally:
+        engine.dispose()
+
+    return 1 if diferencias and not args.reparar else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
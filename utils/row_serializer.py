@@ -0,0 +1,121 @@
+"""
+Serializadores de filas compilados a partir de la metadata del resultado.
+
+En vez de resolver columnas con getattr/_mapping y preguntar hasattr(v, 'isoformat')
+en cada celda, se arma una vez por forma de consulta (columnas + campos + conversores)
+una funcion especializada ``row -> dict`` que accede por indice, y se reutiliza
+para todas las filas (y para las siguientes consultas con la misma forma).
+"""
+from functools import lru_cache
+
+# OIDs de Postgres para date, time, timestamp, timestamptz y timetz
+# (``type_code`` de cursor.description en psycopg)
+_TEMPORAL_TYPE_CODES = frozenset({1082, 1083, 1114, 1184, 1266})
+
+
+def to_iso(value):
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def _iso_if_temporal(value):
+    if hasattr(value, 'isoformat'):
+        try:
+            return value.isoformat()
+        except Exception:
+            return value
+    return value
+
+
+def _temporal_mask(result):
+    """Por columna: True/False si el driver informa el tipo, None si no se sabe."""
+    try:
+        description = result.cursor.description
+    except Exception:
+        return None
+    if not description:
+        return None
+    return tuple(
+        column[1] in _TEMPORAL_TYPE_CODES if isinstance(column[1], int) else None
+        for column in description
+    )
+
+
+@lru_cache(maxsize=256)
+def _compile(columns, fields, converters, temporal):
+    index = {}
+    for position, column in enumerate(columns):
+        index.setdefault(column, position)
+
+    converter_by_field = dict(converters)
+    namespace = {}
+    items = []
+    for n, field in enumerate(fields):
+        position = index.get(field)
+        if position is None:
+            position = index.get(field.upper())
+        if position is None:
+            items.append(f'{field!r}: None')
+            continue
+
+        convert = converter_by_field.get(field)
+        if convert is None and temporal is not None:
+            # Modo generico (todas las columnas): solo fechas/horas a ISO
+            is_temporal = temporal[position] if position < len(temporal) else None
+            if is_temporal is None:
+                convert = _iso_if_temporal
+            elif is_temporal:
+                convert = to_iso
+
+        if convert is None:
+            items.append(f'{field!r}: row[{position}]')
+        else:
+            namespace[f'_c{n}'] = convert
+            items.append(f'{field!r}: _c{n}(row[{position}])')
+
+    source = 'def serialize(row):\n    return {' + ', '.join(items) + '}\n'
+    exec(source, namespace)
+    return namespace['serialize']
+
+
+def compile_row_serializer(columns, fields=None, converters=None, temporal=None):
+    """
+    Devuelve ``serialize(row) -> dict`` para filas indexables con ``columns``.
+
+    - fields: campos de salida en orden; los que no vienen en la consulta salen
+      como None (se busca tambien el nombre en mayusculas). Sin ``fields`` se
+      serializan todas las columnas y las fechas/horas salen en ISO 8601.
+    - converters: {campo: funcion} aplicada al valor de ese campo.
+    - temporal: mascara por columna (ver ``_temporal_mask``); solo aplica sin fields.
+    """
+    columns = tuple(columns)
+    generic = fields is None
+    if generic:
+        fields = columns
+        if temporal is None:
+            temporal = (None,) * len(columns)
+    else:
+        temporal = None
+    return _compile(
+        columns,
+        tuple(fields),
+        tuple(sorted((converters or {}).items())),
+        tuple(temporal) if temporal is not None else None,
+    )
+
+
+def serialize_rows(result, fields=None, converters=None):
+    """Serializa todas las filas de un resultado de ``db.session.execute``."""
+    serialize = compile_row_serializer(
+        result.keys(),
+        fields,
+        converters,
+        _temporal_mask(result) if fields is None else None,
+    )
+    return [serialize(row) for row in result]
+
+
+def serialize_row(row, fields=None, converters=None):
+    """Serializa una sola fila (``Row`` de SQLAlchemy) con el mismo plan compilado."""
+    return compile_row_serializer(row._fields, fields, converters)(row)
@@ -0,0 +1,166 @@
+"""
+Prueba de concurrencia de la secuencia de requerimiento_huella_logs.
+
+    python -m utils.stress_huella_secuencia --requerimiento-recurso-id 123 \\
+        [--url http://localhost:5000] [--escrituras 200] [--hilos 16] [--lote 5]
+
+Dispara escrituras en paralelo contra la API en marcha, todas para el mismo
+requerimiento y sin ``secuencia`` (la asigna el servidor). Con ``--lote`` > 1
+alterna POST individuales con POST /bulk de ese tamano. Cada log copia los
+campos del ultimo log del requerimiento, que por lo tanto debe tener al menos
+uno. El token se firma con el JWT_SECRET de la configuracion local
+(``--usuario-id`` es el usuario del token).
+
+Al final verifica que no hubo ningun 409 ni otro error y que las secuencias
+asignadas no se repiten, y borra los logs creados (salvo ``--conservar``).
+Sale con codigo 1 si encontro algun conflicto.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATE_FIELDS = (
+    'requerimiento_numero',
+    'requerimiento_accion_log_id',
+    'requerimiento_estado_id',
+    'respuesta_estado_id',
+    'movimiento_tipo_id',
+    'usuario_accion_id',
+    'usuario_emisor_id',
+    'usuario_receptor_id',
+    'coe_origen_id',
+    'mesa_origen_id',
+    'coe_destino_id',
+    'mesa_destino_id',
+    'recurso_grupo_id',
+    'recurso_tipo_id',
+    'recurso_inventario_id',
+    'cantidad_solicitada',
+    'cantidad_asignada',
+    'motivo_id',
+)
+
+
+def _template(engine, requerimiento_recurso_id):
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            'SELECT * FROM public.requerimiento_huella_logs '
+            'WHERE requerimiento_recurso_id = :rid ORDER BY secuencia DESC LIMIT 1'
+        ), {'rid': requerimiento_recurso_id}).mappings().first()
+    if row is None:
+        return None
+    template = {field: row[field] for field in TEMPLATE_FIELDS if row[field] is not None}
+    template['requerimiento_recurso_id'] = requerimiento_recurso_id
+    template['requerimiento_respuesta_situacion'] = 'stress_huella_secuencia'
+    return template
+
+
+def _post(url, token, body):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'},
+        method='POST',
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            status, payload = response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        status, payload = exc.code, exc.read()
+    elapsed = time.perf_counter() - start
+    try:
+        payload = json.loads(payload)
+    except ValueError:
+        payload = None
+    return status, payload, elapsed
+
+
+def _escritura(base_url, token, template, lote, n):
+    """Un request: POST individual o /bulk; devuelve (status, [(id, secuencia)], segundos)."""
+    if lote > 1 and n % 2:
+        status, payload, elapsed = _post(f'{base_url}/api/requerimiento-huella-logs/bulk', token,
+                                         [dict(template) for _ in range(lote)])
+        creados = [(r['id'], r['secuencia']) for r in (payload or {}).get('resultados', []) if r and 'id' in r]
+    else:
+        status, payload, elapsed = _post(f'{base_url}/api/requerimiento-huella-logs', token, dict(template))
+        creados = [(payload['id'], payload['secuencia'])] if status == 201 and payload else []
+    return status, creados, elapsed
+
+
+def _percentil(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Escrituras concurrentes de huella sobre un mismo requerimiento')
+    parser.add_argument('--requerimiento-recurso-id', type=int, required=True)
+    parser.add_argument('--url', default='http://localhost:5000', help='URL base de la API en marcha')
+    parser.add_argument('--escrituras', type=int, default=200, help='cantidad de requests')
+    parser.add_argument('--hilos', type=int, default=16, help='requests simultaneos')
+    parser.add_argument('--lote', type=int, default=1, help='logs por POST /bulk (1 = solo POST individual)')
+    parser.add_argument('--usuario-id', type=int, default=1, help='user_id del token')
+    parser.add_argument('--conservar', action='store_true', help='no borrar los logs creados')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import create_engine, text
+    from auth import generate_token
+    from config import DATABASE_URL
+
+    engine = create_engine(DATABASE_URL)
+    template = _template(engine, args.requerimiento_recurso_id)
+    if template is None:
+        print(f'El requerimiento {args.requerimiento_recurso_id} no tiene logs para usar de plantilla')
+        return 2
+    token = generate_token({'user_id': args.usuario_id, 'usuario': 'stress_huella_secuencia'})
+    base_url = args.url.rstrip('/')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+        resultados = list(pool.map(
+            lambda n: _escritura(base_url, token, template, args.lote, n),
+            range(args.escrituras),
+        ))
+    total = time.perf_counter() - start
+
+    statuses = Counter(status for status, _creados, _elapsed in resultados)
+    creados = [item for _status, items, _elapsed in resultados for item in items]
+    latencias = [elapsed for _status, _creados, elapsed in resultados]
+    repetidas = [sec for sec, count in Counter(sec for _id, sec in creados).items() if count > 1]
+
+    print(f'{args.escrituras} requests en {total:.2f}s con {args.hilos} hilos; {len(creados)} logs creados')
+    print('status: ' + ', '.join(f'{status}={count}' for status, count in sorted(statuses.items())))
+    print(f'latencia p50 {1000 * _percentil(latencias, 0.5):.1f} ms, p95 {1000 * _percentil(latencias, 0.95):.1f} ms')
+    if creados:
+        secuencias = sorted(sec for _id, sec in creados)
+        print(f'secuencias {secuencias[0]}..{secuencias[-1]}, repetidas: {len(repetidas)}')
+
+    if creados and not args.conservar:
+        with engine.begin() as conn:
+            conn.execute(text('DELETE FROM public.requerimiento_huella_logs WHERE id = ANY(:ids)'),
+                         {'ids': [log_id for log_id, _sec in creados]})
+        print(f'{len(creados)} logs de prueba borrados')
+    engine.dispose()
+
+    conflictos = statuses.get(409, 0)
+    errores = sum(count for status, count in statuses.items() if status >= 300)
+    print(f'{conflictos} conflictos 409, {errores} respuestas con error')
+    return 1 if errores or repetidas else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())